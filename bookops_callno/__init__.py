@@ -1,5 +1,17 @@
 __version__ = "0.1.0"
 
+__all__ = ["BplCallNo", "NyplCallNo"]
 
-from .constructor_bpl import BplCallNo
-from .constructor_nypl import NyplCallNo
+
+def __getattr__(name: str):
+    # constructors are imported on first access, so `import bookops_callno`
+    # does not pay for importing pymarc
+    if name == "BplCallNo":
+        from .constructor_bpl import BplCallNo
+
+        return BplCallNo
+    elif name == "NyplCallNo":
+        from .constructor_nypl import NyplCallNo
+
+        return NyplCallNo
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
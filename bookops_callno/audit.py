@@ -0,0 +1,333 @@
+# -*- coding: utf-8 -*-
+
+"""
+This module provides bulk validation of existing BPL call numbers (099).
+For each record the expected call number is constructed for the pattern of
+the existing one and both are compared element by element.
+"""
+
+import os
+from collections import Counter
+from functools import partial
+from typing import Dict, List, NamedTuple, Optional, TextIO, Tuple
+
+from pymarc import Record
+
+from bookops_callno.batch import (
+    BatchWriter,
+    ProgressReporter,
+    get_control_no,
+    iter_batch,
+)
+from bookops_callno.callno_parser import CallNoElements, parse_bpl_callno
+from bookops_callno.constructor_bpl import BplCallNo
+from bookops_callno.errors import CallNoConstructorError
+from bookops_callno.pipeline import Pipeline
+
+AUDIT_FORMATS = ("csv", "jsonl")
+AUDIT_STATUSES = ("match", "mismatch", "missing", "error")
+# elements of call number compared
+AUDIT_ELEMENTS = (
+    "pattern",
+    "format",
+    "language",
+    "audience",
+    "classification",
+    "subject",
+    "cutter",
+)
+# language assumed when a call number has none
+DEFAULT_LANGUAGE = "ENG"
+# patterns `BplCallNo` can construct; others are audited with 'auto'
+AUDITED_PATTERNS = frozenset(
+    ["bio", "des", "dew", "eaudio", "ebook", "evideo", "fic", "pic"]
+)
+
+
+class AuditResult(NamedTuple):
+    """
+    Outcome of validation of a single record's call number
+    """
+
+    seq: int
+    control_no: Optional[str]
+    status: str
+    pattern: str
+    existing: Optional[str] = None
+    expected: Optional[str] = None
+    differences: Tuple[str, ...] = ()
+    error: Optional[str] = None
+    size: int = 0
+
+    def as_dict(self) -> Dict:
+        """
+        Returns serializable representation of the result
+        """
+        return {
+            "seq": self.seq,
+            "control_no": self.control_no,
+            "status": self.status,
+            "pattern": self.pattern,
+            "existing": self.existing,
+            "expected": self.expected,
+            "differences": ";".join(self.differences),
+            "error": self.error,
+        }
+
+
+def compare_elements(
+    existing: CallNoElements, expected: CallNoElements
+) -> Tuple[str, ...]:
+    """
+    Lists names of call number elements that differ; a missing language
+    equals the default language (ENG)
+
+    Args:
+        existing:               elements of the existing call number
+        expected:               elements of the constructed call number
+
+    Returns:
+        names of differing elements
+    """
+    return tuple(
+        name
+        for name in AUDIT_ELEMENTS
+        if _element(existing, name) != _element(expected, name)
+    )
+
+
+def _element(elements: CallNoElements, name: str) -> Optional[str]:
+    value = getattr(elements, name)
+    if name == "language" and value is None:
+        return DEFAULT_LANGUAGE
+    return value
+
+
+def audit_record(
+    seq: int, data: bytes, requested_call_type: Optional[str] = None
+) -> AuditResult:
+    """
+    Validates existing call number of a raw MARC21 record. Any exceptions are
+    reported in the result instead of being raised.
+
+    Args:
+        seq:                    position of the record in the batch
+        data:                   raw MARC21 record
+        requested_call_type:    pattern of the expected call number; if None
+                                pattern of the existing call number is used
+
+    Returns:
+        `AuditResult` instance
+    """
+    size = len(data)
+    try:
+        bib = Record(data=data)
+    except Exception as exc:
+        return AuditResult(
+            seq,
+            None,
+            "error",
+            "und",
+            error=f"Invalid MARC record. Error: '{exc}'.",
+            size=size,
+        )
+
+    control_no = get_control_no(bib)
+    field = bib["099"]
+    existing = parse_bpl_callno(field) if field is not None else None
+
+    call_type = requested_call_type
+    if call_type is None:
+        if existing is not None and existing.pattern in AUDITED_PATTERNS:
+            call_type = existing.pattern
+        else:
+            call_type = "auto"
+
+    try:
+        callno = BplCallNo(bib=bib, requested_call_type=call_type)
+    except Exception as exc:
+        callno = None
+        error = f"{type(exc).__name__}: {exc}"
+    else:
+        error = None
+        if callno.callno_field is None:
+            error = "Unable to construct call number."
+
+    expected = None
+    if error is None:
+        expected = parse_bpl_callno(callno.callno_field)
+
+    pattern = existing.pattern if existing is not None else call_type
+    if existing is None:
+        return AuditResult(
+            seq,
+            control_no,
+            "missing",
+            pattern,
+            expected=expected.callno if expected is not None else None,
+            error=error,
+            size=size,
+        )
+    if expected is None:
+        return AuditResult(
+            seq, control_no, "error", pattern, existing.callno, error=error, size=size
+        )
+
+    differences = compare_elements(existing, expected)
+    return AuditResult(
+        seq,
+        control_no,
+        "mismatch" if differences else "match",
+        pattern,
+        existing.callno,
+        expected.callno,
+        differences,
+        size=size,
+    )
+
+
+class AuditStats:
+    """
+    Collects counts of audit outcomes per status, pattern, and element
+    """
+
+    def __init__(self):
+        self.processed = 0
+        self.statuses: Counter = Counter()
+        self.patterns: Dict[str, Counter] = {}
+        self.elements: Counter = Counter()
+
+    def update(self, result: AuditResult) -> None:
+        """
+        Adds outcome of a single record to the totals
+        """
+        self.processed += 1
+        self.statuses[result.status] += 1
+        self.patterns.setdefault(result.pattern, Counter())[result.status] += 1
+        self.elements.update(result.differences)
+
+    def as_dict(self) -> Dict:
+        """
+        Returns serializable representation of the totals
+        """
+        return {
+            "processed": self.processed,
+            "statuses": {s: self.statuses[s] for s in AUDIT_STATUSES},
+            "patterns": {p: dict(c) for p, c in self.patterns.items()},
+            "elements": dict(self.elements),
+        }
+
+    def summary(self) -> str:
+        """
+        Returns human readable summary of the totals
+        """
+        lines = [f"processed: {self.processed:,}"]
+        for status in AUDIT_STATUSES:
+            lines.append(f"  {status:<10} {self.statuses[status]:,}")
+        if self.elements:
+            lines.append("differing elements:")
+            for name in AUDIT_ELEMENTS:
+                if self.elements[name]:
+                    lines.append(f"  {name:<15} {self.elements[name]:,}")
+        return "\n".join(lines)
+
+
+class AuditWriter(BatchWriter):
+    """
+    Writes discrepancy report in 'csv' or 'jsonl' format
+    """
+
+    csv_columns = [
+        "seq",
+        "control_no",
+        "status",
+        "pattern",
+        "existing",
+        "expected",
+        "differences",
+        "error",
+    ]
+
+    def __init__(self, path: str, output_format: str = "csv"):
+        if output_format not in AUDIT_FORMATS:
+            raise CallNoConstructorError(
+                "Invalid 'output_format' argument used. "
+                f"Must be one of: {', '.join(AUDIT_FORMATS)}."
+            )
+        super().__init__(path, output_format)
+
+
+def _audit_item(item: tuple, **kwargs) -> AuditResult:
+    seq, data = item
+    return audit_record(seq, data, **kwargs)
+
+
+def run_audit(
+    paths: List[str],
+    output: str,
+    output_format: str = "csv",
+    workers: int = 1,
+    progress: Optional[TextIO] = None,
+    requested_call_type: Optional[str] = None,
+    report_matches: bool = False,
+) -> AuditStats:
+    """
+    Validates existing BPL call numbers of all records in given MARC files and
+    writes discrepancy report to the output file
+
+    Args:
+        paths:                  list of paths to MARC21 files
+        output:                 path to the report file
+        output_format:          'csv' or 'jsonl'
+        workers:                number of worker processes
+        progress:               stream for progress reports (None disables)
+        requested_call_type:    pattern of expected call numbers; if None
+                                pattern of each existing call number is used
+        report_matches:         include in the report records with matching
+                                call numbers
+
+    Returns:
+        `AuditStats` instance
+    """
+    if workers < 1:
+        raise CallNoConstructorError(
+            "Invalid 'workers' argument used. Must be a positive integer."
+        )
+
+    worker = partial(_audit_item, requested_call_type=requested_call_type)
+    stats = AuditStats()
+    reporter = None
+    if progress is not None:
+        total_bytes = sum(os.path.getsize(p) for p in paths)
+        reporter = ProgressReporter(total_bytes, stream=progress)
+
+    with AuditWriter(output, output_format) as writer:
+        Pipeline(workers).run(
+            iter_batch(paths),
+            worker,
+            partial(
+                _consume,
+                writer=writer,
+                stats=stats,
+                reporter=reporter,
+                report_matches=report_matches,
+            ),
+        )
+
+    if reporter is not None:
+        reporter.finish()
+    return stats
+
+
+def _consume(
+    result: AuditResult,
+    writer: AuditWriter,
+    stats: AuditStats,
+    reporter: Optional[ProgressReporter],
+    report_matches: bool,
+) -> None:
+    if report_matches or result.status != "match":
+        writer.write(result)
+    stats.update(result)
+    if reporter is not None:
+        reporter.update(result.size)
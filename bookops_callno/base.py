@@ -3,13 +3,19 @@
 """
 This module provides the base constructor class
 """
-from typing import List, Optional, Tuple
+
+from typing import Dict, List, NamedTuple, Optional, Tuple
 
 from pymarc import Record, Field
 
 
+from bookops_callno.dewey import get_dewey
 from bookops_callno.errors import CallNoConstructorError
+from bookops_callno.metrics import CALLNOS, metrics_paused
+from bookops_callno.sorting import callno_sort_key
 from bookops_callno.parser import (
+    FixedFields,
+    decode_fixed_fields,
     get_audience,
     get_callno_relevant_subjects,
     get_field,
@@ -19,28 +25,84 @@ from bookops_callno.parser import (
     get_physical_description,
     get_record_type_code,
     is_biography,
-    is_dewey,
-    is_dewey_plus_subject,
     is_fiction,
 )
+from bookops_callno.rules_shared import (
+    CONTENT_TABLE,
+    E_RESOURCE_PATTERNS,
+    dewey_subject,
+)
+
+
+class Candidates(NamedTuple):
+    """
+    Call numbers of all patterns applicable to a material
+    """
+
+    auto: Optional[str]
+    callnos: Dict[str, Field]
+
+    def as_dict(self) -> Dict:
+        """
+        Returns serializable representation of the candidates
+        """
+        return {
+            "auto": self.auto,
+            "callnos": {p: f.value() for p, f in self.callnos.items()},
+        }
+
+
+class Features(NamedTuple):
+    """
+    System-neutral elements of a record extracted for call number creation;
+    shared by constructors of both systems, so sequences are stored as tuples
+    """
+
+    audience_info: Optional[str]
+    content_candidates: Tuple[str, ...]
+    content_info: Optional[str]
+    cutter_info: Optional[Field]
+    dewey_info: Optional[str]
+    form_of_item_info: Optional[str]
+    language_code: Optional[str]
+    physical_desc_info: Optional[str]
+    record_type_info: Optional[str]
+    subject_info: Tuple[Field, ...]
 
 
 class CallNo:
-    def __init__(self, bib: Record = None, requested_call_type: str = "auto"):
+    # call number patterns a constructor can create, in order of review;
+    # each pattern has a `_create_<pattern>_callno` method
+    patterns: Tuple[str, ...] = ()
+
+    def __init__(
+        self,
+        bib: Record = None,
+        requested_call_type: str = "auto",
+        features: Features = None,
+    ):
         """
         Genaral call number constructor. The 'requested_call_type' may specify what
         type of the call number should be constructed (fiction, biography, etc.).
         See BPLCallNo and NYPLCallNo classes for the details.
+        Elements already extracted by another constructor can be passed as
+        'features', in which case the bib is not parsed again.
 
         """
         if not isinstance(requested_call_type, str):
             raise CallNoConstructorError(
                 "Invalid type of 'requested_call_type' argument used. Must be a string."
             )
+        if features is not None and not isinstance(features, Features):
+            raise CallNoConstructorError(
+                "Invalid 'features' argument used. Must be Features instance."
+            )
 
         self.audience_info = None
+        self.content_candidates = []
         self.content_info = None
         self.cutter_info = None
+        self.dewey_info = None
         self.form_of_item_info = None
         self.language_code = None
         self.physical_desc_info = None
@@ -49,8 +111,14 @@ class CallNo:
 
         self.callno_field = None
         self.requested_call_type = requested_call_type
+        # constructions without a record are not counted in metrics
+        self._has_bib = bib is not None
 
-        self._prep(bib)
+        if features is None:
+            self._prep(bib)
+        else:
+            self._apply_features(features)
+        self.features = self._extract_features()
 
     def __repr__(self) -> str:
         """
@@ -65,23 +133,99 @@ class CallNo:
         """
         Prepares elements for a call number creation
         """
-        self.audience_info = self._get_audience_info(bib)
+        # leader and 008 are decoded once for all elements
+        fixed = decode_fixed_fields(bib) if bib is not None else None
+        self.audience_info = self._get_audience_info(bib, fixed)
         self.cutter_info = self._get_main_entry_info(bib)
-        self.form_of_item_info = self._get_form_of_item_info(bib)
-        self.language_code = self._get_language_code(bib)
+        self.dewey_info = self._get_dewey_info(bib)
+        self.form_of_item_info = self._get_form_of_item_info(bib, fixed)
+        self.language_code = self._get_language_code(bib, fixed)
         self.physical_desc_info = self._get_physical_description_info(bib)
-        self.record_type_info = self._get_record_type_info(bib)
+        self.record_type_info = self._get_record_type_info(bib, fixed)
         self.subject_info = self._get_subject_info(bib)
+        self.content_candidates = self._get_content_candidates(bib, fixed)
         self.content_info = self._get_content_info(bib)
 
-    def _get_audience_info(self, bib: Record) -> Optional[str]:
+    def _apply_features(self, features: Features) -> None:
+        """
+        Sets elements extracted from a record by another constructor
+        """
+        for name, value in zip(Features._fields, features):
+            if isinstance(value, tuple):
+                value = list(value)
+            setattr(self, name, value)
+
+    def _extract_features(self) -> Features:
+        """
+        Returns elements extracted from the record as `Features`
+        """
+        values = []
+        for name in Features._fields:
+            value = getattr(self, name)
+            if isinstance(value, list):
+                value = tuple(value)
+            values.append(value)
+        return Features(*values)
+
+    def _create(self) -> None:
+        """
+        Creates call number; with 'auto' patterns applicable to the material
+        are tried in order of preference
+        """
+        if self.requested_call_type == "auto":
+            for pattern in self.content_candidates:
+                self.callno_field = self._create_callno(pattern)
+                if self.callno_field is not None:
+                    self.content_info = pattern
+                    break
+        else:
+            self.callno_field = self._create_callno(self.requested_call_type)
+
+    def _create_callno(self, pattern: str) -> Optional[Field]:
+        """
+        Creates call number of given pattern
+        """
+        if pattern not in self.patterns:
+            return None
+        return getattr(self, f"_create_{pattern}_callno")()
+
+    def _get_audience_info(
+        self, bib: Record, fixed: FixedFields = None
+    ) -> Optional[str]:
         """
         Determines audience call number segment
         """
-        audn = get_audience(bib)
+        audn = get_audience(bib, fixed)
         return audn
 
-    def _get_content_info(self, bib: Record) -> str:
+    def _get_content_candidates(
+        self, bib: Record, fixed: FixedFields = None
+    ) -> List[str]:
+        """
+        Determines call number patterns applicable to the material in order of
+        preference. Patterns are looked up in `rules_shared.CONTENT_TABLE` by
+        features of the record; only Dewey patterns need further checks.
+        """
+        if bib is None:
+            return []
+
+        key = (
+            self.record_type_info,
+            self.form_of_item_info in ("o", "s"),
+            self.audience_info == "early juv",
+            is_fiction(bib, fixed),
+            is_biography(bib, fixed),
+        )
+        candidates = []
+        for pattern in CONTENT_TABLE.get(key, ()):
+            if pattern == "des" and not self._has_dewey_subject():
+                continue
+            elif pattern == "dew" and self.dewey_info is None:
+                continue
+            candidates.append(pattern)
+        return candidates
+
+    def _get_content_info(self, bib: Record) -> Optional[str]:
         """
         Determines broad material content
 
@@ -92,39 +236,39 @@ class CallNo:
                                     - dew (dewey)
                                     - bio (biography)
                                     - des (dewey + subject)
+                                    - eaudio, ebook, evideo (e-resources)
                                     - und (undetermined)
         """
-        # print material
-        if self.record_type_info in ("a", "t"):
-            # order matters!
-            if self.audience_info == "early juv":
-                self.content_info = "pic"
-            elif is_fiction(bib):
-                self.content_info = "fic"
-            elif is_dewey_plus_subject(bib):
-                self.content_info = "des"
-            elif is_biography(bib):
-                self.content_info = "bio"
-            elif is_dewey(bib):
-                self.content_info = "dew"
-            else:
-                self.content_info = "und"
-        # visual material
-        elif self.record_type_info == "g":
-            pass
+        if bib is None:
+            return None
+        elif self.content_candidates:
+            return self.content_candidates[0]
+        else:
+            return "und"
 
-    def _get_form_of_item_info(self, bib: Record) -> Optional[str]:
+    def _get_dewey_info(self, bib: Record) -> Optional[str]:
+        """
+        Returns Dewey class number from MARC 082 tag
+        """
+        class_number = get_dewey(bib)
+        return class_number
+
+    def _get_form_of_item_info(
+        self, bib: Record, fixed: FixedFields = None
+    ) -> Optional[str]:
         """
         Determines form of item MARC code
         """
-        form_of_item = get_form_of_item_code(bib)
+        form_of_item = get_form_of_item_code(bib, fixed)
         return form_of_item
 
-    def _get_language_code(self, bib: Record) -> Optional[str]:
+    def _get_language_code(
+        self, bib: Record, fixed: FixedFields = None
+    ) -> Optional[str]:
         """
         Determines language code of the material
         """
-        lang = get_language_code(bib)
+        lang = get_language_code(bib, fixed)
         return lang
 
     def _get_main_entry_info(self, bib: Record) -> Tuple[str, Field]:
@@ -143,11 +287,13 @@ class CallNo:
         physical_desc = get_physical_description(bib)
         return physical_desc
 
-    def _get_record_type_info(self, bib: Record) -> Optional[str]:
+    def _get_record_type_info(
+        self, bib: Record, fixed: FixedFields = None
+    ) -> Optional[str]:
         """
         Returns MARC leader record type code
         """
-        rec_type = get_record_type_code(bib)
+        rec_type = get_record_type_code(bib, fixed)
         return rec_type
 
     def _get_subject_info(self, bib: Record) -> Optional[str]:
@@ -157,8 +303,67 @@ class CallNo:
         subjects = get_callno_relevant_subjects(bib)
         return subjects
 
+    def _has_dewey_subject(self) -> bool:
+        """
+        Determines if class number requires a subject segment and the segment
+        can be built from a subject of the required kind
+        """
+        return dewey_subject(self.dewey_info, self.subject_info) is not None
+
+    def _record_metrics(self, system: str) -> None:
+        """
+        Counts constructed call number in package metrics; constructions
+        without a record and while metrics are paused are skipped
+        """
+        if not self._has_bib or metrics_paused():
+            return
+        if self.requested_call_type == "auto":
+            pattern = self.content_info or "und"
+        else:
+            pattern = self.requested_call_type
+        result = "created" if self.callno_field is not None else "failed"
+        CALLNOS.inc(system, pattern, result)
+
+    def candidates(self) -> Candidates:
+        """
+        Creates call numbers of all patterns applicable to the material from
+        elements already extracted from the record, so alternatives can be
+        reviewed side by side without parsing the record again. E-resource
+        patterns apply to electronic resources only.
+
+        Returns:
+            `Candidates` instance
+        """
+        callnos = {}
+        for pattern in self.patterns:
+            if (
+                pattern in E_RESOURCE_PATTERNS.values()
+                and pattern not in self.content_candidates
+            ):
+                continue
+            if (
+                self.requested_call_type in ("auto", pattern)
+                and pattern == self.content_info
+                and self.callno_field is not None
+            ):
+                field = self.callno_field
+            else:
+                field = self._create_callno(pattern)
+            if field is not None:
+                callnos[pattern] = field
+        auto = next((p for p in self.content_candidates if p in callnos), None)
+        return Candidates(auto, callnos)
+
     def as_pymarc_field(self) -> Optional[Field]:
         """
         Returns constructed call number as `pymarc.Field` object
         """
         return self.callno_field
+
+    def sort_key(self) -> Optional[bytes]:
+        """
+        Returns shelf order sort key of the constructed call number
+        """
+        if self.callno_field is None:
+            return None
+        return callno_sort_key(str(self))
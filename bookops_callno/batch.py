@@ -0,0 +1,1018 @@
+# -*- coding: utf-8 -*-
+
+"""
+This module provides batch processing of files with MARC records
+"""
+
+import csv
+import json
+import os
+import sys
+import time
+from functools import partial
+from typing import (
+    BinaryIO,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    TextIO,
+    Tuple,
+)
+
+from pymarc import Field, Record
+
+from bookops_callno.base import Candidates, CallNo
+from bookops_callno.checkpoint import Checkpointer, InputPosition, resume_state
+from bookops_callno.constructor_bpl import BplCallNo
+from bookops_callno.constructor_nypl import NyplCallNo
+from bookops_callno.dedup import Deduplicator
+from bookops_callno.errors import CallNoConstructorError
+from bookops_callno.metrics import (
+    MetricsDelta,
+    MetricsExporter,
+    apply_delta,
+    metrics_delta,
+    metrics_snapshot,
+    record_result,
+)
+from bookops_callno.orders import Order, OrderIndex, join_orders
+from bookops_callno.pipeline import Pipeline, PipelineMetrics
+from bookops_callno.rawmarc import RECORD_TERMINATOR, splice_field
+from bookops_callno.shelflist import ShelflistIndex
+
+OUTPUT_FORMATS = ("marc", "csv", "jsonl")
+SYSTEMS = ("bpl", "nypl")
+# 'both' creates call numbers of all systems from a single parse of a record
+BATCH_SYSTEMS = SYSTEMS + ("both",)
+
+
+class BatchResult(NamedTuple):
+    """
+    Outcome of call number creation for a single record of a batch
+    """
+
+    seq: int
+    control_no: Optional[str]
+    pattern: str
+    callno: Optional[str]
+    error: Optional[str] = None
+    marc: Optional[bytes] = None
+    size: int = 0
+    field: Optional[tuple] = None
+    collision: Optional[bool] = None
+    sort_key: Optional[bytes] = None
+    duplicate: bool = False
+    elapsed: Optional[float] = None
+    order_no: Optional[str] = None
+    metrics: Optional[MetricsDelta] = None
+    system: Optional[str] = None
+
+    def as_dict(self) -> Dict:
+        """
+        Returns serializable representation of the result; order number is
+        included only for results joined with order lines and library system
+        only for results of several systems
+        """
+        data = {
+            "seq": self.seq,
+            "control_no": self.control_no,
+            "pattern": self.pattern,
+            "callno": self.callno,
+            "sort_key": self.sort_key.hex() if self.sort_key is not None else None,
+            "error": self.error,
+            "collision": self.collision,
+        }
+        if self.order_no is not None:
+            data["order_no"] = self.order_no
+        if self.system is not None:
+            data["system"] = self.system
+        return data
+
+
+def iter_marc_chunks(
+    fh: BinaryIO, buffer_size: int = 65536, limit: Optional[int] = None
+) -> Iterator[bytes]:
+    """
+    Splits a stream of MARC21 records into raw records using the record
+    terminator (0x1D). Records are not parsed.
+
+    Args:
+        fh:                     file handle opened in binary mode
+        buffer_size:            number of bytes read at once
+        limit:                  maximum number of bytes read from the current
+                                position; whole stream if None
+
+    Yields:
+        raw record
+    """
+    pending = b""
+    while True:
+        if limit is None:
+            data = fh.read(buffer_size)
+        else:
+            data = fh.read(min(buffer_size, limit))
+            limit -= len(data)
+        if not data:
+            break
+        pieces = (pending + data).split(RECORD_TERMINATOR)
+        pending = pieces.pop()
+        for piece in pieces:
+            yield piece + RECORD_TERMINATOR
+
+    # truncated record at the end of the file
+    if pending.strip():
+        yield pending
+
+
+def create_callno(
+    bib: Record = None,
+    system: str = "bpl",
+    requested_call_type: str = "auto",
+    order: Optional[Order] = None,
+) -> CallNo:
+    """
+    Constructs call number for given library system
+
+    Args:
+        bib:                    pymarc.Record instance
+        system:                 library system; options: 'bpl', 'nypl'
+        requested_call_type:    call pattern to be created
+        order:                  order line of the bib, see
+                                `bookops_callno.orders`; supported by BPL
+                                only
+
+    Returns:
+        bookops_callno.base.CallNo instance
+    """
+    if system == "bpl":
+        if order is not None:
+            return BplCallNo(
+                bib=bib,
+                order_audn=order.audn,
+                order_lang=order.lang,
+                order_note=order.note,
+                order_shelf=order.shelf,
+                requested_call_type=requested_call_type,
+            )
+        return BplCallNo(bib=bib, requested_call_type=requested_call_type)
+    elif system == "nypl":
+        if order is not None:
+            raise CallNoConstructorError(
+                "Invalid 'order' argument used. Order data is supported for BPL only."
+            )
+        return NyplCallNo(bib=bib, requested_call_type=requested_call_type)
+    else:
+        raise CallNoConstructorError(
+            "Invalid 'system' argument used. Must be 'bpl' or 'nypl'."
+        )
+
+
+def create_callnos(
+    bib: Record = None,
+    systems: Tuple[str, ...] = SYSTEMS,
+    requested_call_type: str = "auto",
+) -> Dict[str, CallNo]:
+    """
+    Constructs call numbers for several library systems from a single parse of
+    the record, e.g. for shared vendor files; elements extracted by the first
+    system's constructor are reused by the others
+
+    Args:
+        bib:                    pymarc.Record instance
+        systems:                library systems; options: 'bpl', 'nypl'
+        requested_call_type:    call pattern to be created
+
+    Returns:
+        dictionary of bookops_callno.base.CallNo instances by system
+    """
+    callnos = {}
+    features = None
+    for system in systems:
+        if system == "bpl":
+            callno = BplCallNo(
+                bib=bib, requested_call_type=requested_call_type, features=features
+            )
+        elif system == "nypl":
+            callno = NyplCallNo(
+                bib=bib, requested_call_type=requested_call_type, features=features
+            )
+        else:
+            raise CallNoConstructorError(
+                "Invalid 'system' argument used. Must be 'bpl' or 'nypl'."
+            )
+        features = callno.features
+        callnos[system] = callno
+    return callnos
+
+
+def create_candidates(bib: Record = None, system: str = "bpl") -> Candidates:
+    """
+    Constructs call numbers of all patterns applicable to a record, e.g. for
+    review queues; the record is parsed only once
+
+    Args:
+        bib:                    pymarc.Record instance
+        system:                 library system; options: 'bpl', 'nypl'
+
+    Returns:
+        bookops_callno.base.Candidates instance
+    """
+    return create_callno(bib, system).candidates()
+
+
+def get_control_no(bib: Record) -> Optional[str]:
+    """
+    Returns value of the MARC tag 001 if present
+    """
+    field = bib["001"]
+    if field is None:
+        return None
+    return field.data
+
+
+def splice_callno(bib: Record, field: Field) -> bytes:
+    """
+    Replaces any existing call number fields in the bib with a new one and
+    serializes the record to MARC21
+
+    Args:
+        bib:                    pymarc.Record instance
+        field:                  call number as pymarc.Field instance
+
+    Returns:
+        MARC21 record
+    """
+    bib.remove_fields(field.tag)
+    bib.add_ordered_field(field)
+    return bib.as_marc()
+
+
+def process_record(
+    seq: int,
+    data: bytes,
+    system: str = "bpl",
+    requested_call_type: str = "auto",
+    splice: bool = False,
+    order: Optional[Order] = None,
+) -> BatchResult:
+    """
+    Creates call number for a raw MARC21 record. Any exceptions are reported
+    in the result instead of being raised, so a single malformed record does
+    not stop a batch.
+
+    Args:
+        seq:                    position of the record in the batch
+        data:                   raw MARC21 record
+        system:                 library system; options: 'bpl', 'nypl'
+        requested_call_type:    call pattern to be created
+        splice:                 include in the result the record with the new
+                                call number field
+        order:                  order line the call number is created for
+
+    Returns:
+        `BatchResult` instance
+    """
+    start = time.perf_counter()
+    try:
+        bib = Record(data=data)
+    except Exception as exc:
+        return BatchResult(
+            seq,
+            None,
+            requested_call_type,
+            None,
+            error=f"Invalid MARC record. Error: '{exc}'.",
+            marc=data if splice else None,
+            size=len(data),
+            elapsed=time.perf_counter() - start,
+            order_no=order.order_no if order is not None else None,
+        )
+
+    result = _process_bib(seq, bib, system, requested_call_type, splice, data, order)
+    return result._replace(elapsed=time.perf_counter() - start)
+
+
+def process_bib(
+    seq: int,
+    bib: Record,
+    system: str = "bpl",
+    requested_call_type: str = "auto",
+    splice: bool = False,
+    data: bytes = None,
+    order: Optional[Order] = None,
+) -> BatchResult:
+    """
+    Creates call number for a parsed MARC record. Any exceptions are reported
+    in the result instead of being raised.
+
+    Args:
+        seq:                    position of the record in the batch
+        bib:                    pymarc.Record instance
+        system:                 library system; options: 'bpl', 'nypl'
+        requested_call_type:    call pattern to be created
+        splice:                 include in the result the record with the new
+                                call number field
+        data:                   raw MARC21 record the bib was parsed from;
+                                returned unchanged when spliced call number
+                                can not be created
+        order:                  order line the call number is created for
+
+    Returns:
+        `BatchResult` instance
+    """
+    start = time.perf_counter()
+    result = _process_bib(seq, bib, system, requested_call_type, splice, data, order)
+    return result._replace(elapsed=time.perf_counter() - start)
+
+
+def _process_bib(
+    seq: int,
+    bib: Record,
+    system: str,
+    requested_call_type: str,
+    splice: bool,
+    data: Optional[bytes],
+    order: Optional[Order] = None,
+) -> BatchResult:
+    size = len(data) if data is not None else 0
+    if splice and data is None:
+        data = bib.as_marc()
+
+    control_no = get_control_no(bib)
+    order_no = order.order_no if order is not None else None
+    try:
+        callno = create_callno(bib, system, requested_call_type, order)
+    except Exception as exc:
+        return BatchResult(
+            seq,
+            control_no,
+            requested_call_type,
+            None,
+            error=f"{type(exc).__name__}: {exc}",
+            marc=data if splice else None,
+            size=size,
+            order_no=order_no,
+        )
+
+    result = _callno_result(seq, control_no, callno, requested_call_type, size)
+    if not splice:
+        return result._replace(field=None, order_no=order_no)
+    if result.field is None:
+        return result._replace(marc=data, order_no=order_no)
+    try:
+        marc = splice_field(data, *result.field)
+    except ValueError:
+        marc = splice_callno(bib, callno.as_pymarc_field())
+    return result._replace(marc=marc, order_no=order_no)
+
+
+def _callno_result(
+    seq: int,
+    control_no: Optional[str],
+    callno: CallNo,
+    requested_call_type: str,
+    size: int,
+) -> BatchResult:
+    if requested_call_type == "auto":
+        pattern = callno.content_info or "und"
+    else:
+        pattern = requested_call_type
+
+    field = callno.as_pymarc_field()
+    if field is None:
+        return BatchResult(
+            seq,
+            control_no,
+            pattern,
+            None,
+            error="Unable to construct call number.",
+            size=size,
+        )
+    return BatchResult(
+        seq,
+        control_no,
+        pattern,
+        str(callno),
+        size=size,
+        field=(field.tag, field.indicators, field.subfields),
+        sort_key=callno.sort_key(),
+    )
+
+
+def process_record_systems(
+    seq: int,
+    data: bytes,
+    systems: Tuple[str, ...] = SYSTEMS,
+    requested_call_type: str = "auto",
+    splice: bool = False,
+) -> Tuple[BatchResult, ...]:
+    """
+    Creates call numbers of several library systems for a raw MARC21 record
+    parsed once, see `create_callnos`. Any exceptions are reported in the
+    results instead of being raised.
+
+    Args:
+        seq:                    position of the record in the batch
+        data:                   raw MARC21 record
+        systems:                library systems; options: 'bpl', 'nypl'
+        requested_call_type:    call pattern to be created
+        splice:                 include in the last result the record with
+                                call number fields of all systems
+
+    Returns:
+        `BatchResult` of each system in order of systems
+    """
+    start = time.perf_counter()
+    size = len(data)
+    bib = None
+    control_no = None
+    try:
+        bib = Record(data=data)
+        control_no = get_control_no(bib)
+        callnos = create_callnos(bib, systems, requested_call_type)
+    except Exception as exc:
+        if bib is None:
+            error = f"Invalid MARC record. Error: '{exc}'."
+        else:
+            error = f"{type(exc).__name__}: {exc}"
+        results = [
+            BatchResult(
+                seq, control_no, requested_call_type, None, error=error, size=size
+            )
+            for _ in systems
+        ]
+    else:
+        results = [
+            _callno_result(seq, control_no, callnos[s], requested_call_type, size)
+            for s in systems
+        ]
+
+    marc = None
+    if splice:
+        marc = data
+        fields = [r.field for r in results if r.field is not None]
+        try:
+            for field in fields:
+                marc = splice_field(marc, *field)
+        except ValueError:
+            for system in systems:
+                if callnos[system].callno_field is not None:
+                    bib.remove_fields(callnos[system].tag)
+                    bib.add_ordered_field(callnos[system].callno_field)
+            marc = bib.as_marc()
+    results = [r._replace(system=s, field=None) for s, r in zip(systems, results)]
+    results[0] = results[0]._replace(elapsed=time.perf_counter() - start)
+    # the record is written once, with the last system's result
+    results[-1] = results[-1]._replace(marc=marc)
+    return tuple(results)
+
+
+class BatchStats:
+    """
+    Collects counts of created and failed call numbers per pattern
+    """
+
+    def __init__(self):
+        self.processed = 0
+        self.created = 0
+        self.failed = 0
+        self.duplicates = 0
+        self.collisions = 0
+        self.patterns: Dict[str, Dict[str, int]] = {}
+
+    def update(self, result: BatchResult) -> None:
+        """
+        Adds outcome of a single record to the totals
+        """
+        self.processed += 1
+        if result.duplicate:
+            self.duplicates += 1
+        if result.collision:
+            self.collisions += 1
+        counts = self.patterns.setdefault(result.pattern, {"created": 0, "failed": 0})
+        if result.callno is None:
+            self.failed += 1
+            counts["failed"] += 1
+        else:
+            self.created += 1
+            counts["created"] += 1
+
+    def merge(self, other: "BatchStats") -> None:
+        """
+        Adds totals of another batch, e.g. of a shard of a file
+        """
+        self.processed += other.processed
+        self.created += other.created
+        self.failed += other.failed
+        self.duplicates += other.duplicates
+        self.collisions += other.collisions
+        for pattern, counts in other.patterns.items():
+            totals = self.patterns.setdefault(pattern, {"created": 0, "failed": 0})
+            totals["created"] += counts["created"]
+            totals["failed"] += counts["failed"]
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "BatchStats":
+        """
+        Restores totals from their serializable representation
+        """
+        stats = cls()
+        stats.processed = data["processed"]
+        stats.created = data["created"]
+        stats.failed = data["failed"]
+        stats.duplicates = data.get("duplicates", 0)
+        stats.collisions = data.get("collisions", 0)
+        stats.patterns = {p: dict(c) for p, c in data["patterns"].items()}
+        return stats
+
+    def as_dict(self) -> Dict:
+        """
+        Returns serializable representation of the totals
+        """
+        return {
+            "processed": self.processed,
+            "created": self.created,
+            "failed": self.failed,
+            "duplicates": self.duplicates,
+            "collisions": self.collisions,
+            "patterns": self.patterns,
+        }
+
+    def summary(self) -> str:
+        """
+        Returns human readable summary of the totals
+        """
+        lines = [
+            f"processed: {self.processed:,}",
+            f"created:   {self.created:,}",
+            f"failed:    {self.failed:,}",
+        ]
+        if self.duplicates:
+            lines.append(f"duplicates (created once): {self.duplicates:,}")
+        if self.collisions:
+            lines.append(f"shelflist collisions: {self.collisions:,}")
+        for pattern in sorted(self.patterns):
+            counts = self.patterns[pattern]
+            lines.append(
+                f"  {pattern:<10} created: {counts['created']:,}, "
+                f"failed: {counts['failed']:,}"
+            )
+        return "\n".join(lines)
+
+
+class ProgressReporter:
+    """
+    Reports live throughput and estimated time of completion of a batch
+    """
+
+    def __init__(
+        self, total_bytes: int, stream: TextIO = sys.stderr, interval: float = 1.0
+    ):
+        """
+        Args:
+            total_bytes:            size of all input files
+            stream:                 where to write progress
+            interval:               minimal number of seconds between reports
+        """
+        self.total_bytes = total_bytes
+        self.stream = stream
+        self.interval = interval
+        self.records = 0
+        self.bytes_read = 0
+        self.start = time.monotonic()
+        self._last_report = 0.0
+        self._last_seq = None
+
+    def update(self, size: int, seq: Optional[int] = None) -> None:
+        """
+        Registers a processed record of given size in bytes; size of
+        a record repeated for several order lines (same 'seq') is counted once
+        """
+        self.records += 1
+        if seq is None or seq != self._last_seq:
+            self.bytes_read += size
+        self._last_seq = seq
+        now = time.monotonic()
+        if now - self._last_report >= self.interval:
+            self._last_report = now
+            self.stream.write(f"\r{self.status(now)}")
+            self.stream.flush()
+
+    def status(self, now: float = None) -> str:
+        """
+        Returns progress line: records processed, records per second and ETA
+        """
+        if now is None:
+            now = time.monotonic()
+        elapsed = max(now - self.start, 1e-9)
+        rate = self.records / elapsed
+        if self.bytes_read and self.total_bytes > self.bytes_read:
+            remaining = elapsed * (self.total_bytes - self.bytes_read) / self.bytes_read
+            eta = _format_seconds(remaining)
+        else:
+            eta = "0:00:00"
+        return f"{self.records:,} records | {rate:,.1f} rec/s | ETA {eta}"
+
+    def finish(self) -> None:
+        """
+        Writes final progress line
+        """
+        self.stream.write(f"\r{self.status()}\n")
+        self.stream.flush()
+
+
+def _format_seconds(seconds: float) -> str:
+    seconds = int(seconds)
+    return f"{seconds // 3600}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+class BatchWriter:
+    """
+    Writes batch results to a file in one of the supported formats:
+    'marc' (records with spliced call number), 'csv', or 'jsonl'
+    """
+
+    csv_columns = [
+        "seq",
+        "control_no",
+        "pattern",
+        "callno",
+        "sort_key",
+        "error",
+        "collision",
+    ]
+
+    def __init__(
+        self,
+        path: str,
+        output_format: str = "csv",
+        resume_position: Optional[int] = None,
+        columns: Optional[List[str]] = None,
+    ):
+        """
+        Args:
+            path:                   path to the output file
+            output_format:          'marc', 'csv', or 'jsonl'
+            resume_position:        size of the output saved in a checkpoint;
+                                    anything written after it is discarded
+                                    and new results are appended
+            columns:                CSV columns; `csv_columns` by default
+        """
+        if columns is not None:
+            self.csv_columns = columns
+        if output_format not in OUTPUT_FORMATS:
+            raise CallNoConstructorError(
+                "Invalid 'output_format' argument used. "
+                f"Must be one of: {', '.join(OUTPUT_FORMATS)}."
+            )
+        self.output_format = output_format
+        mode = "w"
+        if resume_position is not None:
+            with open(path, "r+b") as fh:
+                fh.truncate(resume_position)
+            mode = "a"
+        if output_format == "marc":
+            self.fh = open(path, f"{mode}b")
+        else:
+            self.fh = open(path, mode, encoding="utf-8", newline="")
+        if output_format == "csv":
+            self._csv = csv.writer(self.fh)
+            if resume_position is None:
+                self._csv.writerow(self.csv_columns)
+
+    def write(self, result: BatchResult) -> None:
+        if self.output_format == "marc":
+            # results of several systems carry the record once
+            if result.marc is not None:
+                self.fh.write(result.marc)
+        elif self.output_format == "csv":
+            row = result.as_dict()
+            self._csv.writerow([row.get(c) for c in self.csv_columns])
+        else:
+            self.fh.write(json.dumps(result.as_dict(), ensure_ascii=False) + "\n")
+
+    def flush(self) -> int:
+        """
+        Writes buffered results to disk
+
+        Returns:
+            size of the output in bytes
+        """
+        self.fh.flush()
+        os.fsync(self.fh.fileno())
+        return self.fh.tell()
+
+    def close(self) -> None:
+        self.fh.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def iter_batch(
+    paths: Iterable[str],
+    seq_start: int = 0,
+    byte_range: Optional[Tuple[int, int]] = None,
+    start: Optional[Tuple[int, int]] = None,
+    file_starts: Optional[Dict[int, Tuple[int, int]]] = None,
+) -> Iterator[tuple]:
+    """
+    Yields numbered raw records from given MARC files
+
+    Args:
+        paths:                  list of paths to MARC21 files
+        seq_start:              number of the first record
+        byte_range:             (start, end) offsets of the part of each file
+                                to read; must fall on record boundaries
+        start:                  (file index, offset) to start reading at,
+                                e.g. position saved in a checkpoint
+        file_starts:            dictionary where sequence number of the first
+                                record read from each file is registered
+                                with (file index, offset)
+
+    Yields:
+        (seq, raw record)
+    """
+    seq = seq_start
+    start_index, start_offset = start if start is not None else (0, None)
+    for n, path in enumerate(paths):
+        if n < start_index:
+            continue
+        with open(path, "rb") as fh:
+            offset = 0
+            limit = None
+            if byte_range is not None:
+                offset = byte_range[0]
+            if n == start_index and start_offset is not None:
+                offset = start_offset
+            if byte_range is not None:
+                limit = byte_range[1] - offset
+            fh.seek(offset)
+            first = True
+            for data in iter_marc_chunks(fh, limit=limit):
+                if first and file_starts is not None:
+                    file_starts[seq] = (n, offset)
+                first = False
+                yield seq, data
+                seq += 1
+
+
+def _process_item(item: tuple, system: str, **kwargs):
+    # items joined with order lines carry `Order` after the raw record
+    order = item[2] if len(item) > 2 else None
+    # metrics of worker processes travel with the result to the consumer
+    snapshot = metrics_snapshot()
+    if system == "both":
+        results = process_record_systems(item[0], item[1], SYSTEMS, **kwargs)
+        return (results[0]._replace(metrics=metrics_delta(snapshot)),) + results[1:]
+    result = process_record(item[0], item[1], system, order=order, **kwargs)
+    return result._replace(metrics=metrics_delta(snapshot))
+
+
+def _flatten(results: Iterable[Tuple[BatchResult, ...]]) -> Iterator[BatchResult]:
+    for group in results:
+        yield from group
+
+
+def run_batch(
+    paths: List[str],
+    output: str,
+    system: str = "bpl",
+    requested_call_type: str = "auto",
+    output_format: str = "csv",
+    workers: int = 1,
+    progress: Optional[TextIO] = None,
+    dedup: Optional[str] = None,
+    shelflist: Optional[str] = None,
+    byte_range: Optional[Tuple[int, int]] = None,
+    checkpoint: Optional[str] = None,
+    checkpoint_records: int = 10000,
+    checkpoint_interval: float = 60.0,
+    resume: bool = False,
+    queue_size: int = 1024,
+    metrics: Optional[PipelineMetrics] = None,
+    metrics_file: Optional[str] = None,
+    orders: Optional[str] = None,
+    orders_key: str = "001",
+) -> BatchStats:
+    """
+    Creates call numbers for all records in given MARC files and writes
+    results to the output file
+
+    Args:
+        paths:                  list of paths to MARC21 files
+        output:                 path to the output file
+        system:                 library system; options: 'bpl', 'nypl',
+                                'both' (a result of each system per record,
+                                created from a single parse)
+        requested_call_type:    call pattern to be created or 'auto'
+        output_format:          'marc', 'csv', or 'jsonl'
+        workers:                number of worker processes
+        progress:               stream for progress reports (None disables)
+        dedup:                  create call number only once for duplicate
+                                records; options: None, 'control' (by 001 or
+                                OCLC number), 'fingerprint' (by relevant
+                                fields)
+        shelflist:              path to `ShelflistIndex` file; created call
+                                numbers already present in it are flagged
+                                as collisions
+        byte_range:             (start, end) offsets of the part of the input
+                                file to process, see `bookops_callno.shard`
+        checkpoint:             path to checkpoint file; progress is saved
+                                to it periodically (None disables)
+        checkpoint_records:     save checkpoint after this many records
+        checkpoint_interval:    save checkpoint after this many seconds
+        resume:                 continue interrupted run from the checkpoint
+        queue_size:             capacity of queues between reading,
+                                processing, and writing stages; bounds
+                                memory use
+        metrics:                `PipelineMetrics` instance to collect queue
+                                depths and stage wait times
+        metrics_file:           path to a file package metrics are written
+                                to periodically in Prometheus text format
+        orders:                 path to CSV or TSV file with order lines;
+                                a call number is created for each order
+                                line of a bib, see `bookops_callno.orders`;
+                                supported by BPL only
+        orders_key:             MARC tag with the bib number matching
+                                order lines
+
+    Returns:
+        `BatchStats` instance
+    """
+    if system not in BATCH_SYSTEMS:
+        raise CallNoConstructorError(
+            "Invalid 'system' argument used. Must be 'bpl', 'nypl', or 'both'."
+        )
+    if system == "both" and any(
+        option is not None for option in (dedup, shelflist, checkpoint)
+    ):
+        raise CallNoConstructorError(
+            "Invalid 'system' argument used. System 'both' can not be combined "
+            "with deduplication, shelflist, or checkpoints."
+        )
+    if workers < 1:
+        raise CallNoConstructorError(
+            "Invalid 'workers' argument used. Must be a positive integer."
+        )
+    if byte_range is not None and len(paths) != 1:
+        raise CallNoConstructorError(
+            "Invalid 'byte_range' argument used. Requires a single input file."
+        )
+    if resume and checkpoint is None:
+        raise CallNoConstructorError(
+            "Invalid 'resume' argument used. Requires a checkpoint file."
+        )
+    if orders is not None and system != "bpl":
+        raise CallNoConstructorError(
+            "Invalid 'orders' argument used. Order data is supported for BPL only."
+        )
+    if orders is not None and checkpoint is not None:
+        raise CallNoConstructorError(
+            "Invalid 'orders' argument used. Can not be combined with checkpoints."
+        )
+
+    config = {
+        "inputs": [os.path.abspath(p) for p in paths],
+        "sizes": [os.path.getsize(p) for p in paths],
+        "output": os.path.abspath(output),
+        "system": system,
+        "requested_call_type": requested_call_type,
+        "output_format": output_format,
+        "dedup": dedup,
+        "byte_range": list(byte_range) if byte_range is not None else None,
+    }
+    state = None
+    if resume:
+        state = resume_state(checkpoint, config)
+        if state["complete"]:
+            return BatchStats.from_dict(state["stats"])
+
+    splice = output_format == "marc"
+    worker = partial(
+        _process_item,
+        system=system,
+        requested_call_type=requested_call_type,
+        splice=splice,
+    )
+    deduplicator = None
+    if dedup is not None:
+        deduplicator = Deduplicator(dedup, splice=splice)
+        worker = deduplicator.worker(worker)
+    if state is not None:
+        stats = BatchStats.from_dict(state["stats"])
+        position = InputPosition(*state["position"], seq=state["seq"])
+        resume_position = state["output_position"]
+    else:
+        stats = BatchStats()
+        position = InputPosition()
+        resume_position = None
+
+    reporter = None
+    if progress is not None:
+        if byte_range is not None:
+            total_bytes = byte_range[1] - byte_range[0]
+        else:
+            total_bytes = sum(config["sizes"])
+        reporter = ProgressReporter(total_bytes, stream=progress)
+
+    index = None
+    if shelflist is not None:
+        index = ShelflistIndex(shelflist)
+    order_index = None
+    columns = None
+    if orders is not None:
+        order_index = OrderIndex.from_file(orders)
+        columns = BatchWriter.csv_columns + ["order_no"]
+    if system == "both":
+        columns = BatchWriter.csv_columns + ["system"]
+    exporter = None
+    if metrics_file is not None:
+        exporter = MetricsExporter(metrics_file)
+
+    with BatchWriter(output, output_format, resume_position, columns) as writer:
+        checkpointer = None
+        if checkpoint is not None:
+            checkpointer = Checkpointer(
+                checkpoint,
+                config,
+                writer,
+                stats.as_dict,
+                position,
+                records=checkpoint_records,
+                interval=checkpoint_interval,
+            )
+        items = iter_batch(
+            paths,
+            seq_start=position.seq,
+            byte_range=byte_range,
+            start=(position.file_index, position.offset) if state else None,
+            file_starts=position.file_starts,
+        )
+        if order_index is not None:
+            items = join_orders(items, order_index, orders_key)
+        if deduplicator is not None:
+            items = deduplicator.filter(items)
+        merge = None
+        if deduplicator is not None:
+            merge = deduplicator.merge
+        elif system == "both":
+            merge = _flatten
+        pipeline = Pipeline(workers, queue_size=queue_size, metrics=metrics)
+        pipeline.run(
+            items,
+            worker,
+            partial(
+                _consume,
+                writer=writer,
+                stats=stats,
+                reporter=reporter,
+                index=index,
+                checkpointer=checkpointer,
+                exporter=exporter,
+            ),
+            merge=merge,
+        )
+
+        if checkpointer is not None:
+            checkpointer.save(complete=True)
+
+    if index is not None:
+        index.close()
+    if order_index is not None:
+        order_index.close()
+    if exporter is not None:
+        exporter.write()
+    if reporter is not None:
+        reporter.finish()
+
+    return stats
+
+
+def _consume(
+    result: BatchResult,
+    writer: BatchWriter,
+    stats: BatchStats,
+    reporter: Optional[ProgressReporter],
+    index: Optional[ShelflistIndex] = None,
+    checkpointer: Optional[Checkpointer] = None,
+    exporter: Optional[MetricsExporter] = None,
+) -> None:
+    if index is not None and result.callno is not None:
+        result = result._replace(collision=result.callno in index)
+    writer.write(result)
+    stats.update(result)
+    apply_delta(result.metrics)
+    record_result(result.pattern, result.error, result.elapsed)
+    if exporter is not None:
+        exporter.maybe_write()
+    if reporter is not None:
+        reporter.update(result.size, result.seq)
+    if checkpointer is not None:
+        checkpointer.update(result.seq, result.size)
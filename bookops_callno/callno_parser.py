@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+
+"""
+This module decomposes existing BPL call numbers (MARC 099) into elements in
+the same order `BplCallNo` constructs them:
+
+    [format] [language] [audience] class [subject] [cutter]
+
+Examples:
+    AUDIO SPA J FIC ADAMS       format, language, audience, class, cutter
+    CHI J-E ADAMS               language, class, cutter
+    B ADAMS G                   class, subject (biographee), cutter
+    BOOK & CD 323.623 W         format, class (Dewey), cutter
+"""
+
+from functools import lru_cache
+from typing import List, NamedTuple, Optional, Tuple, Union
+
+from pymarc import Field
+
+from bookops_callno.errors import CallNoConstructorError
+
+FORMAT_PREFIXES = frozenset(
+    ["AUDIO", "BOOK & CD", "CD", "DVD", "LIB", "MU", "NM", "KIT", "VIDEO"]
+)
+E_RESOURCES = {
+    "EAUDIO": "eaudio",
+    "EBOOK": "ebook",
+    "EMUSIC": "emusic",
+    "EVIDEO": "evideo",
+}
+AUDIENCE_PREFIXES = {"J": "juv"}
+CLASS_PATTERNS = {"FIC": "fic", "J-E": "pic", "B": "bio"}
+
+
+class CallNoElements(NamedTuple):
+    """
+    Elements of a call number. `pattern` is one of: 'fic', 'pic', 'bio',
+    'dew', 'des' (Dewey + subject), 'eaudio', 'ebook', 'emusic', 'evideo',
+    or 'und'
+    if the call number could not be decomposed.
+    """
+
+    callno: str
+    pattern: str
+    format: Optional[str] = None
+    language: Optional[str] = None
+    audience: Optional[str] = None
+    classification: Optional[str] = None
+    subject: Optional[str] = None
+    cutter: Optional[str] = None
+
+
+def _is_dewey(token: str) -> bool:
+    return len(token) >= 3 and token[:3].isdigit()
+
+
+def _tokenize(callno: Union[str, Field]) -> List[str]:
+    if isinstance(callno, Field):
+        return [v.strip() for v in callno.get_subfields("a") if v.strip()]
+    elif not isinstance(callno, str):
+        raise CallNoConstructorError(
+            "Invalid 'callno' argument used. Must be a string or pymarc.Field."
+        )
+
+    tokens = callno.split()
+    # multi-word format prefix
+    for n in range(len(tokens) - 2):
+        if tokens[n : n + 3] == ["BOOK", "&", "CD"]:
+            tokens[n : n + 3] = ["BOOK & CD"]
+            break
+    return tokens
+
+
+@lru_cache(maxsize=4096)
+def _parse_prefix(
+    prefix: Tuple[str, ...],
+) -> Optional[Tuple[Optional[str], Optional[str], Optional[str]]]:
+    """
+    Decomposes elements preceding the class element. Returns None if any
+    of them is not recognized. Combinations repeat heavily in a catalog,
+    so results are cached.
+    """
+    form = language = audience = None
+    stage = 0
+    for token in prefix:
+        if stage < 1 and token.upper() in FORMAT_PREFIXES:
+            form = token
+            stage = 1
+        elif stage < 2 and len(token) == 3 and token.isalpha() and token.isupper():
+            language = token
+            stage = 2
+        elif stage < 3 and token in AUDIENCE_PREFIXES:
+            audience = AUDIENCE_PREFIXES[token]
+            stage = 3
+        else:
+            return None
+    return form, language, audience
+
+
+def parse_bpl_callno(callno: Union[str, Field]) -> CallNoElements:
+    """
+    Decomposes BPL call number into its elements
+
+    Args:
+        callno:                 call number as string or pymarc.Field (099)
+
+    Returns:
+        `CallNoElements` instance
+    """
+    tokens = _tokenize(callno)
+    value = " ".join(tokens)
+
+    if len(tokens) == 1 and tokens[0].upper() in E_RESOURCES:
+        return CallNoElements(value, E_RESOURCES[tokens[0].upper()])
+
+    for n, token in enumerate(tokens):
+        if token in CLASS_PATTERNS:
+            pattern = CLASS_PATTERNS[token]
+            break
+        elif _is_dewey(token):
+            pattern = "dew"
+            break
+    else:
+        return CallNoElements(value, "und")
+
+    prefix = _parse_prefix(tuple(tokens[:n]))
+    if prefix is None:
+        return CallNoElements(value, "und")
+    form, language, audience = prefix
+
+    rest = tokens[n + 1 :]
+    subject = None
+    cutter = None
+    if pattern in ("fic", "pic"):
+        cutter = " ".join(rest) or None
+    elif rest:
+        if pattern == "bio" and len(rest) == 1:
+            subject = rest[0]
+        elif len(rest) == 1:
+            cutter = rest[0]
+        else:
+            subject = " ".join(rest[:-1])
+            cutter = rest[-1]
+            if pattern == "dew":
+                pattern = "des"
+
+    if pattern == "pic":
+        audience = "early juv"
+
+    return CallNoElements(
+        value, pattern, form, language, audience, token, subject, cutter
+    )
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+
+"""
+This module provides checkpoints of long running batch jobs, so an
+interrupted run can be resumed instead of restarted.
+
+A checkpoint is a small JSON file replaced atomically every N records or
+T seconds. It records the position in the input (file and byte offset after
+the last written record), the number of the next record, totals, and the
+size of the output at that point.
+"""
+
+import json
+import os
+import time
+from typing import Callable, Dict, Tuple
+
+from bookops_callno.errors import CallNoConstructorError
+
+CHECKPOINT_VERSION = 1
+
+
+class InputPosition:
+    """
+    Tracks position in the input after the last consumed record. Records are
+    identified by their sequence numbers; the reader registers in
+    `file_starts` the first record of each file it opens.
+    """
+
+    def __init__(self, file_index: int = 0, offset: int = 0, seq: int = 0):
+        self.file_index = file_index
+        self.offset = offset
+        self.seq = seq
+        self.file_starts: Dict[int, Tuple[int, int]] = {}
+
+    def advance(self, seq: int, size: int) -> None:
+        """
+        Moves position past a consumed record
+
+        Args:
+            seq:                    sequence number of the record
+            size:                   size of the record in bytes
+        """
+        start = self.file_starts.pop(seq, None)
+        if start is not None:
+            self.file_index, self.offset = start
+        self.offset += size
+        self.seq = seq + 1
+
+
+def load_checkpoint(path: str) -> Dict:
+    """
+    Reads checkpoint file
+
+    Args:
+        path:                   path to the checkpoint file
+
+    Returns:
+        checkpoint data
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            data = json.load(fh)
+    except FileNotFoundError:
+        raise CallNoConstructorError(f"Checkpoint file not found: {path}")
+    except ValueError:
+        raise CallNoConstructorError(f"Invalid checkpoint file: {path}")
+    if not isinstance(data, dict) or data.get("version") != CHECKPOINT_VERSION:
+        raise CallNoConstructorError(f"Invalid checkpoint file: {path}")
+    return data
+
+
+class Checkpointer:
+    """
+    Periodically saves progress of a batch run
+    """
+
+    def __init__(
+        self,
+        path: str,
+        config: Dict,
+        writer,
+        snapshot: Callable[[], Dict],
+        position: InputPosition,
+        records: int = 10000,
+        interval: float = 60.0,
+    ):
+        """
+        Args:
+            path:                   path to the checkpoint file
+            config:                 parameters of the run; a run can be
+                                    resumed only with the same parameters
+            writer:                 `BatchWriter` of the run
+            snapshot:               function returning current totals
+            position:               `InputPosition` of the run
+            records:                save after this many records
+            interval:               save after this many seconds
+        """
+        if records < 1 or interval <= 0:
+            raise CallNoConstructorError(
+                "Invalid checkpoint frequency. Must be a positive number."
+            )
+        self.path = path
+        self.config = config
+        self.writer = writer
+        self.snapshot = snapshot
+        self.position = position
+        self.records = records
+        self.interval = interval
+        self.saved = 0
+        self._pending = 0
+        self._last_save = time.monotonic()
+
+    def update(self, seq: int, size: int) -> None:
+        """
+        Registers a written record and saves checkpoint when due
+        """
+        self.position.advance(seq, size)
+        self._pending += 1
+        if (
+            self._pending >= self.records
+            or time.monotonic() - self._last_save >= self.interval
+        ):
+            self.save()
+
+    def save(self, complete: bool = False) -> None:
+        """
+        Writes checkpoint; output is flushed to disk first, so the checkpoint
+        never refers to data that was not written
+        """
+        data = {
+            "version": CHECKPOINT_VERSION,
+            "config": self.config,
+            "complete": complete,
+            "position": [self.position.file_index, self.position.offset],
+            "seq": self.position.seq,
+            "output_position": self.writer.flush(),
+            "stats": self.snapshot(),
+        }
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(data, fh)
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp, self.path)
+        self.saved += 1
+        self._pending = 0
+        self._last_save = time.monotonic()
+
+
+def resume_state(path: str, config: Dict) -> Dict:
+    """
+    Loads checkpoint and verifies it belongs to a run with the same
+    parameters
+
+    Args:
+        path:                   path to the checkpoint file
+        config:                 parameters of the resumed run
+
+    Returns:
+        checkpoint data
+    """
+    data = load_checkpoint(path)
+    if data.get("config") != config:
+        raise CallNoConstructorError(
+            "Checkpoint does not match the inputs or options of this run."
+        )
+    return data
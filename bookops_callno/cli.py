@@ -0,0 +1,435 @@
+# -*- coding: utf-8 -*-
+
+"""
+This module provides the `bookops-callno` command line interface
+"""
+
+import argparse
+import json
+import sys
+from typing import List, Optional
+
+from bookops_callno.audit import AUDIT_FORMATS, run_audit
+from bookops_callno.batch import BATCH_SYSTEMS, OUTPUT_FORMATS, SYSTEMS, run_batch
+from bookops_callno.client import load_test
+from bookops_callno.dedup import DEDUP_MODES
+from bookops_callno.errors import CallNoConstructorError
+from bookops_callno.pipeline import PipelineMetrics
+from bookops_callno.server import DEFAULT_HOST, DEFAULT_PORT, serve
+from bookops_callno.shard import (
+    merge_outputs,
+    merge_stats,
+    parse_shard_spec,
+    shard_range,
+    shard_stats,
+)
+from bookops_callno.shelflist import ShelflistIndex
+from bookops_callno.sorting import external_sort
+
+CALL_TYPES = ("auto", "bio", "des", "dew", "eaudio", "ebook", "evideo", "fic", "pic")
+
+
+def _add_batch_parser(subparsers) -> None:
+    parser = subparsers.add_parser(
+        "batch", help="create call numbers for records in MARC files"
+    )
+    parser.add_argument("inputs", nargs="+", help="MARC21 files to process")
+    parser.add_argument(
+        "-s",
+        "--system",
+        choices=BATCH_SYSTEMS,
+        required=True,
+        help="library system; 'both' creates BPL and NYPL call numbers from "
+        "a single parse of each record",
+    )
+    parser.add_argument(
+        "-t",
+        "--type",
+        dest="call_type",
+        choices=CALL_TYPES,
+        default="auto",
+        help="call number pattern to create (default: auto)",
+    )
+    parser.add_argument(
+        "-f",
+        "--format",
+        dest="output_format",
+        choices=OUTPUT_FORMATS,
+        default="csv",
+        help="output: spliced MARC records, CSV, or JSON lines (default: csv)",
+    )
+    parser.add_argument("-o", "--output", required=True, help="output file")
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=1,
+        help="number of worker processes (default: 1)",
+    )
+    parser.add_argument(
+        "--dedup",
+        choices=DEDUP_MODES,
+        help="create call number once for duplicate records identified by "
+        "control number or fingerprint of relevant fields",
+    )
+    parser.add_argument(
+        "--shelflist", help="shelflist index to check created call numbers against"
+    )
+    parser.add_argument(
+        "--orders",
+        help="CSV or TSV file with order lines (columns: bib_no, order_no, audn, "
+        "lang, note, shelf); a call number is created for each order line (BPL only)",
+    )
+    parser.add_argument(
+        "--orders-key",
+        default="001",
+        help="MARC tag with the bib number matching order lines (default: 001)",
+    )
+    parser.add_argument(
+        "--shard",
+        help="process only part K of N of a single input file, e.g. 2/8",
+    )
+    parser.add_argument(
+        "--queue-size",
+        type=int,
+        default=1024,
+        help="capacity of queues between reading, processing, and writing "
+        "(default: 1024)",
+    )
+    parser.add_argument("--stats", help="write totals as JSON to this file")
+    parser.add_argument(
+        "--metrics",
+        help="write metrics in Prometheus text format to this file "
+        "(updated every 15 seconds)",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        help="save progress to this file periodically "
+        "(default with --resume: OUTPUT.checkpoint)",
+    )
+    parser.add_argument(
+        "--checkpoint-every",
+        type=int,
+        default=10000,
+        help="records between checkpoints (default: 10000)",
+    )
+    parser.add_argument(
+        "--checkpoint-interval",
+        type=float,
+        default=60.0,
+        help="seconds between checkpoints (default: 60)",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="continue an interrupted run from its checkpoint",
+    )
+    parser.add_argument(
+        "-q", "--quiet", action="store_true", help="do not report progress"
+    )
+    parser.set_defaults(func=_run_batch)
+
+
+def _run_batch(args: argparse.Namespace) -> int:
+    byte_range = None
+    if args.shard is not None:
+        if len(args.inputs) != 1:
+            raise CallNoConstructorError("Option --shard requires a single input file.")
+        shard, shards = parse_shard_spec(args.shard)
+        byte_range = shard_range(args.inputs[0], shard, shards)
+    checkpoint = args.checkpoint
+    if args.resume and checkpoint is None:
+        checkpoint = f"{args.output}.checkpoint"
+
+    metrics = PipelineMetrics()
+    stats = run_batch(
+        args.inputs,
+        args.output,
+        system=args.system,
+        requested_call_type=args.call_type,
+        output_format=args.output_format,
+        workers=args.workers,
+        progress=None if args.quiet else sys.stderr,
+        dedup=args.dedup,
+        shelflist=args.shelflist,
+        byte_range=byte_range,
+        checkpoint=checkpoint,
+        checkpoint_records=args.checkpoint_every,
+        checkpoint_interval=args.checkpoint_interval,
+        resume=args.resume,
+        queue_size=args.queue_size,
+        metrics=metrics,
+        metrics_file=args.metrics,
+        orders=args.orders,
+        orders_key=args.orders_key,
+    )
+    if args.stats is not None:
+        if byte_range is not None:
+            data = shard_stats(stats, shard, shards, byte_range)
+        else:
+            data = stats.as_dict()
+        data["pipeline"] = metrics.as_dict()
+        with open(args.stats, "w", encoding="utf-8") as fh:
+            json.dump(data, fh, indent=2)
+    if not args.quiet:
+        sys.stderr.write(stats.summary() + "\n")
+        sys.stderr.write(metrics.summary() + "\n")
+    return 0
+
+
+def _add_merge_parser(subparsers) -> None:
+    parser = subparsers.add_parser(
+        "merge", help="merge outputs of batch runs of shards of a file"
+    )
+    parser.add_argument("parts", nargs="+", help="shard outputs in shard order")
+    parser.add_argument(
+        "-f",
+        "--format",
+        dest="output_format",
+        choices=OUTPUT_FORMATS,
+        default="csv",
+        help="format of the outputs (default: csv)",
+    )
+    parser.add_argument("-o", "--output", required=True, help="merged file")
+    parser.add_argument(
+        "--stats", nargs="+", help="JSON totals of shards written with --stats"
+    )
+    parser.add_argument("--stats-output", help="write merged totals as JSON")
+    parser.add_argument(
+        "-q", "--quiet", action="store_true", help="do not print merged totals"
+    )
+    parser.set_defaults(func=_run_merge)
+
+
+def _run_merge(args: argparse.Namespace) -> int:
+    stats = merge_stats(args.stats) if args.stats else None
+    merge_outputs(args.parts, args.output, args.output_format)
+    if stats is not None:
+        if args.stats_output is not None:
+            with open(args.stats_output, "w", encoding="utf-8") as fh:
+                json.dump(stats.as_dict(), fh, indent=2)
+        if not args.quiet:
+            sys.stderr.write(stats.summary() + "\n")
+    return 0
+
+
+def _add_audit_parser(subparsers) -> None:
+    parser = subparsers.add_parser(
+        "audit", help="validate existing BPL call numbers (099) in MARC files"
+    )
+    parser.add_argument("inputs", nargs="+", help="MARC21 files to validate")
+    parser.add_argument(
+        "-t",
+        "--type",
+        dest="call_type",
+        choices=CALL_TYPES,
+        help="pattern of expected call numbers (default: pattern of existing one)",
+    )
+    parser.add_argument(
+        "-f",
+        "--format",
+        dest="output_format",
+        choices=AUDIT_FORMATS,
+        default="csv",
+        help="report format (default: csv)",
+    )
+    parser.add_argument("-o", "--output", required=True, help="report file")
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=1,
+        help="number of worker processes (default: 1)",
+    )
+    parser.add_argument(
+        "--all",
+        dest="report_matches",
+        action="store_true",
+        help="report also records with matching call numbers",
+    )
+    parser.add_argument(
+        "-q", "--quiet", action="store_true", help="do not report progress"
+    )
+    parser.set_defaults(func=_run_audit)
+
+
+def _run_audit(args: argparse.Namespace) -> int:
+    stats = run_audit(
+        args.inputs,
+        args.output,
+        output_format=args.output_format,
+        workers=args.workers,
+        progress=None if args.quiet else sys.stderr,
+        requested_call_type=args.call_type,
+        report_matches=args.report_matches,
+    )
+    if not args.quiet:
+        sys.stderr.write(stats.summary() + "\n")
+    return 0
+
+
+def _add_shelflist_parser(subparsers) -> None:
+    parser = subparsers.add_parser(
+        "shelflist", help="build shelflist index from a text dump of call numbers"
+    )
+    parser.add_argument("dump", help="text file with one call number per line")
+    parser.add_argument("-o", "--output", required=True, help="index file")
+    parser.add_argument(
+        "--error-rate",
+        type=float,
+        default=0.01,
+        help="false positive rate of the pre-filter (default: 0.01)",
+    )
+    parser.set_defaults(func=_run_shelflist)
+
+
+def _run_shelflist(args: argparse.Namespace) -> int:
+    with ShelflistIndex.from_text(args.dump, args.output, args.error_rate) as index:
+        sys.stderr.write(f"Indexed {len(index):,} unique call numbers.\n")
+    return 0
+
+
+def _add_sort_parser(subparsers) -> None:
+    parser = subparsers.add_parser(
+        "sort", help="sort lists of call numbers in shelf order"
+    )
+    parser.add_argument("input", help="text file with call numbers")
+    parser.add_argument("-o", "--output", required=True, help="sorted file")
+    parser.add_argument(
+        "--field",
+        type=int,
+        help="0-based position of the call number in delimited lines "
+        "(default: whole line)",
+    )
+    parser.add_argument(
+        "--delimiter", default="\t", help="field delimiter (default: tab)"
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=100000,
+        help="lines sorted in memory at once (default: 100000)",
+    )
+    parser.set_defaults(func=_run_sort)
+
+
+def _run_sort(args: argparse.Namespace) -> int:
+    with open(args.input, "r", encoding="utf-8") as src, open(
+        args.output, "w", encoding="utf-8"
+    ) as dst:
+        external_sort(
+            src,
+            dst,
+            field=args.field,
+            delimiter=args.delimiter,
+            chunk_size=args.chunk_size,
+        )
+    return 0
+
+
+def _add_serve_parser(subparsers) -> None:
+    parser = subparsers.add_parser(
+        "serve", help="run local HTTP service of call numbers"
+    )
+    parser.add_argument(
+        "--host", default=DEFAULT_HOST, help=f"interface (default: {DEFAULT_HOST})"
+    )
+    parser.add_argument(
+        "--port", type=int, default=DEFAULT_PORT, help=f"port (default: {DEFAULT_PORT})"
+    )
+    parser.add_argument(
+        "-s", "--system", choices=SYSTEMS, default="bpl", help="default system"
+    )
+    parser.add_argument(
+        "-t",
+        "--type",
+        dest="call_type",
+        choices=CALL_TYPES,
+        default="auto",
+        help="default call number pattern (default: auto)",
+    )
+    parser.add_argument(
+        "-q", "--quiet", action="store_true", help="do not log requests"
+    )
+    parser.set_defaults(func=_run_serve)
+
+
+def _run_serve(args: argparse.Namespace) -> int:
+    sys.stderr.write(f"Serving call numbers on http://{args.host}:{args.port}\n")
+    serve(args.host, args.port, args.system, args.call_type, args.quiet)
+    return 0
+
+
+def _add_loadtest_parser(subparsers) -> None:
+    parser = subparsers.add_parser(
+        "loadtest", help="measure throughput of a running local service"
+    )
+    parser.add_argument("sample", help="MARC21 file with sample records")
+    parser.add_argument("--host", default=DEFAULT_HOST, help="service host")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="service port")
+    parser.add_argument(
+        "-n", "--requests", type=int, default=1000, help="number of requests"
+    )
+    parser.add_argument(
+        "-c", "--concurrency", type=int, default=4, help="concurrent connections"
+    )
+    parser.add_argument(
+        "-b", "--batch-size", type=int, default=1, help="records per request"
+    )
+    parser.add_argument("-s", "--system", choices=SYSTEMS, help="library system")
+    parser.add_argument(
+        "-t", "--type", dest="call_type", choices=CALL_TYPES, help="call pattern"
+    )
+    parser.set_defaults(func=_run_loadtest)
+
+
+def _run_loadtest(args: argparse.Namespace) -> int:
+    stats = load_test(
+        args.sample,
+        host=args.host,
+        port=args.port,
+        requests=args.requests,
+        concurrency=args.concurrency,
+        batch_size=args.batch_size,
+        system=args.system,
+        requested_call_type=args.call_type,
+    )
+    sys.stdout.write(json.dumps(stats, indent=2) + "\n")
+    return 0 if not stats["errors"] else 1
+
+
+def get_parser() -> argparse.ArgumentParser:
+    """
+    Returns parser of the command line arguments
+    """
+    parser = argparse.ArgumentParser(
+        prog="bookops-callno",
+        description="Creates BPL & NYPL call numbers from MARC records.",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    _add_batch_parser(subparsers)
+    _add_audit_parser(subparsers)
+    _add_merge_parser(subparsers)
+    _add_shelflist_parser(subparsers)
+    _add_sort_parser(subparsers)
+    _add_serve_parser(subparsers)
+    _add_loadtest_parser(subparsers)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Entry point of the `bookops-callno` command
+
+    Args:
+        argv:                   command line arguments
+
+    Returns:
+        exit code
+    """
+    args = get_parser().parse_args(argv)
+    try:
+        return args.func(args)
+    except (CallNoConstructorError, OSError) as exc:
+        sys.stderr.write(f"bookops-callno: error: {exc}\n")
+        return 1
@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+
+"""
+This module provides a client of the local call number service and a simple
+load test of the service
+"""
+
+import http.client
+import json
+import threading
+import time
+from typing import Dict, List, Optional, Union
+from urllib.parse import urlencode
+
+from bookops_callno.batch import iter_marc_chunks
+from bookops_callno.errors import CallNoConstructorError
+from bookops_callno.server import DEFAULT_HOST, DEFAULT_PORT
+
+
+class CallNoClient:
+    """
+    Client of the local call number service. A single keep-alive connection
+    is reused for all requests.
+    """
+
+    def __init__(
+        self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, timeout: float = 30
+    ):
+        self.conn = http.client.HTTPConnection(host, port, timeout=timeout)
+
+    def callno(
+        self,
+        record: Union[bytes, Dict],
+        system: str = None,
+        requested_call_type: str = None,
+    ) -> Dict:
+        """
+        Requests call number for a single record
+
+        Args:
+            record:                 binary MARC21 record or MARC-in-JSON dict
+            system:                 library system; server default if None
+            requested_call_type:    call pattern; server default if None
+
+        Returns:
+            result as dictionary
+        """
+        return self._post("/callno", record, system, requested_call_type)
+
+    def batch(
+        self,
+        records: Union[bytes, List[Dict]],
+        system: str = None,
+        requested_call_type: str = None,
+    ) -> List[Dict]:
+        """
+        Requests call numbers for multiple records
+
+        Args:
+            records:                concatenated binary MARC21 records or
+                                    list of MARC-in-JSON dicts
+            system:                 library system; server default if None
+            requested_call_type:    call pattern; server default if None
+
+        Returns:
+            list of results as dictionaries
+        """
+        return self._post("/batch", records, system, requested_call_type)["results"]
+
+    def health(self) -> Dict:
+        """
+        Returns status of the service
+        """
+        return self._request("GET", "/health")
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def _post(
+        self,
+        path: str,
+        payload: Union[bytes, Dict, List],
+        system: Optional[str],
+        requested_call_type: Optional[str],
+    ) -> Dict:
+        params = {}
+        if system is not None:
+            params["system"] = system
+        if requested_call_type is not None:
+            params["type"] = requested_call_type
+        if params:
+            path = f"{path}?{urlencode(params)}"
+
+        if isinstance(payload, bytes):
+            body = payload
+            content_type = "application/marc"
+        else:
+            body = json.dumps(payload).encode("utf-8")
+            content_type = "application/json"
+        return self._request("POST", path, body, content_type)
+
+    def _request(
+        self, method: str, path: str, body: bytes = None, content_type: str = None
+    ) -> Dict:
+        headers = {}
+        if content_type is not None:
+            headers["Content-Type"] = content_type
+        self.conn.request(method, path, body=body, headers=headers)
+        response = self.conn.getresponse()
+        payload = json.loads(response.read())
+        if response.status != 200:
+            raise CallNoConstructorError(
+                f"Service responded with status {response.status}: "
+                f"{payload.get('error')}"
+            )
+        return payload
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def load_test(
+    path: str,
+    host: str = DEFAULT_HOST,
+    port: int = DEFAULT_PORT,
+    requests: int = 1000,
+    concurrency: int = 4,
+    batch_size: int = 1,
+    system: str = None,
+    requested_call_type: str = None,
+) -> Dict:
+    """
+    Sends records from a MARC file to the service from multiple concurrent
+    connections and measures throughput and latency
+
+    Args:
+        path:                   MARC21 file with sample records
+        host:                   service host
+        port:                   service port
+        requests:               total number of requests to send
+        concurrency:            number of concurrent connections
+        batch_size:             number of records per request; values above 1
+                                use the batch endpoint
+        system:                 library system; server default if None
+        requested_call_type:    call pattern; server default if None
+
+    Returns:
+        statistics as dictionary
+    """
+    with open(path, "rb") as fh:
+        samples = list(iter_marc_chunks(fh))
+    if not samples:
+        raise CallNoConstructorError("No records found in the sample file.")
+
+    payloads = []
+    for n in range(0, max(len(samples), batch_size), batch_size):
+        chunk = [samples[(n + i) % len(samples)] for i in range(batch_size)]
+        payloads.append(b"".join(chunk))
+
+    latencies: List[float] = []
+    errors = [0]
+    lock = threading.Lock()
+    counter = iter(range(requests))
+
+    def _worker():
+        client = CallNoClient(host, port)
+        local_latencies = []
+        local_errors = 0
+        try:
+            while True:
+                with lock:
+                    n = next(counter, None)
+                if n is None:
+                    break
+                payload = payloads[n % len(payloads)]
+                start = time.perf_counter()
+                try:
+                    if batch_size == 1:
+                        client.callno(payload, system, requested_call_type)
+                    else:
+                        client.batch(payload, system, requested_call_type)
+                except (CallNoConstructorError, OSError, http.client.HTTPException):
+                    local_errors += 1
+                    client.close()
+                    client = CallNoClient(host, port)
+                local_latencies.append(time.perf_counter() - start)
+        finally:
+            client.close()
+        with lock:
+            latencies.extend(local_latencies)
+            errors[0] += local_errors
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=_worker) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "records": len(latencies) * batch_size,
+        "errors": errors[0],
+        "elapsed": elapsed,
+        "requests_per_sec": len(latencies) / elapsed if elapsed else 0.0,
+        "records_per_sec": len(latencies) * batch_size / elapsed if elapsed else 0.0,
+        "latency_p50": _percentile(latencies, 0.50),
+        "latency_p95": _percentile(latencies, 0.95),
+        "latency_p99": _percentile(latencies, 0.99),
+    }
+
+
+def _percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    return values[min(int(len(values) * q), len(values) - 1)]
@@ -4,23 +4,32 @@ from typing import List, Optional
 
 from pymarc import Record, Field
 
-from bookops_callno.base import CallNo
+from bookops_callno.base import CallNo, Features
+from bookops_callno.dewey import truncate_dewey
 from bookops_callno.normalizer import (
     corporate_name_first_word,
     corporate_name_initial,
     personal_name_surname,
     title_initial,
 )
-from bookops_callno.rules_bpl import callno_format_prefix
+from bookops_callno.rules_bpl import callno_format_prefix, order_rule
 from bookops_callno.rules_shared import (
     biographee,
     callno_cutter_fic,
     callno_cutter_initial,
     callno_cutter_pic,
+    dewey_subject,
 )
 
+# audience segment by audience; young adult materials are shelved with adult
+AUDIENCE_PREFIXES = {"early juv": "J", "juv": "J"}
+# format prefixes used in fiction and picture book call numbers
+FICTION_FORMATS = ("AUDIO", "BOOK & CD")
+
 
 class BplCallNo(CallNo):
+    patterns = ("pic", "fic", "bio", "des", "dew", "eaudio", "ebook", "evideo")
+
     def __init__(
         self,
         bib: Record = None,
@@ -29,6 +38,7 @@ class BplCallNo(CallNo):
         order_note: str = None,
         order_shelf: str = None,
         requested_call_type: str = "auto",
+        features: Features = None,
     ):
         """
         Args:
@@ -41,12 +51,18 @@ class BplCallNo(CallNo):
             requested_call_type:    call pattern to be created;
                                     options:
                                         - auto
+                                        - bio
+                                        - des
+                                        - dew
                                         - eaudio
                                         - ebook
                                         - evideo
                                         - fic
+                                        - pic
+            features:               elements extracted from the bib by
+                                    another constructor
         """
-        super().__init__(bib, requested_call_type)
+        super().__init__(bib, requested_call_type, features)
 
         self.tag = "099"
         self.inds = [" ", " "]
@@ -55,8 +71,23 @@ class BplCallNo(CallNo):
         self.order_note = order_note
         self.order_shelf = order_shelf
 
-        self.mat_format = callno_format_prefix()
+        # order data overrides elements derived from the record before the
+        # pattern is chosen, so e.g. an early juvenile shelf code makes
+        # a picture book call number; `features` keep the record's elements
+        self.order_rule = order_rule(order_shelf, order_audn)
+        if (
+            self.order_rule.audience is not None
+            and self.order_rule.audience != self.audience_info
+        ):
+            self.audience_info = self.order_rule.audience
+            if bib is not None:
+                self.content_candidates = self._get_content_candidates(bib)
+                self.content_info = self._get_content_info(bib)
+        self.mat_format = self.order_rule.mat_format or callno_format_prefix(
+            self.record_type_info, self.form_of_item_info, self.subject_info
+        )
         self._create()
+        self._record_metrics("bpl")
 
     def _cleanup_callno_elements(self, elements: List) -> List:
         """
@@ -64,22 +95,13 @@ class BplCallNo(CallNo):
         """
         return [e for e in elements if e]
 
-    def _create(self):
+    def _fiction_format(self) -> Optional[str]:
         """
-        Creates call number
+        Returns format prefix of fiction and picture book call numbers
         """
-        if self.requested_call_type == "eaudio":
-            self.callno_field = self._create_eaudio_callno()
-        elif self.requested_call_type == "ebook":
-            self.callno_field = self._create_ebook_callno()
-        elif self.requested_call_type == "evideo":
-            self.callno_field = self._create_evideo_callno()
-        elif self.requested_call_type == "fic":
-            self.callno_field = self._create_fic_callno()
-        elif self.requested_call_type == "pic":
-            self.callno_field = self._create_pic_callno()
-        elif self.requested_call_type == "bio":
-            self.callno_field = self._create_bio_callno()
+        if self.mat_format and self.mat_format.upper() in FICTION_FORMATS:
+            return self.mat_format.upper()
+        return None
 
     def _create_eaudio_callno(self) -> Optional[Field]:
         """
@@ -113,18 +135,10 @@ class BplCallNo(CallNo):
             SPA J FIC ADAMS
             AUDIO FIC ADAMS
             AUDIO SPA J FIC ADAMS
+            BOOK & CD J FIC ADAMS
         """
-        # determine material format
-        if self.mat_format == "audio":
-            form = "AUDIO"
-        else:
-            form = None
-
-        # determine audience
-        if self.audience_info == "juv":
-            audn = "J"
-        else:
-            audn = None
+        form = self._fiction_format()
+        audn = AUDIENCE_PREFIXES.get(self.audience_info)
 
         # determine cutter
         cutter = callno_cutter_fic(self.cutter_info)
@@ -144,12 +158,14 @@ class BplCallNo(CallNo):
             J-E ADAMS
             J-E A
             CHI J-E ADAMS
+            BOOK & CD J-E ADAMS
         """
         cutter = callno_cutter_pic(self.cutter_info)
         if not cutter:
             return None
         else:
-            elements = [e for e in [self.language_code, "J-E", cutter] if e]
+            elements = [self._fiction_format(), self.language_code, "J-E", cutter]
+            elements = self._cleanup_callno_elements(elements)
             subfields = self._construct_subfields(elements)
             return Field(tag=self.tag, indicators=self.inds, subfields=subfields)
 
@@ -168,7 +184,60 @@ class BplCallNo(CallNo):
             DVD 909.0492 M
             BOOK & CD 323.623 W
         """
-        pass
+        audn = AUDIENCE_PREFIXES.get(self.audience_info)
+
+        if self.dewey_info is None:
+            return None
+        dewey = truncate_dewey(self.dewey_info, self.audience_info)
+        cutter = callno_cutter_initial(self.cutter_info)
+
+        if not cutter:
+            return None
+        else:
+            elements = [
+                self.mat_format,
+                self.language_code,
+                audn,
+                dewey,
+                cutter,
+            ]
+            elements = self._cleanup_callno_elements(elements)
+            subfields = self._construct_subfields(elements)
+            return Field(tag=self.tag, indicators=self.inds, subfields=subfields)
+
+    def _create_des_callno(self) -> Optional[Field]:
+        """
+        Creates call number field for materials classed in Dewey with
+        a subject segment, e.g. criticism of works of an author
+
+        Patterns:
+            813 ADAMS C
+            J 813 ADAMS C
+            AUDIO 891.73 TOLSTOY B
+        """
+        audn = AUDIENCE_PREFIXES.get(self.audience_info)
+
+        # determine subject segment
+        subject = dewey_subject(self.dewey_info, self.subject_info)
+        if subject is None:
+            return None
+        dewey = truncate_dewey(self.dewey_info, self.audience_info)
+        cutter = callno_cutter_initial(self.cutter_info)
+
+        if not all([subject, cutter]):
+            return None
+        else:
+            elements = [
+                self.mat_format,
+                self.language_code,
+                audn,
+                dewey,
+                subject,
+                cutter,
+            ]
+            elements = self._cleanup_callno_elements(elements)
+            subfields = self._construct_subfields(elements)
+            return Field(tag=self.tag, indicators=self.inds, subfields=subfields)
 
     def _create_bio_callno(self) -> Optional[Field]:
         """
@@ -183,11 +252,7 @@ class BplCallNo(CallNo):
             DVD CHI B ADAMS G
             BOOK & CD B ADAMS G
         """
-        # determine audience
-        if self.audience_info == "juv":
-            audn = "J"
-        else:
-            audn = None
+        audn = AUDIENCE_PREFIXES.get(self.audience_info)
 
         # determine biographee segment
         name = biographee(self.subject_info)
@@ -204,7 +269,6 @@ class BplCallNo(CallNo):
                 name,
                 cutter,
             ]
-            print(elements)
             elements = self._cleanup_callno_elements(elements)
             subfields = self._construct_subfields(elements)
             return Field(tag=self.tag, indicators=self.inds, subfields=subfields)
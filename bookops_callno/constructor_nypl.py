@@ -1,10 +1,168 @@
 # -*- coding: utf-8 -*-
 
-from pymarc import Record
+from typing import List, Optional
 
-from bookops_callno.base import CallNo
+from pymarc import Record, Field
+
+from bookops_callno.base import CallNo, Features
+from bookops_callno.dewey import truncate_dewey
+from bookops_callno.rules_shared import (
+    biographee,
+    callno_cutter_fic,
+    callno_cutter_initial,
+    callno_cutter_pic,
+    dewey_subject,
+)
+
+# patterns are documented for print language materials only (see README)
+PRINT_RECORD_TYPES = ("a", "t")
+ELECTRONIC_FORMS = ("o", "s")
+# audience prefix ($p) by audience
+AUDIENCE_PREFIXES = {"early juv": "J", "juv": "J", "young adult": "YA"}
 
 
 class NyplCallNo(CallNo):
-    def __init__(self, bib: Record, requested_call_type: str):
-        super().__init__(bib, requested_call_type)
+    patterns = ("pic", "fic", "bio", "des", "dew")
+
+    def __init__(
+        self,
+        bib: Record = None,
+        requested_call_type: str = "auto",
+        features: Features = None,
+    ):
+        """
+        Call number elements are recorded in separate subfields of the 091:
+        $p language and audience, $a class (FIC, E, B, Dewey), $b subject
+        or biographee, $c cutter. Only print materials are supported; no
+        call number is created for non-print materials and e-resources. Language is always marked,
+        including English, as in BPL call numbers.
+
+        Args:
+
+            bib:                    pymarc.Record instance
+            requested_call_type:    call pattern to be created;
+                                    options:
+                                        - auto
+                                        - bio
+                                        - des
+                                        - dew
+                                        - fic
+                                        - pic
+            features:               elements extracted from the bib by
+                                    another constructor
+        """
+        super().__init__(bib, requested_call_type, features)
+
+        self.tag = "091"
+        self.inds = [" ", " "]
+
+        self._create()
+        self._record_metrics("nypl")
+
+    def _create_callno(self, pattern: str) -> Optional[Field]:
+        """
+        Creates call number of given pattern for print materials
+        """
+        if (
+            self.record_type_info is not None
+            and self.record_type_info not in PRINT_RECORD_TYPES
+        ) or self.form_of_item_info in ELECTRONIC_FORMS:
+            return None
+        return super()._create_callno(pattern)
+
+    def _prefix_subfields(self, audn: Optional[str]) -> List[str]:
+        """
+        Returns prefix subfields common to all patterns
+        """
+        subfields = []
+        if self.language_code:
+            subfields.extend(["p", self.language_code])
+        if audn:
+            subfields.extend(["p", audn])
+        return subfields
+
+    def _create_fic_callno(self) -> Optional[Field]:
+        """
+        Creates call number field for fiction, patterns:
+            FIC ADAMS
+            J FIC ADAMS
+            SPA YA FIC ADAMS
+        """
+        cutter = callno_cutter_fic(self.cutter_info)
+        if not cutter:
+            return None
+        subfields = self._prefix_subfields(
+            AUDIENCE_PREFIXES.get(self.audience_info)
+        ) + ["a", "FIC", "c", cutter]
+        return Field(tag=self.tag, indicators=self.inds, subfields=subfields)
+
+    def _create_pic_callno(self) -> Optional[Field]:
+        """
+        Creates call number field for picture books and early readers.
+        Patterns:
+            J E ADAMS
+            SPA J E ADAMS
+        """
+        cutter = callno_cutter_pic(self.cutter_info)
+        if not cutter:
+            return None
+        subfields = self._prefix_subfields("J") + ["a", "E", "c", cutter]
+        return Field(tag=self.tag, indicators=self.inds, subfields=subfields)
+
+    def _create_dew_callno(self) -> Optional[Field]:
+        """
+        Creates call number field for nonfiction materials classed in Dewey
+
+        Patterns:
+            811 A
+            J 741.23 T
+            POL 821 A
+        """
+        if self.dewey_info is None:
+            return None
+        cutter = callno_cutter_initial(self.cutter_info)
+        if not cutter:
+            return None
+        dewey = truncate_dewey(self.dewey_info, self.audience_info)
+        subfields = self._prefix_subfields(
+            AUDIENCE_PREFIXES.get(self.audience_info)
+        ) + ["a", dewey, "c", cutter]
+        return Field(tag=self.tag, indicators=self.inds, subfields=subfields)
+
+    def _create_des_callno(self) -> Optional[Field]:
+        """
+        Creates call number field for materials classed in Dewey with
+        a subject segment
+
+        Patterns:
+            813 ADAMS C
+            J 813 ADAMS C
+        """
+        subject = dewey_subject(self.dewey_info, self.subject_info)
+        cutter = callno_cutter_initial(self.cutter_info)
+
+        if not all([subject, cutter]):
+            return None
+        dewey = truncate_dewey(self.dewey_info, self.audience_info)
+        subfields = self._prefix_subfields(
+            AUDIENCE_PREFIXES.get(self.audience_info)
+        ) + ["a", dewey, "b", subject, "c", cutter]
+        return Field(tag=self.tag, indicators=self.inds, subfields=subfields)
+
+    def _create_bio_callno(self) -> Optional[Field]:
+        """
+        Creates call number field for biography and autobiography
+
+        Patterns:
+            B ADAMS G
+            J B ADAMS G
+        """
+        name = biographee(self.subject_info)
+        cutter = callno_cutter_initial(self.cutter_info)
+
+        if not all([name, cutter]):
+            return None
+        subfields = self._prefix_subfields(
+            AUDIENCE_PREFIXES.get(self.audience_info)
+        ) + ["a", "B", "b", name, "c", cutter]
+        return Field(tag=self.tag, indicators=self.inds, subfields=subfields)
@@ -0,0 +1,291 @@
+# -*- coding: utf-8 -*-
+
+"""
+This module provides lookups of Cutter-Sanborn style author codes. No table is
+included; tables are loaded from a user supplied text file with one entry per
+line:
+
+    ADAMS<TAB>A211
+    ADAMS, H<TAB>A212
+
+A name receives the code of the last entry that sorts at or before it and
+starts with the same letter. Names are normalized the same way as call number
+elements. A table can be compiled to a compact binary file of fixed width
+entries that is memory-mapped instead of parsed, so large tables load
+instantly and are shared between worker processes.
+"""
+
+import mmap
+import struct
+from bisect import bisect_right
+from functools import lru_cache
+from typing import Iterable, List, Optional, Tuple, Union
+
+from pymarc import Field
+
+from bookops_callno.errors import CallNoConstructorError
+from bookops_callno.normalizer import (
+    corporate_name_full,
+    normalize_many,
+    normalize_value,
+    personal_name_surname,
+)
+
+COMPILED_MAGIC = b"BCNCUT1\n"
+_HEADER = struct.Struct("<III")
+
+
+def _find(keys, name: str) -> int:
+    # index of the last key sorting at or before name with the same initial
+    n = bisect_right(keys, name) - 1
+    if n < 0 or not name or keys[n][:1] != name[:1]:
+        return -1
+    return n
+
+
+def _field_name(field: Field) -> Optional[str]:
+    if field is None:
+        return None
+    if field.tag in ("100", "600"):
+        return personal_name_surname(field)
+    return corporate_name_full(field)
+
+
+class _CutterLookup:
+    """
+    Lookups shared by in-memory and memory-mapped tables; results are cached,
+    so repeated names are not searched again
+    """
+
+    def __init__(self):
+        self._lookup = lru_cache(maxsize=65536)(self._search)
+
+    def _search(self, name: str) -> Optional[str]:
+        raise NotImplementedError
+
+    def lookup(self, name: str) -> Optional[str]:
+        """
+        Returns cutter code for a name
+
+        Args:
+            name:                   author or entity name
+
+        Returns:
+            code
+        """
+        return self._lookup(name)
+
+    def cutter_for(self, field: Field) -> Optional[str]:
+        """
+        Returns cutter code for a personal (100, 600) or corporate
+        (110, 610) name field
+
+        Args:
+            field:                  pymarc.Field instance
+
+        Returns:
+            code
+        """
+        name = _field_name(field)
+        if not name:
+            return None
+        return self.lookup(name)
+
+
+class CutterTable(_CutterLookup):
+    """
+    Sorted in-memory table searched with binary search
+    """
+
+    def __init__(self, entries: Iterable[Tuple[str, str]]):
+        """
+        Args:
+            entries:                (name, code) pairs in any order
+        """
+        entries = list(entries)
+        if any(
+            not name.strip(".,:;-() ") or not code.strip() for name, code in entries
+        ):
+            raise CallNoConstructorError("Cutter table entries can not be empty.")
+        names = normalize_many(name for name, _ in entries)
+        table = sorted(zip(names, (code.strip() for _, code in entries)))
+        for (prev, _), (name, _) in zip(table, table[1:]):
+            if prev == name:
+                raise CallNoConstructorError(f"Duplicate cutter table entry: '{name}'.")
+        self.keys: List[str] = [name for name, _ in table]
+        self.codes: List[str] = [code for _, code in table]
+        super().__init__()
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def _search(self, name: str) -> Optional[str]:
+        name = normalize_value(name)
+        n = _find(self.keys, name)
+        if n < 0:
+            return None
+        return self.codes[n]
+
+    def save(self, path: str) -> None:
+        """
+        Writes table as a compiled file that can be opened with
+        `MappedCutterTable`
+
+        Args:
+            path:                   path to the compiled file
+        """
+        try:
+            keys = [k.encode("ascii") for k in self.keys]
+            codes = [c.encode("ascii") for c in self.codes]
+        except UnicodeEncodeError:
+            raise CallNoConstructorError(
+                "Cutter codes must consist of ASCII characters."
+            )
+        key_width = max((len(k) for k in keys), default=0)
+        code_width = max((len(c) for c in codes), default=0)
+        with open(path, "wb") as fh:
+            fh.write(COMPILED_MAGIC)
+            fh.write(_HEADER.pack(len(keys), key_width, code_width))
+            for key in keys:
+                fh.write(key.ljust(key_width, b"\x00"))
+            for code in codes:
+                fh.write(code.ljust(code_width, b"\x00"))
+
+
+class _MappedKeys:
+    """
+    Sequence view of fixed width keys of a compiled table
+    """
+
+    def __init__(self, buffer, offset: int, count: int, width: int):
+        self.buffer = buffer
+        self.offset = offset
+        self.count = count
+        self.width = width
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, n: int) -> bytes:
+        start = self.offset + n * self.width
+        return self.buffer[start : start + self.width].rstrip(b"\x00")
+
+
+class MappedCutterTable(_CutterLookup):
+    """
+    Compiled table memory-mapped from disk. Pages are read on demand and
+    shared by processes mapping the same file.
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path:                   path to a file created with
+                                    `CutterTable.save`
+        """
+        try:
+            with open(path, "rb") as fh:
+                self._mmap = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError):
+            raise CallNoConstructorError(f"Invalid compiled cutter table: {path}")
+        header_end = len(COMPILED_MAGIC) + _HEADER.size
+        if (
+            len(self._mmap) < header_end
+            or self._mmap[: len(COMPILED_MAGIC)] != COMPILED_MAGIC
+        ):
+            self._mmap.close()
+            raise CallNoConstructorError(f"Invalid compiled cutter table: {path}")
+        count, key_width, code_width = _HEADER.unpack(
+            self._mmap[len(COMPILED_MAGIC) : header_end]
+        )
+        if len(self._mmap) != header_end + count * (key_width + code_width):
+            self._mmap.close()
+            raise CallNoConstructorError(f"Invalid compiled cutter table: {path}")
+        self.keys = _MappedKeys(self._mmap, header_end, count, key_width)
+        self._codes = _MappedKeys(
+            self._mmap, header_end + count * key_width, count, code_width
+        )
+        super().__init__()
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def _search(self, name: str) -> Optional[str]:
+        name = normalize_value(name)
+        try:
+            key = name.encode("ascii")
+        except UnicodeEncodeError:
+            return None
+        n = _find(self.keys, key)
+        if n < 0:
+            return None
+        return self._codes[n].decode("ascii")
+
+    def close(self) -> None:
+        self._lookup.cache_clear()
+        self._mmap.close()
+
+
+def read_cutter_entries(path: str) -> List[Tuple[str, str]]:
+    """
+    Reads cutter table text file; blank lines and lines starting with '#'
+    are skipped
+
+    Args:
+        path:                   path to tab separated file of names and codes
+
+    Returns:
+        list of (name, code) pairs
+    """
+    entries = []
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            for n, line in enumerate(fh, start=1):
+                line = line.rstrip("\r\n")
+                if not line.strip() or line.startswith("#"):
+                    continue
+                name, sep, code = line.rpartition("\t")
+                if not sep or not name.strip() or not code.strip():
+                    raise CallNoConstructorError(
+                        f"Invalid cutter table entry at line {n}: '{line}'."
+                    )
+                entries.append((name, code))
+    except FileNotFoundError:
+        raise CallNoConstructorError(f"Cutter table file not found: {path}")
+    return entries
+
+
+@lru_cache(maxsize=8)
+def load_cutter_table(
+    path: str, use_mmap: bool = False
+) -> Union[CutterTable, MappedCutterTable]:
+    """
+    Loads cutter table once per process
+
+    Args:
+        path:                   path to a text table or, with `use_mmap`,
+                                to a compiled table
+        use_mmap:               memory-map a compiled table
+
+    Returns:
+        `CutterTable` or `MappedCutterTable` instance
+    """
+    if use_mmap:
+        return MappedCutterTable(path)
+    return CutterTable(read_cutter_entries(path))
+
+
+def compile_cutter_table(source: str, output: str) -> int:
+    """
+    Compiles cutter table text file for memory-mapping
+
+    Args:
+        source:                 path to tab separated file of names and codes
+        output:                 path to the compiled file
+
+    Returns:
+        number of entries
+    """
+    table = CutterTable(read_cutter_entries(source))
+    table.save(output)
+    return len(table)
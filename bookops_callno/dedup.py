@@ -0,0 +1,285 @@
+# -*- coding: utf-8 -*-
+
+"""
+This module provides in-batch deduplication of records. Vendor files often
+include the same bib many times (one per order or copy); a call number is
+created only for the first occurrence and the result is reused for the rest.
+"""
+
+from collections import OrderedDict, deque
+from functools import partial
+from hashlib import blake2b
+from typing import Callable, Iterable, Iterator, NamedTuple, Optional, Tuple, Union
+
+from bookops_callno.errors import CallNoConstructorError
+from bookops_callno.rawmarc import (
+    SUBFIELD_DELIMITER,
+    get_control_field,
+    iter_fields,
+    splice_field,
+)
+
+DEDUP_MODES = ("control", "fingerprint")
+
+# MARC tags that affect call number creation
+CALLNO_RELEVANT_TAGS = frozenset(
+    [
+        "008",
+        "082",
+        "100",
+        "110",
+        "111",
+        "245",
+        "300",
+        "600",
+        "610",
+        "650",
+        "655",
+    ]
+)
+
+
+class _Duplicate(NamedTuple):
+    """
+    Placeholder of a duplicate record passed through the pipeline instead of
+    the record; keeps only what its result needs
+    """
+
+    seq: int
+    key: Union[bytes, Tuple]
+    control_no: Optional[str]
+    order_no: Optional[str]
+    size: int
+    # raw record, only when results include records with spliced call number
+    data: Optional[bytes] = None
+
+
+def _skip_duplicate(worker: Callable, item: tuple):
+    if isinstance(item, _Duplicate):
+        return item
+    return worker(item)
+
+
+def fingerprint(data: bytes, extra: Tuple = ()) -> bytes:
+    """
+    Calculates digest of call number relevant parts of a raw record: record
+    type and bibliographic level from the leader and fields listed in
+    `CALLNO_RELEVANT_TAGS`.
+
+    Args:
+        data:                   raw MARC21 record
+        extra:                  additional values to include, e.g. order data
+
+    Returns:
+        digest
+    """
+    digest = blake2b(digest_size=16)
+    digest.update(data[6:8])
+    for tag, value in iter_fields(data):
+        if tag in CALLNO_RELEVANT_TAGS:
+            digest.update(tag.encode("ascii"))
+            digest.update(value)
+            digest.update(b"\x1e")
+    for value in extra:
+        digest.update(b"\x1d" + str(value).encode("utf-8"))
+    return digest.digest()
+
+
+def control_key(data: bytes, extra: Tuple = ()) -> Optional[Tuple]:
+    """
+    Returns key based on the record control number (001) or, if missing,
+    the OCLC number (035)
+
+    Args:
+        data:                   raw MARC21 record
+        extra:                  additional values to include, e.g. order data
+
+    Returns:
+        key
+    """
+    control_no = get_control_field(data, "001")
+    if not control_no:
+        for tag, value in iter_fields(data):
+            if tag == "035":
+                for subfield in value.split(SUBFIELD_DELIMITER)[1:]:
+                    if subfield.startswith(b"a(OCoLC)"):
+                        control_no = subfield[1:].decode("utf-8", errors="replace")
+                        break
+            if control_no:
+                break
+    if not control_no:
+        return None
+    return (control_no.strip(),) + tuple(extra)
+
+
+def dedup_key(data: bytes, mode: str = "fingerprint", extra: Tuple = ()):
+    """
+    Returns key identifying records that result in the same call number or
+    None if record can not be reliably identified
+
+    Args:
+        data:                   raw MARC21 record
+        mode:                   'control' (trust 001/OCLC number) or
+                                'fingerprint' (digest of relevant fields)
+        extra:                  additional values to include, e.g. order data
+
+    Returns:
+        key
+    """
+    try:
+        if mode == "control":
+            key = control_key(data, extra)
+            if key is not None:
+                return key
+        return fingerprint(data, extra)
+    except (ValueError, UnicodeDecodeError):
+        # malformed records are never deduplicated
+        return None
+
+
+def order_extra(item: tuple) -> Tuple:
+    """
+    Returns order line data of a batch item that affects its call number:
+    audience and shelf codes. Other order data, e.g. the order number,
+    differs between order lines of the same bib and is left out, so
+    duplicate bibs are recognized across order lines.
+
+    Args:
+        item:                   (seq, raw record) or (seq, raw record, `Order`)
+
+    Returns:
+        values to include in the dedup key
+    """
+    if len(item) < 3:
+        return ()
+    order = item[2]
+    return (order.audn, order.shelf)
+
+
+class Deduplicator:
+    """
+    Replaces duplicate records in a stream of batch items with lightweight
+    placeholders and restores their results in the stream of results.
+
+    Placeholders travel through the pipeline with the other items, so they
+    are bounded by its queues like any record; workers wrapped with `worker`
+    pass them through unprocessed. `filter` and `merge` may run in different
+    threads (the reader and the consumer); they communicate over a plan
+    holding the key of each unique item in input order. At most `window`
+    distinct keys are remembered.
+    """
+
+    def __init__(
+        self, mode: str = "fingerprint", window: int = 100000, splice: bool = False
+    ):
+        """
+        Args:
+            mode:                   'control' or 'fingerprint'
+            window:                 number of most recent distinct records
+                                    remembered
+            splice:                 results include records with spliced
+                                    call number
+        """
+        if mode not in DEDUP_MODES:
+            raise CallNoConstructorError(
+                "Invalid 'mode' argument used. "
+                f"Must be one of: {', '.join(DEDUP_MODES)}."
+            )
+        self.mode = mode
+        self.window = window
+        self.splice = splice
+        self.duplicates = 0
+        self._seen: OrderedDict = OrderedDict()
+        # (key, evicted key) of unique items not merged yet
+        self._plan: deque = deque()
+        self._results: dict = {}
+
+    def worker(self, worker: Callable) -> Callable:
+        """
+        Wraps worker function, so it returns placeholders of duplicates
+        unchanged; the wrapper is picklable if the worker is
+
+        Args:
+            worker:                 function applied to each item
+
+        Returns:
+            wrapped function
+        """
+        return partial(_skip_duplicate, worker)
+
+    def filter(self, items: Iterable[tuple]) -> Iterator[tuple]:
+        """
+        Yields the first occurrence of each record and placeholders of its
+        duplicates
+
+        Args:
+            items:                  (seq, raw record, ...) tuples
+
+        Yields:
+            unique items and placeholders
+        """
+        for item in items:
+            seq, data = item[0], item[1]
+            key = dedup_key(data, self.mode, order_extra(item))
+            if key is not None and key in self._seen:
+                self._seen.move_to_end(key)
+                yield _Duplicate(
+                    seq,
+                    key,
+                    get_control_field(data, "001"),
+                    item[2].order_no if len(item) > 2 else None,
+                    len(data),
+                    data if self.splice else None,
+                )
+                continue
+
+            evicted = None
+            if key is not None:
+                self._seen[key] = None
+                if len(self._seen) > self.window:
+                    evicted, _ = self._seen.popitem(last=False)
+            self._plan.append((key, evicted))
+            yield item
+
+    def merge(self, results: Iterable) -> Iterator:
+        """
+        Yields results with placeholders of duplicates replaced by results of
+        their first occurrence
+
+        Args:
+            results:                `BatchResult` of unique items and
+                                    placeholders in order
+
+        Yields:
+            `BatchResult` instances
+        """
+        for result in results:
+            if isinstance(result, _Duplicate):
+                yield self._replay(result)
+                continue
+
+            key, evicted = self._plan.popleft()
+            if key is not None:
+                self._results[key] = result._replace(marc=None, metrics=None)
+            if evicted is not None:
+                self._results.pop(evicted, None)
+            yield result
+
+    def _replay(self, duplicate: _Duplicate):
+        self.duplicates += 1
+        cached = self._results[duplicate.key]
+        if not self.splice:
+            marc = None
+        elif cached.field is not None:
+            marc = splice_field(duplicate.data, *cached.field)
+        else:
+            marc = duplicate.data
+        return cached._replace(
+            seq=duplicate.seq,
+            control_no=duplicate.control_no,
+            order_no=duplicate.order_no,
+            marc=marc,
+            size=duplicate.size,
+            duplicate=True,
+            elapsed=None,
+        )
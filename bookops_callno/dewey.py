@@ -0,0 +1,266 @@
+# -*- coding: utf-8 -*-
+
+"""
+This module provides parsing of Dewey Decimal Classification numbers from
+the MARC 082 tag and their truncation to call number segments.
+
+Class numbers repeat heavily in a batch, so results are cached by the raw
+082 value.
+
+Ranges of class numbers requiring a subject segment in the call number
+(Dewey + subject pattern) are read from a data file
+(`data/dewey_subject_ranges.tsv`) into an interval index, so ranges can be
+added without code changes.
+"""
+
+import os
+import re
+from bisect import bisect_right
+from functools import lru_cache
+from typing import Iterable, List, Optional, Tuple
+
+from pymarc import Record
+
+from bookops_callno.errors import CallNoConstructorError
+
+# prime marks and slashes marking segmentation of a class number
+_SEGMENTATION = re.compile("[/'′ʹ]")
+_CLASS_NUMBER = re.compile(r"\[?(\d{3})(?:\.(\d+))?")
+_RANGE_BOUND = re.compile(r"\d{3}(?:\.\d+)?")
+
+# digits after the decimal point kept in call numbers by audience
+DEWEY_DIGITS = {"early juv": 2, "juv": 2, "young adult": 4, "adult": 4}
+DEFAULT_DEWEY_DIGITS = 4
+
+DEWEY_SUBJECT_RANGES = os.path.join(
+    os.path.dirname(__file__), "data", "dewey_subject_ranges.tsv"
+)
+# subject tags used for each kind of subject segment
+SUBJECT_SEGMENT_TAGS = {
+    "corporate_name": ("610",),
+    "personal_name": ("600",),
+    "topic": ("650",),
+}
+
+
+def parse_dewey(value: str) -> Optional[str]:
+    """
+    Parses Dewey class number from the 082 subfield $a. Segmentation marks
+    are removed, e.g. '813/.54' -> '813.54', '641.5/975' -> '641.5975'.
+    Values that do not start with a class number (e.g. 'Fic', '[E]') are
+    ignored.
+
+    Args:
+        value:                  082 $a value
+
+    Returns:
+        class number
+    """
+    if not value:
+        return None
+    elif not isinstance(value, str):
+        raise CallNoConstructorError(
+            "Invalid 'value' type used in argument. Must be a string."
+        )
+    return _parse_dewey(value)
+
+
+@lru_cache(maxsize=16384)
+def _parse_dewey(value: str) -> Optional[str]:
+    value = _SEGMENTATION.sub("", value.strip())
+    match = _CLASS_NUMBER.match(value)
+    if match is None:
+        return None
+    base, decimal = match.groups()
+    if decimal:
+        return f"{base}.{decimal}"
+    return base
+
+
+def truncate_dewey(class_number: str, audience: Optional[str] = None) -> str:
+    """
+    Shortens class number to the number of digits after the decimal point
+    used for given audience. Trailing zeros are dropped, e.g.
+    '500.0' -> '500', '947.0841' -> '947.08' (juvenile).
+
+    Args:
+        class_number:           Dewey class number
+        audience:               audience as returned by `parser.get_audience`
+
+    Returns:
+        class number
+    """
+    return _truncate_dewey(
+        class_number, DEWEY_DIGITS.get(audience, DEFAULT_DEWEY_DIGITS)
+    )
+
+
+@lru_cache(maxsize=16384)
+def _truncate_dewey(class_number: str, digits: int) -> str:
+    base, _, decimal = class_number.partition(".")
+    decimal = decimal[:digits].rstrip("0")
+    if decimal:
+        return f"{base}.{decimal}"
+    return base
+
+
+def get_dewey(bib: Record = None) -> Optional[str]:
+    """
+    Returns the first Dewey class number found in the 082 tags of a record
+
+    Args:
+        bib:                    pymarc.Record instance
+
+    Returns:
+        class number
+    """
+    if bib is None:
+        return None
+    elif not isinstance(bib, Record):
+        raise CallNoConstructorError(
+            "Invalid 'bib' argument used. Must be pymarc.Record instance."
+        )
+
+    for field in bib.get_fields("082"):
+        for value in field.get_subfields("a"):
+            class_number = parse_dewey(value)
+            if class_number is not None:
+                return class_number
+    return None
+
+
+def dewey_segments(
+    values: Iterable[str], audience: Optional[str] = None
+) -> List[Optional[str]]:
+    """
+    Parses and truncates a sequence of 082 $a values. Each unique value is
+    parsed only once.
+
+    Args:
+        values:                 082 $a values
+        audience:               audience as returned by `parser.get_audience`
+
+    Returns:
+        list of class numbers (None for values without one)
+    """
+    values = list(values)
+    segments = {}
+    for value in dict.fromkeys(values):
+        class_number = parse_dewey(value)
+        segments[value] = (
+            truncate_dewey(class_number, audience) if class_number is not None else None
+        )
+    return [segments[v] for v in values]
+
+
+class DeweyRangeIndex:
+    """
+    Non-overlapping ranges of class numbers searched with binary search.
+    Ranges are half-open: range from '800' to '900' includes '899.9' but not
+    '900'. Class numbers of equal length before the decimal point sort as
+    strings in numeric order, so no conversion is needed.
+    """
+
+    def __init__(self, ranges: Iterable[Tuple[str, str, str]]):
+        """
+        Args:
+            ranges:                 (start, end, segment) in any order
+        """
+        ranges = sorted(ranges)
+        for start, end, segment in ranges:
+            if not (_RANGE_BOUND.fullmatch(start) and _RANGE_BOUND.fullmatch(end)):
+                raise CallNoConstructorError(f"Invalid Dewey range: '{start}'-'{end}'.")
+            if start >= end:
+                raise CallNoConstructorError(
+                    f"Invalid Dewey range: '{start}'-'{end}'. "
+                    "Start must precede end."
+                )
+            if segment not in SUBJECT_SEGMENT_TAGS:
+                raise CallNoConstructorError(
+                    f"Invalid subject segment '{segment}' of Dewey range "
+                    f"'{start}'-'{end}'."
+                )
+        for prev, current in zip(ranges, ranges[1:]):
+            if current[0] < prev[1]:
+                raise CallNoConstructorError(
+                    f"Overlapping Dewey ranges: '{prev[0]}'-'{prev[1]}' and "
+                    f"'{current[0]}'-'{current[1]}'."
+                )
+        self.starts = [r[0] for r in ranges]
+        self.ends = [r[1] for r in ranges]
+        self.segments = [r[2] for r in ranges]
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def lookup(self, class_number: str) -> Optional[str]:
+        """
+        Returns subject segment of the range a class number belongs to
+
+        Args:
+            class_number:           Dewey class number
+
+        Returns:
+            segment
+        """
+        n = bisect_right(self.starts, class_number) - 1
+        if n < 0 or class_number >= self.ends[n]:
+            return None
+        return self.segments[n]
+
+
+def read_dewey_ranges(path: str) -> List[Tuple[str, str, str]]:
+    """
+    Reads tab separated file of Dewey ranges; blank lines and lines starting
+    with '#' are skipped
+
+    Args:
+        path:                   path to the file
+
+    Returns:
+        list of (start, end, segment)
+    """
+    ranges = []
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            for n, line in enumerate(fh, start=1):
+                if not line.strip() or line.startswith("#"):
+                    continue
+                columns = line.rstrip("\r\n").split("\t")
+                if len(columns) < 3:
+                    raise CallNoConstructorError(
+                        f"Invalid Dewey range at line {n}: '{line.strip()}'."
+                    )
+                ranges.append(tuple(c.strip() for c in columns[:3]))
+    except FileNotFoundError:
+        raise CallNoConstructorError(f"Dewey ranges file not found: {path}")
+    return ranges
+
+
+@lru_cache(maxsize=8)
+def load_dewey_ranges(path: str = DEWEY_SUBJECT_RANGES) -> DeweyRangeIndex:
+    """
+    Loads Dewey ranges once per process
+
+    Args:
+        path:                   path to the file; package data by default
+
+    Returns:
+        `DeweyRangeIndex` instance
+    """
+    return DeweyRangeIndex(read_dewey_ranges(path))
+
+
+def dewey_subject_segment(class_number: Optional[str]) -> Optional[str]:
+    """
+    Returns kind of subject segment required by a class number, if any
+
+    Args:
+        class_number:           Dewey class number
+
+    Returns:
+        'personal_name', 'corporate_name', 'topic' or None
+    """
+    if not class_number:
+        return None
+    return load_dewey_ranges().lookup(class_number)
@@ -0,0 +1,530 @@
+# -*- coding: utf-8 -*-
+
+"""
+This module provides a minimal metrics registry with counters, gauges and
+histograms rendered in the Prometheus text exposition format (version 0.0.4).
+No client library is required.
+
+Package metrics are registered in `REGISTRY`:
+    bookops_callno_callnos_total            call numbers constructed by
+                                            `CallNo` by system, pattern,
+                                            and result
+    bookops_callno_records_total            records processed by batch runs
+                                            and the local service by pattern
+                                            and result
+    bookops_callno_failures_total           failed records by reason
+    bookops_callno_record_seconds           per record processing time
+    bookops_callno_normalizer_cache_*       normalizer cache statistics
+
+Metrics are kept per process: records processed by worker processes are
+counted by the process collecting their results, and changes of call number
+counters and normalizer cache statistics made in a worker are sent back with
+each result as `MetricsDelta` and added up there.
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from bisect import bisect_left
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
+
+DEFAULT_BUCKETS = (
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str]) -> str:
+    pairs = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    if not pairs:
+        return ""
+    return "{" + ",".join(pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _check(self, labels: Tuple) -> None:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(
+                f"Metric '{self.name}' requires labels: {', '.join(self.labelnames)}."
+            )
+
+    def samples(self) -> List[Tuple[str, Tuple, Tuple, float]]:
+        raise NotImplementedError
+
+    def reset(self) -> None:
+        pass
+
+    def render(self) -> str:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        for name, labelnames, labels, value in self.samples():
+            lines.append(
+                f"{name}{_format_labels(labelnames, labels)} {_format_value(value)}"
+            )
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """
+    Monotonically increasing value
+    """
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        """
+        Increments counter for given label values
+        """
+        with self._lock:
+            value = self._values.get(labels)
+            if value is None:
+                self._check(labels)
+                value = 0
+            self._values[labels] = value + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def snapshot(self) -> Dict[Tuple, float]:
+        """
+        Returns copy of current values by label values
+        """
+        with self._lock:
+            return dict(self._values)
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [(self.name, self.labelnames, k, v) for k, v in items]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+class Gauge(_Metric):
+    """
+    Value that can go up and down, either set directly or read from
+    a callback at render time
+    """
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Tuple = (),
+        callback: Optional[Callable[[], float]] = None,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+        self._values: Dict[Tuple, float] = {}
+
+    def set(self, value: float, *labels: str) -> None:
+        self._check(labels)
+        with self._lock:
+            self._values[labels] = value
+
+    def value(self, *labels: str) -> float:
+        if self.callback is not None:
+            return self.callback()
+        return self._values.get(labels, 0)
+
+    def samples(self):
+        if self.callback is not None:
+            return [(self.name, (), (), self.callback())]
+        with self._lock:
+            items = sorted(self._values.items())
+        return [(self.name, self.labelnames, k, v) for k, v in items]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+class Histogram(_Metric):
+    """
+    Distribution of observed values in cumulative buckets
+    """
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Tuple = (),
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._counts: Dict[Tuple, List[int]] = {}
+        self._sums: Dict[Tuple, float] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        """
+        Records observed value for given label values
+        """
+        n = bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.get(labels)
+            if counts is None:
+                self._check(labels)
+                counts = self._counts[labels] = [0] * (len(self.buckets) + 1)
+                self._sums[labels] = 0.0
+            counts[n] += 1
+            self._sums[labels] += value
+
+    def count(self, *labels: str) -> int:
+        return sum(self._counts.get(labels, ()))
+
+    def samples(self):
+        with self._lock:
+            items = sorted((k, list(v), self._sums[k]) for k, v in self._counts.items())
+        samples = []
+        bucket_labels = self.labelnames + ("le",)
+        for labels, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                samples.append(
+                    (
+                        f"{self.name}_bucket",
+                        bucket_labels,
+                        labels + (_format_value(bound),),
+                        cumulative,
+                    )
+                )
+            samples.append((f"{self.name}_sum", self.labelnames, labels, total))
+            samples.append((f"{self.name}_count", self.labelnames, labels, cumulative))
+        return samples
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counts.clear()
+            self._sums.clear()
+
+
+class MetricsRegistry:
+    """
+    Collection of metrics rendered together
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric '{metric.name}' already registered.")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Tuple = ()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Tuple = (),
+        callback: Optional[Callable[[], float]] = None,
+    ):
+        return self.register(Gauge(name, documentation, labelnames, callback))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Tuple = (),
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def get(self, name: str) -> _Metric:
+        return self._metrics[name]
+
+    def reset(self) -> None:
+        """
+        Clears values of all metrics
+        """
+        for metric in self._metrics.values():
+            metric.reset()
+
+    def render(self) -> str:
+        """
+        Returns metrics in Prometheus text exposition format
+        """
+        return "\n".join(m.render() for m in self._metrics.values()) + "\n"
+
+    def write(self, path: str) -> None:
+        """
+        Writes metrics to a file atomically, e.g. for node_exporter's
+        textfile collector
+        """
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            fh.write(self.render())
+        os.replace(tmp, path)
+
+
+def _cache_info():
+    # normalizer is imported on first render only
+    from bookops_callno.normalizer import _normalize_value
+
+    return _normalize_value.cache_info()
+
+
+# normalizer cache statistics of worker processes: [hits, misses]
+_worker_cache = [0, 0]
+_worker_cache_lock = threading.Lock()
+
+
+def _cache_hits() -> int:
+    return _cache_info().hits + _worker_cache[0]
+
+
+def _cache_misses() -> int:
+    return _cache_info().misses + _worker_cache[1]
+
+
+def _cache_hit_ratio() -> float:
+    hits = _cache_hits()
+    lookups = hits + _cache_misses()
+    return hits / lookups if lookups else 0.0
+
+
+REGISTRY = MetricsRegistry()
+
+CALLNOS = REGISTRY.counter(
+    "bookops_callno_callnos_total",
+    "Call numbers constructed by CallNo.",
+    ("system", "pattern", "result"),
+)
+RECORDS = REGISTRY.counter(
+    "bookops_callno_records_total",
+    "Records processed.",
+    ("pattern", "result"),
+)
+FAILURES = REGISTRY.counter(
+    "bookops_callno_failures_total",
+    "Records without call number by reason.",
+    ("reason",),
+)
+RECORD_SECONDS = REGISTRY.histogram(
+    "bookops_callno_record_seconds",
+    "Time to construct call number of a record in seconds.",
+)
+REGISTRY.gauge(
+    "bookops_callno_normalizer_cache_hits",
+    "Normalizer cache hits.",
+    callback=_cache_hits,
+)
+REGISTRY.gauge(
+    "bookops_callno_normalizer_cache_misses",
+    "Normalizer cache misses.",
+    callback=_cache_misses,
+)
+REGISTRY.gauge(
+    "bookops_callno_normalizer_cache_hit_ratio",
+    "Share of normalizer lookups served from cache.",
+    callback=_cache_hit_ratio,
+)
+
+
+class MetricsDelta(NamedTuple):
+    """
+    Changes of package metrics made in a process while handling a record
+    """
+
+    pid: int
+    callnos: Tuple[Tuple[Tuple, float], ...]
+    cache_hits: int
+    cache_misses: int
+
+
+def metrics_snapshot() -> Tuple[Dict[Tuple, float], int, int]:
+    """
+    Returns state of metrics tracked by `MetricsDelta`; pass it to
+    `metrics_delta` after the record is handled
+    """
+    info = _cache_info()
+    return CALLNOS.snapshot(), info.hits, info.misses
+
+
+def metrics_delta(snapshot: Tuple[Dict[Tuple, float], int, int]) -> MetricsDelta:
+    """
+    Returns changes of metrics since the snapshot was taken
+
+    Args:
+        snapshot:               state returned by `metrics_snapshot`
+
+    Returns:
+        `MetricsDelta` instance
+    """
+    values, hits, misses = snapshot
+    callnos = tuple(
+        (labels, value - values.get(labels, 0))
+        for labels, value in CALLNOS.snapshot().items()
+        if value != values.get(labels, 0)
+    )
+    info = _cache_info()
+    return MetricsDelta(os.getpid(), callnos, info.hits - hits, info.misses - misses)
+
+
+def apply_delta(delta: Optional[MetricsDelta]) -> None:
+    """
+    Adds changes of metrics made in a worker process to this process'
+    metrics; changes made in this process are already counted and skipped
+
+    Args:
+        delta:                  `MetricsDelta` instance
+    """
+    if delta is None or delta.pid == os.getpid():
+        return
+    for labels, amount in delta.callnos:
+        CALLNOS.inc(*labels, amount=amount)
+    with _worker_cache_lock:
+        _worker_cache[0] += delta.cache_hits
+        _worker_cache[1] += delta.cache_misses
+
+
+_pause = threading.local()
+
+
+@contextmanager
+def pause_metrics() -> Iterator[None]:
+    """
+    Stops counting constructed call numbers in the current thread, e.g.
+    while warming up caches
+    """
+    depth = getattr(_pause, "depth", 0)
+    _pause.depth = depth + 1
+    try:
+        yield
+    finally:
+        _pause.depth = depth
+
+
+def metrics_paused() -> bool:
+    """
+    Returns True inside `pause_metrics` in the current thread
+    """
+    return getattr(_pause, "depth", 0) > 0
+
+
+def failure_reason(error: str) -> str:
+    """
+    Maps error message of a failed record to a short reason label
+    """
+    if error.startswith("Invalid MARC record"):
+        return "invalid_marc"
+    if error == "Unable to construct call number.":
+        return "not_constructed"
+    name, sep, _ = error.partition(":")
+    if sep and name.isidentifier():
+        return name
+    return "other"
+
+
+def record_result(
+    pattern: str, error: Optional[str] = None, elapsed: Optional[float] = None
+) -> None:
+    """
+    Updates package metrics with outcome of a single record
+
+    Args:
+        pattern:                call number pattern
+        error:                  error message if call number was not created
+        elapsed:                processing time in seconds
+    """
+    if error is None:
+        RECORDS.inc(pattern, "created")
+    else:
+        RECORDS.inc(pattern, "failed")
+        FAILURES.inc(failure_reason(error))
+    if elapsed is not None:
+        RECORD_SECONDS.observe(elapsed)
+
+
+class MetricsExporter:
+    """
+    Writes registry to a file periodically
+    """
+
+    def __init__(
+        self,
+        path: str,
+        interval: float = 15.0,
+        registry: MetricsRegistry = REGISTRY,
+    ):
+        """
+        Args:
+            path:                   path to the metrics file
+            interval:               minimal number of seconds between writes
+            registry:               `MetricsRegistry` to write
+        """
+        self.path = path
+        self.interval = interval
+        self.registry = registry
+        self._last_write: Optional[float] = None
+
+    def maybe_write(self) -> None:
+        """
+        Writes metrics if `interval` seconds passed since the last write
+        """
+        now = time.monotonic()
+        if self._last_write is None or now - self._last_write >= self.interval:
+            self.write()
+
+    def write(self) -> None:
+        self.registry.write(self.path)
+        self._last_write = time.monotonic()
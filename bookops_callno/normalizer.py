@@ -1,9 +1,9 @@
 # -*- coding: utf-8 -*-
 
-from typing import Optional
+from functools import lru_cache
+from typing import Iterable, List, Optional
 
 from pymarc import Field
-from unidecode import unidecode, UnidecodeError
 
 
 from bookops_callno.errors import CallNoConstructorError
@@ -40,13 +40,62 @@ def normalize_value(value: str) -> str:
             "Invalid 'value' type used in argument. Must be a string."
         )
 
+    return _normalize_value(value)
+
+
+def normalize_many(values: Iterable[str]) -> List[str]:
+    """
+    Normalizes a sequence of strings. Duplicates are removed first, so each
+    unique value is transliterated only once, and results are mapped back
+    to the input order.
+
+    Args:
+        values:                 strings to be processed
+
+    Returns:
+        list of normalized values
+    """
+    values = list(values)
+    for value in values:
+        if value and not isinstance(value, str):
+            raise CallNoConstructorError(
+                "Invalid 'value' type used in argument. Must be a string."
+            )
+
+    normalized = {v: normalize_value(v) for v in dict.fromkeys(v or "" for v in values)}
+    return [normalized[v or ""] for v in values]
+
+
+@lru_cache(maxsize=65536)
+def _normalize_value(value: str) -> str:
+    """
+    Cached normalization of a non-empty string. Names and titles repeat
+    heavily in batches, so each unique value is transliterated only once.
+    """
+    value = value.replace("\u02b9", "")  # Russian: modifier letter prime
+    value = value.replace("\u02bb", "")  # Arabic modifier letter turned comma
+    value = value.replace("'", "")
+    if not value.isascii():
+        value = transliterate(value)
+    value = remove_trailing_punctuation(value).upper()
+    return value
+
+
+def transliterate(value: str) -> str:
+    """
+    Replaces non-ASCII characters with their closest ASCII equivalents.
+    `unidecode` is imported on first use since most of values are plain ASCII.
+
+    Args:
+        value:                  string to be processed
+
+    Returns:
+        value
+    """
+    from unidecode import unidecode, UnidecodeError
+
     try:
-        value = value.replace("\u02b9", "")  # Russian: modifier letter prime
-        value = value.replace("\u02bb", "")  # Arabic modifier letter turned comma
-        value = value.replace("'", "")
-        value = unidecode(value, errors="strict")
-        value = remove_trailing_punctuation(value).upper()
-        return value
+        return unidecode(value, errors="strict")
     except UnidecodeError as exc:
         raise CallNoConstructorError(
             f"Unsupported character encountered. Error: '{exc}'."
@@ -177,6 +226,23 @@ def personal_name_surname(field: Field = None) -> Optional[str]:
             "Invalid 'field' argument type. Must be pymarc.Field instance."
         )
 
+    name = _personal_name(field)
+    if name is None:
+        return None
+    return _surname(normalize_value(name))
+
+
+def _check_field(field) -> None:
+    if not isinstance(field, Field):
+        raise CallNoConstructorError(
+            "Invalid 'field' argument type. Must be pymarc.Field instance."
+        )
+
+
+def _personal_name(field: Field) -> Optional[str]:
+    """
+    Returns not normalized personal name with numeration from 100 or 600 tag
+    """
     if field.tag not in ("100", "600"):
         return None
     elif field.indicator1 not in ("0", "1"):
@@ -190,9 +256,10 @@ def personal_name_surname(field: Field = None) -> Optional[str]:
         name = f"{sub_a} {sub_b}"
     except AttributeError:
         name = sub_a
+    return name
 
-    name = normalize_value(name)
 
+def _surname(name: str) -> str:
     # stop at comma to select surname
     try:
         stop = name.index(",")
@@ -203,6 +270,30 @@ def personal_name_surname(field: Field = None) -> Optional[str]:
     return name
 
 
+def surnames_for(fields: Iterable[Optional[Field]]) -> List[Optional[str]]:
+    """
+    Batch version of `personal_name_surname`. Names are normalized with
+    `normalize_many`, so repeated names are transliterated once.
+
+    Args:
+        fields:                 pymarc.Field instances or None
+
+    Returns:
+        list of surnames (None for fields without a personal name)
+    """
+    names = []
+    for field in fields:
+        if field is None:
+            names.append(None)
+        else:
+            _check_field(field)
+            names.append(_personal_name(field))
+
+    normalized = normalize_many(n for n in names if n is not None)
+    it = iter(normalized)
+    return [None if n is None else _surname(next(it)) for n in names]
+
+
 def subject_corporate_name(field: Field = None) -> Optional[str]:
     """
     Returns an uppercase corporate name to be used in subject segment
@@ -299,7 +390,20 @@ def subject_topic(field: Field = None) -> Optional[str]:
     Returns:
         topic
     """
-    pass
+    if field is None:
+        return None
+    elif not isinstance(field, Field):
+        raise CallNoConstructorError(
+            "Invalid 'field' argument type. Must be pymarc.Field instance."
+        )
+
+    if field.tag != "650" or not field["a"]:
+        return None
+
+    # qualifier is dropped, e.g. 'Java (Computer program language)' -> 'JAVA'
+    phrases = field["a"].strip().split("(")
+    topic = normalize_value(phrases[0])
+    return topic or None
 
 
 def title_first_word(field: Field = None) -> Optional[str]:
@@ -334,6 +438,17 @@ def title_initial(field: Field = None) -> Optional[str]:
             "Invalid 'field' argument type. Must be pymarc.Field instance."
         )
 
+    title = _title(field)
+    if title is None:
+        return None
+    initial = normalize_value(title)[0]
+    return initial
+
+
+def _title(field: Field) -> Optional[str]:
+    """
+    Returns not normalized title from 245 tag with any initial article skipped
+    """
     if field.tag != "245":
         return None
 
@@ -342,7 +457,28 @@ def title_initial(field: Field = None) -> Optional[str]:
     except ValueError:
         return None
 
-    title = field["a"][ind2:]
-    title = normalize_value(title)
-    initial = title[0]
-    return initial
+    return field["a"][ind2:]
+
+
+def title_initials_for(fields: Iterable[Optional[Field]]) -> List[Optional[str]]:
+    """
+    Batch version of `title_initial`. Titles are normalized with
+    `normalize_many`, so repeated titles are transliterated once.
+
+    Args:
+        fields:                 pymarc.Field instances or None
+
+    Returns:
+        list of initials (None for fields without a title)
+    """
+    titles = []
+    for field in fields:
+        if field is None:
+            titles.append(None)
+        else:
+            _check_field(field)
+            titles.append(_title(field))
+
+    normalized = normalize_many(t for t in titles if t is not None)
+    it = iter(normalized)
+    return [None if t is None else next(it)[0] for t in titles]
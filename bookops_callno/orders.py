@@ -0,0 +1,293 @@
+# -*- coding: utf-8 -*-
+
+"""
+This module provides joining of order lines exported from Sierra with bibs
+of MARC files.
+
+Order lines are read from a CSV or TSV file with a header row into an index
+keyed by bib number. Bibs are then streamed and matched with a single lookup
+each, so the cost of the join grows linearly with the size of both inputs.
+Indexes of more than `memory_limit` order lines are moved to a temporary
+SQLite database to keep memory use bounded.
+"""
+
+import csv
+import os
+import sqlite3
+import sys
+import tempfile
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from bookops_callno.errors import CallNoConstructorError
+from bookops_callno.rawmarc import SUBFIELD_DELIMITER, get_control_field, iter_fields
+
+ORDER_COLUMNS = ("bib_no", "order_no", "audn", "lang", "note", "shelf")
+REQUIRED_ORDER_COLUMNS = ("bib_no", "order_no")
+# order lines inserted into the database at once
+_INSERT_BATCH = 10000
+
+
+class Order(NamedTuple):
+    """
+    Order line data used in call number creation
+    """
+
+    order_no: str
+    audn: Optional[str] = None
+    lang: Optional[str] = None
+    note: Optional[str] = None
+    shelf: Optional[str] = None
+
+
+def normalize_bib_no(value: Optional[str]) -> Optional[str]:
+    """
+    Normalizes bib number for matching: surrounding whitespace and a leading
+    period of Sierra record numbers are removed, letters are lowercased,
+    e.g. '.B12345678' -> 'b12345678'
+
+    Args:
+        value:                  bib number
+
+    Returns:
+        normalized bib number
+    """
+    if not value:
+        return None
+    value = value.strip().lstrip(".").lower()
+    return value or None
+
+
+def read_orders(path: str) -> Iterator[Tuple[str, Order]]:
+    """
+    Reads order lines from a CSV or TSV file. The first row must name the
+    columns; 'bib_no' and 'order_no' are required, 'audn', 'lang', 'note', and
+    'shelf' are optional. Tab separated files are recognized by the header.
+
+    Args:
+        path:                   path to the file
+
+    Yields:
+        (normalized bib number, `Order`)
+    """
+    try:
+        fh = open(path, "r", encoding="utf-8-sig", newline="")
+    except FileNotFoundError:
+        raise CallNoConstructorError(f"Order file not found: {path}")
+
+    with fh:
+        header = fh.readline()
+        delimiter = "\t" if "\t" in header else ","
+        columns = [
+            c.strip().lower() for c in next(csv.reader([header], delimiter=delimiter))
+        ]
+        missing = [c for c in REQUIRED_ORDER_COLUMNS if c not in columns]
+        if missing:
+            raise CallNoConstructorError(
+                f"Missing order file columns: {', '.join(missing)}."
+            )
+        positions = [columns.index(c) if c in columns else None for c in ORDER_COLUMNS]
+
+        for n, row in enumerate(csv.reader(fh, delimiter=delimiter), start=2):
+            if not any(row):
+                continue
+            values = []
+            for position in positions:
+                value = None
+                if position is not None and position < len(row):
+                    value = row[position].strip() or None
+                values.append(value)
+            bib_no = normalize_bib_no(values[0])
+            if bib_no is None or values[1] is None:
+                raise CallNoConstructorError(
+                    f"Invalid order line {n}: missing bib or order number."
+                )
+            # audience, language and shelf codes repeat across order lines
+            yield bib_no, Order(
+                values[1],
+                _intern(values[2]),
+                _intern(values[3]),
+                values[4],
+                _intern(values[5]),
+            )
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    if value is None:
+        return None
+    return sys.intern(value)
+
+
+class OrderIndex:
+    """
+    Order lines grouped by bib number. Lines of a bib are returned in the
+    order they were added.
+    """
+
+    def __init__(
+        self,
+        orders: Iterable[Tuple[str, Order]],
+        memory_limit: int = 1000000,
+        tmpdir: Optional[str] = None,
+    ):
+        """
+        Args:
+            orders:                 (normalized bib number, `Order`) pairs,
+                                    e.g. from `read_orders`
+            memory_limit:           maximum number of order lines kept in
+                                    memory; larger indexes are moved to
+                                    a temporary SQLite database
+            tmpdir:                 directory of the temporary database;
+                                    system default if None
+        """
+        self._orders: Dict[str, List[Order]] = {}
+        self._db = None
+        self._path = None
+        self._count = 0
+
+        pending = []
+        for bib_no, order in orders:
+            self._count += 1
+            if self._db is None:
+                self._orders.setdefault(bib_no, []).append(order)
+                if self._count > memory_limit:
+                    self._spill(tmpdir)
+            else:
+                pending.append((bib_no, *order))
+                if len(pending) >= _INSERT_BATCH:
+                    self._insert(pending)
+                    pending = []
+        if self._db is not None:
+            self._insert(pending)
+            self._db.execute("CREATE INDEX orders_bib_no ON orders (bib_no)")
+            self._db.commit()
+
+    @classmethod
+    def from_file(
+        cls, path: str, memory_limit: int = 1000000, tmpdir: Optional[str] = None
+    ) -> "OrderIndex":
+        """
+        Creates index of order lines in a CSV or TSV file, see `read_orders`
+        """
+        return cls(read_orders(path), memory_limit=memory_limit, tmpdir=tmpdir)
+
+    def _spill(self, tmpdir: Optional[str]) -> None:
+        fd, self._path = tempfile.mkstemp(suffix=".sqlite", dir=tmpdir)
+        os.close(fd)
+        # lookups run in the batch reader thread
+        self._db = sqlite3.connect(self._path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode = OFF")
+        self._db.execute("PRAGMA synchronous = OFF")
+        self._db.execute(
+            "CREATE TABLE orders "
+            "(bib_no TEXT, order_no TEXT, audn TEXT, lang TEXT, note TEXT, shelf TEXT)"
+        )
+        self._insert(
+            [
+                (bib_no, *order)
+                for bib_no, orders in self._orders.items()
+                for order in orders
+            ]
+        )
+        self._orders = {}
+
+    def _insert(self, rows: List[tuple]) -> None:
+        self._db.executemany("INSERT INTO orders VALUES (?, ?, ?, ?, ?, ?)", rows)
+
+    @property
+    def spilled(self) -> bool:
+        """
+        True if the index is kept in a database
+        """
+        return self._db is not None
+
+    def __len__(self) -> int:
+        return self._count
+
+    def get(self, bib_no: Optional[str]) -> List[Order]:
+        """
+        Returns order lines of a bib
+
+        Args:
+            bib_no:                 normalized bib number
+
+        Returns:
+            list of `Order` instances
+        """
+        if bib_no is None:
+            return []
+        if self._db is None:
+            return self._orders.get(bib_no, [])
+        rows = self._db.execute(
+            "SELECT order_no, audn, lang, note, shelf FROM orders "
+            "WHERE bib_no = ? ORDER BY rowid",
+            (bib_no,),
+        )
+        return [Order(*row) for row in rows]
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+        if self._path is not None:
+            os.remove(self._path)
+            self._path = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def bib_key(data: bytes, tag: str = "001") -> Optional[str]:
+    """
+    Returns normalized bib number of a raw record used to match its order
+    lines: value of a control field or subfield $a of a data field, e.g.
+    907 $a with Sierra bib number
+
+    Args:
+        data:                   raw MARC21 record
+        tag:                    MARC tag with the bib number
+
+    Returns:
+        normalized bib number
+    """
+    try:
+        if tag < "010":
+            return normalize_bib_no(get_control_field(data, tag))
+        for field_tag, value in iter_fields(data):
+            if field_tag == tag:
+                for subfield in value.split(SUBFIELD_DELIMITER)[1:]:
+                    if subfield[:1] == b"a":
+                        return normalize_bib_no(
+                            subfield[1:].decode("utf-8", errors="replace")
+                        )
+    except ValueError:
+        # malformed records are processed without order data
+        return None
+    return None
+
+
+def join_orders(
+    items: Iterable[tuple], index: OrderIndex, tag: str = "001"
+) -> Iterator[tuple]:
+    """
+    Joins numbered raw records with their order lines. A record with several
+    order lines is repeated for each of them; records without order lines are
+    passed unchanged.
+
+    Args:
+        items:                  (seq, raw record) tuples
+        index:                  `OrderIndex` instance
+        tag:                    MARC tag with the bib number
+
+    Yields:
+        (seq, raw record, `Order`) or (seq, raw record)
+    """
+    for item in items:
+        orders = index.get(bib_key(item[1], tag))
+        if not orders:
+            yield item
+            continue
+        for order in orders:
+            yield (item[0], item[1], order)
@@ -4,33 +4,156 @@
 This module contains methods to parse MARC records in a form of pymarc.Record objects
 """
 
-from typing import List, Optional
+from typing import Dict, List, NamedTuple, Optional, Tuple
 
 from pymarc import Record, Field
 
 
+from bookops_callno.rules_shared import dewey_subject
+from bookops_callno.dewey import get_dewey
 from bookops_callno.errors import CallNoConstructorError
 
+# 008/33 literary form of print materials; codes missing here
+# (unknown, mixed forms, blank, no attempt to code) are inconclusive
+LITERARY_FORM_FICTION = {
+    "0": False,  # not fiction
+    "1": True,  # fiction
+    "c": False,  # comic strips
+    "d": False,  # dramas
+    "e": False,  # essays
+    "f": True,  # novels
+    "h": False,  # humor, satires
+    "i": False,  # letters
+    "j": True,  # short stories
+    "p": False,  # poetry
+    "s": False,  # speeches
+}
+
+# 008/30-31 literary text of nonmusical sound recordings
+LITERARY_TEXT_CODES = "abcdefghijklmoprstz"
+LITERARY_TEXT_FICTION = "f"
+
+
+def _fiction_table():
+    table = {}
+    for rec_type in ("a", "t"):
+        for code, fiction in LITERARY_FORM_FICTION.items():
+            table[(rec_type, code)] = fiction
+    for first in LITERARY_TEXT_CODES + " ":
+        for second in LITERARY_TEXT_CODES + " ":
+            codes = (first + second).strip()
+            if codes:
+                table[("i", first + second)] = LITERARY_TEXT_FICTION in codes
+    return table
+
+
+# (record type, fixed field code) -> fiction
+FICTION_TABLE = _fiction_table()
+
+# 655 genre terms and 650 form subdivisions indicating fiction
+FICTION_GENRES = frozenset(["fiction", "graphic novels", "novels", "short stories"])
+
+
+class FixedFields(NamedTuple):
+    """
+    Codes of the leader and the 008 tag of a record used in call number
+    creation; codes missing in the record or not defined for its material
+    type are None
+    """
+
+    record_type: Optional[str]
+    bib_level: Optional[str]
+    audience: Optional[str]
+    form_of_item: Optional[str]
+    literary_form: Optional[str]
+    literary_text: Optional[str]
+    biography: Optional[str]
+    language: Optional[str]
+
+
+# 008 positions (start, end) of material specific codes, in order of
+# `FixedFields` attributes from audience to biography
+_BOOKS = ((22, 23), (23, 24), (33, 34), None, (34, 35))
+_MUSIC = ((22, 23), (23, 24), None, None, None)
+_SOUND_RECORDINGS = ((22, 23), (23, 24), None, (30, 32), (30, 31))
+_VISUAL_MATERIALS = ((22, 23), (29, 30), None, None, None)
+_COMPUTER_FILES = ((22, 23), (23, 24), None, None, None)
+_NO_POSITIONS = (None, None, None, None, None)
+
+# record type (leader/06) -> 008 positions
+FIXED_FIELD_POSITIONS: Dict[str, Tuple] = {
+    "a": _BOOKS,
+    "t": _BOOKS,
+    "c": _MUSIC,
+    "d": _MUSIC,
+    "j": _MUSIC,
+    "i": _SOUND_RECORDINGS,
+    "g": _VISUAL_MATERIALS,
+    "k": ((22, 23), None, None, None, None),
+    "m": _COMPUTER_FILES,
+}
+LANGUAGE_POSITION = (35, 38)
+# leader/07 bibliographic levels of records with audience code
+AUDIENCE_BIB_LEVELS = ("a", "m")
+
+
+def decode_fixed_fields(bib: Record) -> FixedFields:
+    """
+    Slices codes used in call number creation from the leader and the 008 tag
+    of a record at once, using 008 positions of its material type
 
-def get_audience(bib: Record = None) -> Optional[str]:
+    Args:
+        bib:                    pymarc.Record instance
+
+    Returns:
+        `FixedFields` instance
+    """
+    if not isinstance(bib, Record):
+        raise CallNoConstructorError(
+            "Invalid 'bib' argument used. Must be pymarc.Record instance."
+        )
+
+    leader = bib.leader or ""
+    rec_type = leader[6:7] or None
+    field = bib["008"]
+    data = field.data if field is not None and field.data else ""
+
+    codes = []
+    for position in FIXED_FIELD_POSITIONS.get(rec_type, _NO_POSITIONS):
+        if position is None:
+            codes.append(None)
+        else:
+            codes.append(data[position[0] : position[1]] or None)
+    return FixedFields(
+        rec_type,
+        leader[7:8] or None,
+        *codes,
+        data[LANGUAGE_POSITION[0] : LANGUAGE_POSITION[1]] or None,
+    )
+
+
+def get_audience(bib: Record = None, fixed: FixedFields = None) -> Optional[str]:
     """
     Determines audience based on MARC 008 tag.
     Possible returns: 'early juv', 'juv', 'young adult', 'adult'.
 
     Args:
         bib:                    pymarc.Record instance
+        fixed:                  codes already decoded from the bib
 
     Returns:
         audn_code
     """
     if bib is None:
         return None
+    if fixed is None:
+        fixed = decode_fixed_fields(bib)
 
     # determine has correct bib format
-    if not has_audience_code(bib.leader):
+    if fixed.bib_level not in AUDIENCE_BIB_LEVELS or fixed.audience is None:
         return None
 
-    code = bib["008"].data[22]
+    code = fixed.audience
     if code in ("a", "b"):
         return "early juv"
     elif code in "c":
@@ -99,56 +222,48 @@ def get_field(bib: Record = None, tag: str = None) -> Optional[Field]:
     return bib[tag]
 
 
-def get_form_of_item_code(bib: Record = None) -> Optional[str]:
+def get_form_of_item_code(
+    bib: Record = None, fixed: FixedFields = None
+) -> Optional[str]:
     """
     Parses form of item code in the 008 tag if exists
 
     Args:
         bib:                    pymarc.Record instance
+        fixed:                  codes already decoded from the bib
 
     Returns:
         code
     """
     if bib is None:
         return None
-    elif not isinstance(bib, Record):
-        raise CallNoConstructorError(
-            "Invalid 'bib' argument used. Must be pymarc.Record instance."
-        )
-    rec_type = bib.leader[6]
-    try:
-        # print, sound records, computer files
-        if rec_type in ("a", "c", "d", "i", "j", "m", "t"):
-            return bib["008"].data[23]
-        # visual materials
-        elif rec_type == "g":
-            return bib["008"].data[29]
-        else:
-            return None
-    except (AttributeError, IndexError):
-        return None
+    if fixed is None:
+        fixed = decode_fixed_fields(bib)
+    return fixed.form_of_item
 
 
-def get_language_code(bib: Record = None) -> Optional[str]:
+def get_language_code(bib: Record = None, fixed: FixedFields = None) -> Optional[str]:
     """
     Determines world lanugage code based on pos 35-37 of the 008 tag
 
     Args:
         bib:                pymarc.Record instance
+        fixed:              codes already decoded from the bib
 
     Returns:
         3-letter language code
     """
     if bib is None:
         return None
+    if fixed is None:
+        fixed = decode_fixed_fields(bib)
 
-    try:
-        code = bib["008"].data[35:38].upper()
-        if code not in (None, "", "UND"):
-            return code
-        else:
-            return None
-    except (AttributeError, IndexError):
+    if fixed.language is None:
+        return None
+    code = fixed.language.upper()
+    if code != "UND":
+        return code
+    else:
         return None
 
 
@@ -190,21 +305,24 @@ def get_physical_description(bib: Record = None) -> Optional[str]:
         return None
 
 
-def get_record_type_code(bib: Record = None) -> Optional[str]:
+def get_record_type_code(
+    bib: Record = None, fixed: FixedFields = None
+) -> Optional[str]:
     """
     Parses MARC leader for record type code
 
     Args:
         bib:                pymarc.Record instance
+        fixed:              codes already decoded from the bib
 
     Returns:
         rec_type_code
     """
     if bib is None:
         return None
-
-    rec_type_code = bib.leader[6]
-    return rec_type_code
+    if fixed is None:
+        fixed = decode_fixed_fields(bib)
+    return fixed.record_type
 
 
 def has_audience_code(leader: str = None) -> bool:
@@ -225,14 +343,8 @@ def has_audience_code(leader: str = None) -> bool:
             "Invalid 'leader' type used in argument. Must be a string."
         )
 
-    try:
-        if leader[6] in ("a", "c", "d", "g", "i", "j", "k", "m", "t") and leader[7] in (
-            "a",
-            "m",
-        ):
-            return True
-    except IndexError:
-        return False
+    positions = FIXED_FIELD_POSITIONS.get(leader[6:7], _NO_POSITIONS)
+    return positions[0] is not None and leader[7:8] in AUDIENCE_BIB_LEVELS
 
 
 def has_tag(bib: Record = None, tag: str = None) -> bool:
@@ -254,40 +366,22 @@ def has_tag(bib: Record = None, tag: str = None) -> bool:
     return bool(bib[tag])
 
 
-def is_biography(bib: Record = None) -> bool:
+def is_biography(bib: Record = None, fixed: FixedFields = None) -> bool:
     """
-    Determines if material is autobiography or biography
+    Determines if material is autobiography or biography; coded for print
+    materials (008/34) and nonmusical sound recordings (008/30)
     """
     if bib is None:
         return False
-
-    rec_type = get_record_type_code(bib)
-    if rec_type in (
-        "a",
-        "t",
-    ):  # print material
-        try:
-            code = bib["008"].data[34]
-        except AttributeError:
-            return False
-
-        if code in ("a", "b"):
-            return True
-        else:
-            return False
-    elif rec_type == "i":  # nonmusical sound recording
-        code = bib["008"].data[30]
-        if code in ("a", "b"):
-            return True
-        else:
-            return False
-    else:
-        return False
+    if fixed is None:
+        fixed = decode_fixed_fields(bib)
+    return fixed.biography in ("a", "b")
 
 
 def is_dewey(bib: Record = None) -> bool:
     """
-    Determines if material can be classified using Dewey
+    Determines if material can be classified using Dewey, i.e. the record
+    includes a Dewey class number in the 082 tag
 
     Args:
         bib:                pymarc.Record instance
@@ -295,25 +389,58 @@ def is_dewey(bib: Record = None) -> bool:
     Returns:
         boolean
     """
-    pass
+    return get_dewey(bib) is not None
 
 
 def is_dewey_plus_subject(bib: Record = None) -> bool:
     """
-    Determines if material can be classified using Dewey + subject pattern
+    Determines if material can be classified using Dewey + subject pattern,
+    i.e. its class number falls in a range requiring a subject segment and
+    the segment can be built from a subject of that kind
+
+    Args:
+        bib:                pymarc.Record instance
+
+    Returns:
+        boolean
+    """
+    subject = dewey_subject(get_dewey(bib), get_callno_relevant_subjects(bib))
+    return subject is not None
+
+
+def is_fiction(bib: Record = None, fixed: FixedFields = None) -> bool:
+    """
+    Determines if material is fiction. Literary form in the 008 tag decides
+    if coded; genre terms (655) and form subdivisions (650 $v) are checked
+    only when it is not.
 
     Args:
         bib:                pymarc.Record instance
+        fixed:              codes already decoded from the bib
 
     Returns:
         boolean
     """
-    pass
+    if bib is None:
+        return False
+    if fixed is None:
+        fixed = decode_fixed_fields(bib)
+
+    if fixed.record_type == "i":
+        code = fixed.literary_text
+    else:
+        code = fixed.literary_form
+
+    fiction = FICTION_TABLE.get((fixed.record_type, code))
+    if fiction is None:
+        return is_fiction_genre(bib)
+    return fiction
 
 
-def is_fiction(bib: Record = None) -> bool:
+def is_fiction_genre(bib: Record = None) -> bool:
     """
-    Determines if material is fiction
+    Determines if record has fiction genre terms in 655 or form subdivisions
+    in 650 tags, e.g. 'Detective and mystery fiction', 'Juvenile fiction'
 
     Args:
         bib:                pymarc.Record instance
@@ -321,7 +448,20 @@ def is_fiction(bib: Record = None) -> bool:
     Returns:
         boolean
     """
-    pass
+    if bib is None:
+        return False
+
+    terms = []
+    for field in bib.get_fields("655"):
+        terms.extend(field.get_subfields("a"))
+    for field in bib.get_fields("650"):
+        terms.extend(field.get_subfields("v"))
+
+    for term in terms:
+        term = term.strip(" .").lower()
+        if term in FICTION_GENRES or term.endswith(" fiction"):
+            return True
+    return False
 
 
 def is_lc_subject(field: Field = None) -> bool:
@@ -0,0 +1,307 @@
+# -*- coding: utf-8 -*-
+
+"""
+This module provides a three stage pipeline used by batch runs:
+
+    reader thread  ->  input queue  ->  workers  ->  output queue  ->  writer thread
+
+The reader splits input into raw records, workers (processes of a pool, or
+the main thread with a single worker) construct call numbers, and the writer
+consumes results (writes output, updates totals, saves checkpoints). Queues
+are bounded and the number of records handed to the pool and not yet
+collected is limited, so memory use does not depend on how fast input can be
+read or output written: a slow stage blocks the ones upstream.
+"""
+
+import threading
+import time
+from multiprocessing import Pool
+from queue import Empty, Full, Queue
+from typing import Callable, Dict, Iterable, Iterator, Optional
+
+from bookops_callno.errors import CallNoConstructorError
+
+_END = object()
+# how often blocked stages check whether the pipeline was stopped
+_POLL = 0.1
+
+
+class _Failure:
+    def __init__(self, exc: BaseException):
+        self.exc = exc
+
+
+class PipelineMetrics:
+    """
+    Queue depths and time each stage spent blocked
+
+    Wait times (seconds):
+        reader_blocked          reader waited for space in the input queue
+        workers_starved         workers waited for input
+        workers_throttled       dispatch waited for records in flight
+                                to be collected
+        collector_blocked       collected results waited for space in the
+                                output queue
+        writer_starved          writer waited for results
+    """
+
+    wait_names = (
+        "reader_blocked",
+        "workers_starved",
+        "workers_throttled",
+        "collector_blocked",
+        "writer_starved",
+    )
+
+    def __init__(self):
+        self.waits: Dict[str, float] = {name: 0.0 for name in self.wait_names}
+        self.max_depths = {"input": 0, "output": 0}
+        self.capacities = {"input": 0, "output": 0, "in_flight": 0}
+        self._queues: Dict[str, Queue] = {}
+        self._chunksizes: Dict[str, int] = {}
+
+    def attach(self, name: str, queue: Queue, chunksize: int = 1) -> None:
+        self._queues[name] = queue
+        self._chunksizes[name] = chunksize
+        self.capacities[name] = queue.maxsize * chunksize
+
+    def update_depth(self, name: str) -> None:
+        size = self._queues[name].qsize() * self._chunksizes[name]
+        if size > self.max_depths[name]:
+            self.max_depths[name] = size
+
+    def depths(self) -> Dict[str, int]:
+        """
+        Returns current number of records in each queue (upper bound)
+        """
+        return {
+            name: q.qsize() * self._chunksizes[name] for name, q in self._queues.items()
+        }
+
+    def as_dict(self) -> Dict:
+        """
+        Returns serializable representation of the metrics
+        """
+        return {
+            "queues": {
+                name: {
+                    "depth": self.depths().get(name, 0),
+                    "max_depth": self.max_depths[name],
+                    "capacity": self.capacities[name],
+                }
+                for name in ("input", "output")
+            },
+            "in_flight_capacity": self.capacities["in_flight"],
+            "wait_seconds": {k: round(v, 6) for k, v in self.waits.items()},
+        }
+
+    def summary(self) -> str:
+        """
+        Returns human readable summary of the metrics
+        """
+        lines = ["pipeline:"]
+        for name in ("input", "output"):
+            lines.append(
+                f"  {name} queue max depth: {self.max_depths[name]:,} "
+                f"of {self.capacities[name]:,}"
+            )
+        for name in self.wait_names:
+            lines.append(f"  {name:<18} {self.waits[name]:.2f}s")
+        return "\n".join(lines)
+
+
+class Pipeline:
+    """
+    Bounded reader/worker/writer pipeline
+    """
+
+    def __init__(
+        self,
+        workers: int = 1,
+        queue_size: int = 1024,
+        chunksize: int = 64,
+        metrics: Optional[PipelineMetrics] = None,
+    ):
+        """
+        Args:
+            workers:                number of worker processes; with 1 records
+                                    are processed in the calling thread
+            queue_size:             capacity of the input and output queues
+                                    in records
+            chunksize:              records passed between stages and sent
+                                    to a worker process at once
+            metrics:                `PipelineMetrics` to update
+        """
+        if workers < 1:
+            raise CallNoConstructorError(
+                "Invalid 'workers' argument used. Must be a positive integer."
+            )
+        if queue_size < 1 or chunksize < 1:
+            raise CallNoConstructorError(
+                "Invalid 'queue_size' or 'chunksize' argument used. "
+                "Must be a positive integer."
+            )
+        self.workers = workers
+        self.queue_size = queue_size
+        self.chunksize = chunksize
+        self.metrics = metrics if metrics is not None else PipelineMetrics()
+        # records handed to the pool and not collected yet
+        self.in_flight = max(queue_size, 2 * workers * chunksize)
+
+    def run(
+        self,
+        items: Iterable,
+        worker: Callable,
+        consume: Callable,
+        merge: Optional[Callable[[Iterable], Iterable]] = None,
+    ) -> None:
+        """
+        Processes items
+
+        Args:
+            items:                  input; iterated in the reader thread
+            worker:                 function applied to each item; must be
+                                    picklable when using worker processes
+            consume:                function called with each result in
+                                    input order in the writer thread
+            merge:                  function transforming the stream of
+                                    results before it is consumed, e.g.
+                                    `Deduplicator.merge`
+        """
+        metrics = self.metrics
+        waits = metrics.waits
+        stop = threading.Event()
+        # records travel between threads in chunks to reduce locking
+        chunksize = min(self.chunksize, self.queue_size)
+        capacity = self.queue_size // chunksize
+        input_queue: Queue = Queue(capacity)
+        output_queue: Queue = Queue(capacity)
+        metrics.attach("input", input_queue, chunksize)
+        metrics.attach("output", output_queue, chunksize)
+        metrics.capacities["in_flight"] = self.in_flight
+        slots = threading.BoundedSemaphore(self.in_flight)
+        errors = []
+
+        def _put(queue: Queue, item, wait: str, depth: str) -> bool:
+            start = time.perf_counter()
+            while True:
+                try:
+                    queue.put(item, timeout=_POLL)
+                    break
+                except Full:
+                    if stop.is_set():
+                        return False
+            waits[wait] += time.perf_counter() - start
+            metrics.update_depth(depth)
+            return True
+
+        def _get(queue: Queue, wait: str):
+            start = time.perf_counter()
+            while True:
+                try:
+                    item = queue.get(timeout=_POLL)
+                    break
+                except Empty:
+                    if stop.is_set():
+                        return _END
+            waits[wait] += time.perf_counter() - start
+            return item
+
+        def _read() -> None:
+            chunk = []
+            try:
+                for item in items:
+                    chunk.append(item)
+                    if len(chunk) >= chunksize:
+                        if not _put(input_queue, chunk, "reader_blocked", "input"):
+                            return
+                        chunk = []
+            except BaseException as exc:
+                chunk.append(_Failure(exc))
+            if chunk and not _put(input_queue, chunk, "reader_blocked", "input"):
+                return
+            _put(input_queue, _END, "reader_blocked", "input")
+
+        def _write() -> None:
+            while True:
+                chunk = _get(output_queue, "writer_starved")
+                if chunk is _END:
+                    return
+                if errors:
+                    # keep draining, so the collector is never blocked
+                    continue
+                try:
+                    for result in chunk:
+                        consume(result)
+                except BaseException as exc:
+                    errors.append(exc)
+                    stop.set()
+
+        def _source() -> Iterator:
+            throttle = self.workers > 1
+            while not stop.is_set():
+                chunk = _get(input_queue, "workers_starved")
+                if chunk is _END:
+                    return
+                for item in chunk:
+                    if isinstance(item, _Failure):
+                        raise item.exc
+                    if throttle:
+                        start = time.perf_counter()
+                        while not slots.acquire(timeout=_POLL):
+                            if stop.is_set():
+                                return
+                        waits["workers_throttled"] += time.perf_counter() - start
+                    yield item
+
+        def _collect(results: Iterable) -> Iterator:
+            for result in results:
+                slots.release()
+                yield result
+
+        def _drain(results: Iterable) -> None:
+            if merge is not None:
+                results = merge(results)
+            chunk = []
+            for result in results:
+                chunk.append(result)
+                if len(chunk) >= chunksize:
+                    if errors or not _put(
+                        output_queue, chunk, "collector_blocked", "output"
+                    ):
+                        raise errors[0]
+                    chunk = []
+            if chunk and not _put(output_queue, chunk, "collector_blocked", "output"):
+                raise errors[0]
+
+        reader = threading.Thread(target=_read, name="callno-reader", daemon=True)
+        writer = threading.Thread(target=_write, name="callno-writer", daemon=True)
+        reader.start()
+        writer.start()
+        try:
+            if self.workers == 1:
+                _drain(map(worker, _source()))
+            else:
+                with Pool(self.workers) as pool:
+                    try:
+                        _drain(
+                            _collect(
+                                pool.imap(worker, _source(), chunksize=self.chunksize)
+                            )
+                        )
+                    except BaseException:
+                        # unblock pool's feeding thread before pool terminates
+                        stop.set()
+                        raise
+        except BaseException:
+            stop.set()
+            raise
+        finally:
+            if not stop.is_set():
+                output_queue.put(_END)
+            writer.join()
+            stop.set()
+            reader.join()
+
+        if errors:
+            raise errors[0]
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+
+"""
+This module provides low level access to MARC21 records in transmission format
+without parsing them into pymarc.Record objects
+"""
+
+from typing import Iterator, List, Optional, Tuple
+
+LEADER_LEN = 24
+DIRECTORY_ENTRY_LEN = 12
+FIELD_TERMINATOR = b"\x1e"
+RECORD_TERMINATOR = b"\x1d"
+SUBFIELD_DELIMITER = b"\x1f"
+
+
+def iter_fields(data: bytes) -> Iterator[Tuple[str, bytes]]:
+    """
+    Reads the directory of a raw record and yields its fields
+
+    Args:
+        data:                   raw MARC21 record
+
+    Yields:
+        (tag, field data without field terminator)
+
+    Raises:
+        ValueError: malformed leader or directory
+    """
+    base = int(data[12:17])
+    directory = data[LEADER_LEN : base - 1]
+    if len(directory) % DIRECTORY_ENTRY_LEN:
+        raise ValueError("Invalid directory length.")
+    for n in range(0, len(directory), DIRECTORY_ENTRY_LEN):
+        entry = directory[n : n + DIRECTORY_ENTRY_LEN]
+        length = int(entry[3:7])
+        start = base + int(entry[7:12])
+        yield entry[:3].decode("ascii"), data[start : start + length].rstrip(
+            FIELD_TERMINATOR
+        )
+
+
+def get_control_field(data: bytes, tag: str) -> Optional[str]:
+    """
+    Returns value of the first control field (00X) with given tag
+
+    Args:
+        data:                   raw MARC21 record
+        tag:                    MARC tag
+
+    Returns:
+        value
+    """
+    for field_tag, value in iter_fields(data):
+        if field_tag == tag:
+            return value.decode("utf-8", errors="replace")
+    return None
+
+
+def encode_field(indicators: List[str], subfields: List[str]) -> bytes:
+    """
+    Encodes data field in transmission format
+
+    Args:
+        indicators:             list of two indicators
+        subfields:              list of alternating subfield codes and values
+
+    Returns:
+        field data without field terminator
+    """
+    chunks = ["".join(indicators)]
+    for n in range(0, len(subfields), 2):
+        chunks.append(f"\x1f{subfields[n]}{subfields[n + 1]}")
+    return "".join(chunks).encode("utf-8")
+
+
+def splice_field(
+    data: bytes, tag: str, indicators: List[str], subfields: List[str]
+) -> bytes:
+    """
+    Replaces all fields with given tag in a raw record with a new field placed
+    in tag order
+
+    Args:
+        data:                   raw MARC21 record
+        tag:                    MARC tag of the new field
+        indicators:             list of two indicators
+        subfields:              list of alternating subfield codes and values
+
+    Returns:
+        raw MARC21 record
+    """
+    fields = [(t, v) for t, v in iter_fields(data) if t != tag]
+    position = len(fields)
+    for n, (field_tag, _) in enumerate(fields):
+        if field_tag > tag:
+            position = n
+            break
+    fields.insert(position, (tag, encode_field(indicators, subfields)))
+
+    directory = []
+    body = []
+    offset = 0
+    for field_tag, value in fields:
+        value += FIELD_TERMINATOR
+        directory.append(f"{field_tag}{len(value):04d}{offset:05d}".encode("ascii"))
+        body.append(value)
+        offset += len(value)
+
+    base = LEADER_LEN + len(directory) * DIRECTORY_ENTRY_LEN + 1
+    length = base + offset + 1
+    leader = b"%05d" % length + data[5:12] + b"%05d" % base + data[17:LEADER_LEN]
+    return (
+        leader
+        + b"".join(directory)
+        + FIELD_TERMINATOR
+        + b"".join(body)
+        + RECORD_TERMINATOR
+    )
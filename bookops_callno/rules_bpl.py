@@ -1,53 +1,188 @@
 # -*- coding: utf-8 -*-
 
-from typing import List, Optional
+import os
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
 from pymarc import Field
 
+from bookops_callno.errors import CallNoConstructorError
 from bookops_callno.parser import is_libretto
 
+# MARC leader position 6 codes and 008 form of item codes
+RECORD_TYPE_CODES = "acdefgijkmoprt"
+FORM_OF_ITEM_CODES = (None, " ", "a", "b", "c", "d", "f", "o", "q", "r", "s", "|")
 
-def callno_format_prefix(
-    record_type_code: str = None, form_of_item: str = None, subjects: List[Field] = []
-) -> Optional[str]:
-    """
-    Args:
-        record_type_code:               MARC leader position 6
-        form_of_item:                   MARC tag 008 form of item
 
-    Returns:
-        format_prefix
+def _format_prefixes(
+    record_type_code: Optional[str], form_of_item: Optional[str]
+) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Returns format prefixes of a material: (not libretto, libretto)
     """
     # language materials
     if record_type_code in ("a", "t"):
         if form_of_item in ("o", "s"):
-            return "eBOOK"
+            return ("eBOOK", "eBOOK")
         elif form_of_item in ("a", "b"):
-            return "NM"
-        elif is_libretto(subjects):
-            return "LIB"
+            return ("NM", "NM")
         else:
-            return None
+            return (None, "LIB")
     elif record_type_code in ("c", "d"):
-        return "Mu"
+        return ("Mu", "Mu")
 
     # nonmusical sound recordings
     elif record_type_code == "i":
         if form_of_item in ("o", "s"):
-            return "eAUDIO"
+            return ("eAUDIO", "eAUDIO")
         else:
-            return "AUDIO"
+            return ("AUDIO", "AUDIO")
     elif record_type_code == "j":
         if form_of_item in ("o", "s"):
-            return "eMUSIC"
+            return ("eMUSIC", "eMUSIC")
         else:
-            return "CD"
+            return ("CD", "CD")
 
     # visual materials
     elif record_type_code == "g":
         if form_of_item in ("o", "s"):
-            return "eVIDEO"
+            return ("eVIDEO", "eVIDEO")
         else:
-            return "DVD"
+            return ("DVD", "DVD")
 
     else:
-        return None
+        return (None, None)
+
+
+def _format_prefix_table() -> Dict[Tuple, Tuple[Optional[str], Optional[str]]]:
+    """
+    Precomputes format prefixes for all combinations of record type and
+    form of item
+    """
+    return {
+        (rec_type, form): _format_prefixes(rec_type, form)
+        for rec_type in RECORD_TYPE_CODES
+        for form in FORM_OF_ITEM_CODES
+    }
+
+
+# format prefixes by (record type, form of item): (not libretto, libretto)
+FORMAT_PREFIX_TABLE = _format_prefix_table()
+
+
+def callno_format_prefix(
+    record_type_code: str = None, form_of_item: str = None, subjects: List[Field] = []
+) -> Optional[str]:
+    """
+    Determines call number format prefix. Subjects are checked for librettos
+    only when the prefix depends on it.
+
+    Args:
+        record_type_code:               MARC leader position 6
+        form_of_item:                   MARC tag 008 form of item
+        subjects:                       call number relevant subjects
+
+    Returns:
+        format_prefix
+    """
+    prefixes = FORMAT_PREFIX_TABLE.get((record_type_code, form_of_item))
+    if prefixes is None:
+        prefixes = _format_prefixes(record_type_code, form_of_item)
+    if prefixes[0] != prefixes[1] and is_libretto(subjects):
+        return prefixes[1]
+    return prefixes[0]
+
+
+BPL_ORDER_RULES = os.path.join(os.path.dirname(__file__), "data", "bpl_order_rules.tsv")
+ORDER_RULE_FIELDS = ("audn", "shelf")
+AUDIENCES = ("early juv", "juv", "young adult", "adult")
+
+
+class OrderRule(NamedTuple):
+    """
+    Call number elements overridden by order data
+    """
+
+    audience: Optional[str] = None
+    mat_format: Optional[str] = None
+
+
+NO_ORDER_RULE = OrderRule()
+
+
+def read_order_rules(path: str) -> Dict[Tuple[str, str], OrderRule]:
+    """
+    Reads tab separated file of order rules; blank lines and lines starting
+    with '#' are skipped
+
+    Args:
+        path:                   path to the file
+
+    Returns:
+        dictionary of rules by (field, code)
+    """
+    rules = {}
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            for n, line in enumerate(fh, start=1):
+                if not line.strip() or line.startswith("#"):
+                    continue
+                columns = [c.strip() for c in line.rstrip("\r\n").split("\t")]
+                columns += [""] * (4 - len(columns))
+                field, code, audience, mat_format = columns[:4]
+                if (
+                    field not in ORDER_RULE_FIELDS
+                    or not code
+                    or (audience and audience not in AUDIENCES)
+                ):
+                    raise CallNoConstructorError(
+                        f"Invalid order rule at line {n}: '{line.strip()}'."
+                    )
+                key = (field, code.lower())
+                if key in rules:
+                    raise CallNoConstructorError(
+                        f"Duplicate order rule at line {n}: '{field}' '{code}'."
+                    )
+                rules[key] = OrderRule(audience or None, mat_format or None)
+    except FileNotFoundError:
+        raise CallNoConstructorError(f"Order rules file not found: {path}")
+    return rules
+
+
+@lru_cache(maxsize=8)
+def load_order_rules(path: str = BPL_ORDER_RULES) -> Dict[Tuple[str, str], OrderRule]:
+    """
+    Loads order rules once per process
+
+    Args:
+        path:                   path to the file; package data by default
+
+    Returns:
+        dictionary of rules by (field, code)
+    """
+    return read_order_rules(path)
+
+
+@lru_cache(maxsize=1024)
+def order_rule(order_shelf: str = None, order_audn: str = None) -> OrderRule:
+    """
+    Returns call number elements overridden by order shelf code and order
+    audience; shelf code rules take precedence
+
+    Args:
+        order_shelf:            order shelf code
+        order_audn:             order audience code
+
+    Returns:
+        `OrderRule` instance
+    """
+    rules = load_order_rules()
+    shelf = NO_ORDER_RULE
+    audn = NO_ORDER_RULE
+    if order_shelf:
+        shelf = rules.get(("shelf", order_shelf.strip().lower()), NO_ORDER_RULE)
+    if order_audn:
+        audn = rules.get(("audn", order_audn.strip().lower()), NO_ORDER_RULE)
+    return OrderRule(
+        shelf.audience or audn.audience, shelf.mat_format or audn.mat_format
+    )
@@ -1,18 +1,76 @@
 # -*- coding: utf-8 -*-
 
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 
 from pymarc import Field
 
 
+from bookops_callno.dewey import SUBJECT_SEGMENT_TAGS, dewey_subject_segment
 from bookops_callno.normalizer import (
     corporate_name_first_word,
     corporate_name_initial,
     personal_name_surname,
     personal_name_initial,
+    subject_corporate_name,
+    subject_personal_name,
+    subject_topic,
     title_initial,
 )
 
+# call number pattern of electronic resources by record type
+E_RESOURCE_PATTERNS = {"a": "ebook", "t": "ebook", "i": "eaudio", "g": "evideo"}
+# subject segment of the Dewey + subject pattern by subject tag
+SUBJECT_SEGMENT_BUILDERS = {
+    "600": subject_personal_name,
+    "610": subject_corporate_name,
+    "650": subject_topic,
+}
+
+
+def _content_patterns(
+    rec_type: str, electronic: bool, early_juv: bool, fiction: bool, biography: bool
+) -> Tuple[str, ...]:
+    # patterns applicable to a material in order of preference
+    if electronic:
+        pattern = E_RESOURCE_PATTERNS.get(rec_type)
+        return (pattern,) if pattern else ()
+    if rec_type in ("a", "t"):
+        if early_juv:
+            return ("pic",)
+        elif fiction:
+            return ("fic",)
+        patterns = ("des",)
+    elif rec_type == "i":
+        if fiction:
+            return ("fic",)
+        patterns = ("des",)
+    elif rec_type == "g":
+        patterns = ("des",)
+    else:
+        return ()
+    if biography:
+        patterns += ("bio",)
+    return patterns + ("dew",)
+
+
+def _content_table() -> Dict[Tuple, Tuple[str, ...]]:
+    table = {}
+    flags = (False, True)
+    for rec_type in ("a", "g", "i", "t"):
+        for electronic in flags:
+            for early_juv in flags:
+                for fiction in flags:
+                    for biography in flags:
+                        key = (rec_type, electronic, early_juv, fiction, biography)
+                        table[key] = _content_patterns(*key)
+    return table
+
+
+# (record type, electronic, early juvenile, fiction, biography) -> call number
+# patterns in order of preference; 'des' and 'dew' further require a Dewey
+# class number (and a subject for 'des')
+CONTENT_TABLE = _content_table()
+
 
 def biographee(subjects: List[Field]) -> Optional[str]:
     """
@@ -30,6 +88,28 @@ def biographee(subjects: List[Field]) -> Optional[str]:
             return biographee
 
 
+def dewey_subject(class_number: Optional[str], subjects: List[Field]) -> Optional[str]:
+    """
+    Constructs subject segment of the Dewey + subject pattern from the first
+    subject of the kind required by the class number.
+
+    Args:
+        class_number:                   Dewey class number
+        subjects:                       list of pymarc.Field instances
+
+    Returns:
+        subject
+    """
+    segment = dewey_subject_segment(class_number)
+    if segment is None:
+        return None
+    tags = SUBJECT_SEGMENT_TAGS[segment]
+    for field in subjects:
+        if field.tag in tags:
+            return SUBJECT_SEGMENT_BUILDERS[field.tag](field)
+    return None
+
+
 def callno_cutter_fic(field: Field = None) -> Optional[str]:
     """
     Constructs cutter subfield for fiction call number patterns.
@@ -0,0 +1,322 @@
+# -*- coding: utf-8 -*-
+
+"""
+This module provides a local HTTP service that keeps call number constructors
+and normalizer caches warm between requests.
+
+Endpoints:
+    GET  /health            service status and normalizer cache statistics
+    GET  /metrics           package metrics in Prometheus text format
+    POST /callno            call number for a single record
+    POST /batch             call numbers for multiple records
+
+Records are accepted as binary MARC21 (`Content-Type: application/marc`) or
+MARC-in-JSON (`Content-Type: application/json`). The library system and
+call pattern can be selected with `system` and `type` query parameters.
+"""
+
+import json
+from io import BytesIO
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from pymarc import Field, Record
+
+from bookops_callno import __version__
+from bookops_callno.batch import SYSTEMS, iter_marc_chunks, process_bib
+from bookops_callno.errors import CallNoConstructorError
+from bookops_callno.metrics import (
+    CONTENT_TYPE,
+    REGISTRY,
+    pause_metrics,
+    record_result,
+)
+from bookops_callno.normalizer import _normalize_value
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8787
+MAX_BODY_SIZE = 64 * 1024 * 1024
+MARC_CONTENT_TYPES = ("application/marc", "application/octet-stream")
+JSON_CONTENT_TYPES = ("application/json",)
+
+
+def record_from_json(obj: Dict) -> Record:
+    """
+    Creates pymarc.Record from a MARC-in-JSON object
+
+    Args:
+        obj:                    MARC-in-JSON record as dictionary
+
+    Returns:
+        pymarc.Record instance
+    """
+    if not isinstance(obj, dict) or "fields" not in obj:
+        raise CallNoConstructorError("Invalid MARC-in-JSON record.")
+
+    try:
+        return _record_from_json(obj)
+    except (AttributeError, TypeError, ValueError) as exc:
+        raise CallNoConstructorError(f"Invalid MARC-in-JSON record. Error: '{exc}'.")
+
+
+def _record_from_json(obj: Dict) -> Record:
+    bib = Record()
+    if "leader" in obj:
+        if not isinstance(obj["leader"], str):
+            raise TypeError("leader must be a string")
+        bib.leader = obj["leader"]
+    if not isinstance(obj["fields"], list):
+        raise TypeError("fields must be a list")
+    for entry in obj["fields"]:
+        if not isinstance(entry, dict):
+            raise TypeError("field must be an object")
+        for tag, value in entry.items():
+            if isinstance(value, dict):
+                bib.add_field(_data_field(tag, value))
+            elif isinstance(value, str):
+                bib.add_field(Field(tag=tag, data=value))
+            else:
+                raise TypeError(f"value of field {tag} must be a string or an object")
+    return bib
+
+
+def _data_field(tag: str, value: Dict) -> Field:
+    indicators = [value.get("ind1", " "), value.get("ind2", " ")]
+    if not all(isinstance(i, str) for i in indicators):
+        raise TypeError(f"indicators of field {tag} must be strings")
+    subs = value.get("subfields", [])
+    if not isinstance(subs, list):
+        raise TypeError(f"subfields of field {tag} must be a list")
+    subfields = []
+    for sub in subs:
+        if not isinstance(sub, dict):
+            raise TypeError(f"subfield of field {tag} must be an object")
+        for code, sub_value in sub.items():
+            if not isinstance(sub_value, str):
+                raise TypeError(f"subfield {code} of field {tag} must be a string")
+            subfields.extend([code, sub_value])
+    return Field(tag=tag, indicators=indicators, subfields=subfields)
+
+
+def parse_records(body: bytes, content_type: str) -> List[Record]:
+    """
+    Parses request body into a list of records
+
+    Args:
+        body:                   request body
+        content_type:           media type of the body
+
+    Returns:
+        list of pymarc.Record instances
+    """
+    if content_type in MARC_CONTENT_TYPES:
+        records = []
+        for data in iter_marc_chunks(BytesIO(body)):
+            try:
+                records.append(Record(data=data))
+            except Exception as exc:
+                raise CallNoConstructorError(f"Invalid MARC record. Error: '{exc}'.")
+        return records
+    elif content_type in JSON_CONTENT_TYPES:
+        try:
+            obj = json.loads(body)
+        except ValueError as exc:
+            raise CallNoConstructorError(f"Invalid JSON. Error: '{exc}'.")
+        if isinstance(obj, dict):
+            obj = [obj]
+        elif not isinstance(obj, list):
+            raise CallNoConstructorError(
+                "Invalid MARC-in-JSON body. Must be a record or a list of records."
+            )
+        return [record_from_json(o) for o in obj]
+    else:
+        raise CallNoConstructorError(
+            f"Unsupported content type '{content_type}'. Use one of: "
+            f"{', '.join(MARC_CONTENT_TYPES + JSON_CONTENT_TYPES)}."
+        )
+
+
+class CallNoRequestHandler(BaseHTTPRequestHandler):
+    """
+    Handles call number requests. HTTP/1.1 is used so clients can reuse
+    connections for multiple requests.
+    """
+
+    protocol_version = "HTTP/1.1"
+    server_version = f"bookops-callno/{__version__}"
+
+    def do_GET(self) -> None:
+        if urlsplit(self.path).path == "/health":
+            cache = _normalize_value.cache_info()
+            self._send_json(
+                200,
+                {
+                    "status": "ok",
+                    "version": __version__,
+                    "normalizer_cache": {
+                        "hits": cache.hits,
+                        "misses": cache.misses,
+                        "size": cache.currsize,
+                    },
+                },
+            )
+        elif urlsplit(self.path).path == "/metrics":
+            body = REGISTRY.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        else:
+            self._send_json(404, {"error": "Not found."})
+
+    def do_POST(self) -> None:
+        url = urlsplit(self.path)
+        if url.path not in ("/callno", "/batch"):
+            self._send_json(404, {"error": "Not found."})
+            return
+
+        body = self._read_body()
+        if body is None:
+            return
+
+        try:
+            system, call_type = self._get_options(url.query)
+            content_type = self.headers.get("Content-Type", "").split(";")[0].strip()
+            records = parse_records(body, content_type)
+        except CallNoConstructorError as exc:
+            self._send_json(400, {"error": str(exc)})
+            return
+
+        if url.path == "/callno":
+            if len(records) != 1:
+                self._send_json(400, {"error": "Exactly one record expected."})
+                return
+            self._send_json(200, self._process(0, records[0], system, call_type))
+        else:
+            results = [
+                self._process(seq, bib, system, call_type)
+                for seq, bib in enumerate(records)
+            ]
+            self._send_json(200, {"results": results})
+
+    def _get_options(self, query: str) -> Tuple[str, str]:
+        params = parse_qs(query)
+        system = params.get("system", [self.server.system])[0]
+        call_type = params.get("type", [self.server.requested_call_type])[0]
+        if system not in SYSTEMS:
+            raise CallNoConstructorError(
+                "Invalid 'system' parameter used. Must be 'bpl' or 'nypl'."
+            )
+        return system, call_type
+
+    def _process(self, seq: int, bib: Record, system: str, call_type: str) -> Dict:
+        result = process_bib(seq, bib, system, call_type)
+        record_result(result.pattern, result.error, result.elapsed)
+        return result.as_dict()
+
+    def _read_body(self) -> Optional[bytes]:
+        length = self.headers.get("Content-Length")
+        if length is None:
+            self._send_json(411, {"error": "Content-Length header required."})
+            return None
+        try:
+            length = int(length)
+        except ValueError:
+            self._send_json(400, {"error": "Invalid Content-Length header."})
+            return None
+        if length > MAX_BODY_SIZE:
+            self.close_connection = True
+            self._send_json(413, {"error": "Request body too large."})
+            return None
+        return self.rfile.read(length)
+
+    def _send_json(self, status: int, payload: Dict) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+
+class CallNoServer(ThreadingHTTPServer):
+    """
+    Local HTTP server of call numbers
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        host: str = DEFAULT_HOST,
+        port: int = DEFAULT_PORT,
+        system: str = "bpl",
+        requested_call_type: str = "auto",
+        quiet: bool = False,
+    ):
+        """
+        Args:
+            host:                   interface to listen on; defaults to loopback
+            port:                   port to listen on (0 picks a free port)
+            system:                 default library system
+            requested_call_type:    default call pattern
+            quiet:                  suppress request logging
+        """
+        if system not in SYSTEMS:
+            raise CallNoConstructorError(
+                "Invalid 'system' argument used. Must be 'bpl' or 'nypl'."
+            )
+        self.system = system
+        self.requested_call_type = requested_call_type
+        self.quiet = quiet
+        super().__init__((host, port), CallNoRequestHandler)
+        self.warm_up()
+
+    def warm_up(self) -> None:
+        """
+        Runs sample records through constructors of both systems, so the first
+        request does not pay for lazy initialization; warm-up is not counted
+        in metrics
+        """
+        bib = Record()
+        bib.leader = "00000cam  2200000 a 4500"
+        bib.add_field(Field(tag="008", data="210101s2021    nyu    j      000 1 eng d"))
+        bib.add_field(
+            Field(tag="100", indicators=["1", " "], subfields=["a", "Ádams, John,"])
+        )
+        bib.add_field(Field(tag="245", indicators=["1", "0"], subfields=["a", "Foo"]))
+        bib.add_field(Field(tag="300", indicators=[" ", " "], subfields=["a", "32 p."]))
+        with pause_metrics():
+            for system in SYSTEMS:
+                for call_type in ("auto", "fic", "pic", "bio"):
+                    process_bib(0, bib, system, call_type)
+
+
+def serve(
+    host: str = DEFAULT_HOST,
+    port: int = DEFAULT_PORT,
+    system: str = "bpl",
+    requested_call_type: str = "auto",
+    quiet: bool = False,
+) -> None:
+    """
+    Starts the service and handles requests until interrupted
+
+    Args:
+        host:                   interface to listen on; defaults to loopback
+        port:                   port to listen on
+        system:                 default library system
+        requested_call_type:    default call pattern
+        quiet:                  suppress request logging
+    """
+    with CallNoServer(host, port, system, requested_call_type, quiet) as server:
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+
+"""
+This module provides splitting of a large MARC file into shards processed
+independently (e.g. on separate machines) and merging of their outputs.
+
+Shard boundaries are found by probing for the record terminator (0x1D)
+near evenly spaced offsets, so records are never parsed and each node reads
+only its own byte range. Every node computes the same boundaries from the
+file size alone.
+"""
+
+import csv
+import json
+import os
+import shutil
+from typing import Dict, List, Tuple
+
+from bookops_callno.batch import OUTPUT_FORMATS, BatchStats
+from bookops_callno.errors import CallNoConstructorError
+from bookops_callno.rawmarc import RECORD_TERMINATOR
+
+PROBE_SIZE = 65536
+
+
+def parse_shard_spec(spec: str) -> Tuple[int, int]:
+    """
+    Parses shard specification
+
+    Args:
+        spec:                   shard number and number of shards, e.g. "2/8";
+                                shards are numbered from 1
+
+    Returns:
+        (shard, shards)
+    """
+    try:
+        shard, shards = (int(n) for n in spec.split("/"))
+    except (AttributeError, ValueError):
+        shard = shards = 0
+    if shards < 1 or not 1 <= shard <= shards:
+        raise CallNoConstructorError(
+            f"Invalid shard specification: '{spec}'. Must be 'K/N' where 1 <= K <= N."
+        )
+    return shard, shards
+
+
+def find_boundary(path: str, offset: int) -> int:
+    """
+    Finds the first record boundary at or after given offset
+
+    Args:
+        path:                   path to MARC21 file
+        offset:                 position in the file
+
+    Returns:
+        offset of the start of a record or file size
+    """
+    size = os.path.getsize(path)
+    if offset <= 0:
+        return 0
+    if offset >= size:
+        return size
+
+    # a record ending right before the offset makes the offset a boundary
+    pos = offset - 1
+    with open(path, "rb") as fh:
+        fh.seek(pos)
+        while True:
+            data = fh.read(PROBE_SIZE)
+            if not data:
+                return size
+            n = data.find(RECORD_TERMINATOR)
+            if n >= 0:
+                return pos + n + 1
+            pos += len(data)
+
+
+def shard_range(path: str, shard: int, shards: int) -> Tuple[int, int]:
+    """
+    Determines byte range of a shard of a MARC file. Ranges of all shards are
+    contiguous and cover the whole file; a shard may be empty if records are
+    larger than shards.
+
+    Args:
+        path:                   path to MARC21 file
+        shard:                  shard number (1-based)
+        shards:                 number of shards
+
+    Returns:
+        (start, end) offsets
+    """
+    size = os.path.getsize(path)
+    start = find_boundary(path, size * (shard - 1) // shards)
+    end = find_boundary(path, size * shard // shards)
+    return start, end
+
+
+def shard_stats(
+    stats: BatchStats, shard: int, shards: int, byte_range: Tuple[int, int]
+) -> Dict:
+    """
+    Returns serializable totals of a shard
+
+    Args:
+        stats:                  `BatchStats` of the shard run
+        shard:                  shard number (1-based)
+        shards:                 number of shards
+        byte_range:             (start, end) offsets of the shard
+
+    Returns:
+        dictionary
+    """
+    data = {"shard": shard, "shards": shards, "range": list(byte_range)}
+    data.update(stats.as_dict())
+    return data
+
+
+def merge_stats(paths: List[str]) -> BatchStats:
+    """
+    Combines totals of shard runs saved as JSON. If totals include shard
+    information all shards must be present and their ranges contiguous.
+
+    Args:
+        paths:                  paths to JSON files with shard totals
+
+    Returns:
+        `BatchStats` instance
+    """
+    parts = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as fh:
+            parts.append(json.load(fh))
+
+    if any("shard" in p for p in parts):
+        parts.sort(key=lambda p: p.get("shard", 0))
+        shards = parts[0].get("shards")
+        numbers = [p.get("shard") for p in parts]
+        if numbers != list(range(1, (shards or 0) + 1)) or any(
+            p.get("shards") != shards for p in parts
+        ):
+            raise CallNoConstructorError(
+                f"Incomplete set of shards: {numbers} of {shards}."
+            )
+        for prev, part in zip(parts, parts[1:]):
+            if prev["range"][1] != part["range"][0]:
+                raise CallNoConstructorError(
+                    f"Byte ranges of shards {prev['shard']} and {part['shard']} "
+                    "are not contiguous."
+                )
+
+    total = BatchStats()
+    for part in parts:
+        total.merge(BatchStats.from_dict(part))
+    return total
+
+
+def merge_outputs(parts: List[str], output: str, output_format: str = "csv") -> int:
+    """
+    Concatenates outputs of shard runs in given order. Record numbers ('seq')
+    of CSV and JSON lines reports are renumbered to positions in the whole
+    file; rows of a record repeated for several order lines keep sharing
+    their number.
+
+    Args:
+        parts:                  paths to shard outputs in shard order
+        output:                 path to the merged file
+        output_format:          'marc', 'csv', or 'jsonl'
+
+    Returns:
+        number of merged records (0 for 'marc')
+    """
+    if output_format not in OUTPUT_FORMATS:
+        raise CallNoConstructorError(
+            "Invalid 'output_format' argument used. "
+            f"Must be one of: {', '.join(OUTPUT_FORMATS)}."
+        )
+
+    if output_format == "marc":
+        with open(output, "wb") as dst:
+            for part in parts:
+                with open(part, "rb") as src:
+                    shutil.copyfileobj(src, dst)
+        return 0
+
+    count = 0
+    with open(output, "w", encoding="utf-8", newline="") as dst:
+        writer = csv.writer(dst) if output_format == "csv" else None
+        header = None
+        for part in parts:
+            with open(part, "r", encoding="utf-8", newline="") as src:
+                if writer is not None:
+                    reader = csv.reader(src)
+                    part_header = next(reader, None)
+                    if part_header is None:
+                        continue
+                    if header is None:
+                        header = part_header
+                        seq_column = header.index("seq")
+                        writer.writerow(header)
+                    elif part_header != header:
+                        raise CallNoConstructorError(
+                            f"Columns of '{part}' do not match previous parts."
+                        )
+                    last_seq = None
+                    for row in reader:
+                        if row[seq_column] != last_seq:
+                            last_seq = row[seq_column]
+                            count += 1
+                        row[seq_column] = str(count - 1)
+                        writer.writerow(row)
+                else:
+                    last_seq = None
+                    for line in src:
+                        if not line.strip():
+                            continue
+                        row = json.loads(line)
+                        if row["seq"] != last_seq:
+                            last_seq = row["seq"]
+                            count += 1
+                        row["seq"] = count - 1
+                        dst.write(json.dumps(row, ensure_ascii=False) + "\n")
+    return count
@@ -0,0 +1,276 @@
+# -*- coding: utf-8 -*-
+
+"""
+This module provides a compact index of existing call numbers (shelflist) used
+to detect collisions of newly constructed call numbers.
+
+The index is a single binary file:
+    header                  magic and section positions
+    bloom filter            bit array used to reject absent call numbers
+    offsets                 uint64 positions of call numbers in the blob
+    blob                    sorted, unique, normalized call numbers (UTF-8)
+
+The file can be memory-mapped, so multiple processes share a single copy
+of the index in the OS page cache.
+"""
+
+import mmap
+import struct
+from bisect import bisect_right
+from hashlib import blake2b
+from math import ceil, log
+from typing import Iterable, List, NamedTuple, Union
+
+from bookops_callno.errors import CallNoConstructorError
+
+MAGIC = b"BCSHELF1"
+HEADER = struct.Struct("<8sQQQQQQ")
+BLOOM_HASHES = struct.Struct("<8I")
+# every FENCE_STEP-th call number is kept in memory to narrow binary search
+FENCE_STEP = 32
+
+
+def normalize_callno(value: str) -> str:
+    """
+    Normalizes call number string for comparison. Accepts plain call numbers
+    ("FIC ADAMS") and MARC subfield notation ("$aFIC$aADAMS").
+
+    Args:
+        value:                  call number
+
+    Returns:
+        normalized call number
+    """
+    if "$" in value:
+        value = " ".join(p[1:] for p in value.split("$")[1:])
+    return " ".join(value.upper().split())
+
+
+class ShelflistMatch(NamedTuple):
+    """
+    Outcome of checking a call number against the shelflist
+    """
+
+    callno: str
+    exact: bool
+    before: List[str]
+    after: List[str]
+
+
+class _BloomFilter:
+    def __init__(self, bits: Union[bytearray, memoryview], size: int, hashes: int):
+        self.bits = bits
+        self.size = size
+        self.hashes = hashes
+
+    @staticmethod
+    def params(count: int, error_rate: float = 0.01):
+        count = max(count, 1)
+        size = ceil(-count * log(error_rate) / log(2) ** 2)
+        size = (size + 7) // 8 * 8
+        hashes = min(max(1, round(size / count * log(2))), 8)
+        return size, hashes
+
+    def _positions(self, key: bytes):
+        # one 256-bit digest provides up to 8 independent 32-bit hashes
+        hashes = BLOOM_HASHES.unpack(blake2b(key, digest_size=32).digest())
+        size = self.size
+        return [h % size for h in hashes[: self.hashes]]
+
+    def add(self, key: bytes) -> None:
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key: bytes) -> bool:
+        bits = self.bits
+        for pos in self._positions(key):
+            if not bits[pos >> 3] & (1 << (pos & 7)):
+                return False
+        return True
+
+
+class ShelflistIndex:
+    """
+    Sorted, read-only index of existing call numbers
+    """
+
+    def __init__(self, path: str, use_mmap: bool = True):
+        """
+        Args:
+            path:                   path to the index file created with
+                                    `ShelflistIndex.build`
+            use_mmap:               memory-map the file instead of reading it
+        """
+        self._fh = open(path, "rb")
+        if use_mmap:
+            self._data = mmap.mmap(self._fh.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self._data = self._fh.read()
+
+        try:
+            (
+                magic,
+                count,
+                bloom_size,
+                bloom_hashes,
+                bloom_pos,
+                offsets_pos,
+                blob_pos,
+            ) = HEADER.unpack_from(self._data, 0)
+        except struct.error:
+            magic = None
+        if magic != MAGIC:
+            self.close()
+            raise CallNoConstructorError(f"Invalid shelflist index file: {path}")
+
+        view = memoryview(self._data)
+        self._count = count
+        self._bloom = _BloomFilter(
+            view[bloom_pos : bloom_pos + bloom_size // 8], bloom_size, bloom_hashes
+        )
+        self._offsets = view[offsets_pos : offsets_pos + (count + 1) * 8].cast("Q")
+        self._blob_pos = blob_pos
+        self._fences = [self._key(n) for n in range(0, count, FENCE_STEP)]
+
+    @classmethod
+    def build(
+        cls, values: Iterable[str], path: str, error_rate: float = 0.01
+    ) -> "ShelflistIndex":
+        """
+        Creates index file from call numbers and opens it
+
+        Args:
+            values:                 call numbers; duplicates are removed
+            path:                   path of the index file to create
+            error_rate:             false positive rate of the bloom filter
+
+        Returns:
+            `ShelflistIndex` instance
+        """
+        keys = sorted(
+            {normalize_callno(v).encode("utf-8") for v in values if v and v.strip()}
+        )
+        bloom_size, bloom_hashes = _BloomFilter.params(len(keys), error_rate)
+        bloom = _BloomFilter(bytearray(bloom_size // 8), bloom_size, bloom_hashes)
+        for key in keys:
+            bloom.add(key)
+
+        offsets = [0]
+        for key in keys:
+            offsets.append(offsets[-1] + len(key))
+
+        bloom_pos = HEADER.size
+        offsets_pos = _align(bloom_pos + len(bloom.bits))
+        blob_pos = offsets_pos + len(offsets) * 8
+        with open(path, "wb") as fh:
+            fh.write(
+                HEADER.pack(
+                    MAGIC,
+                    len(keys),
+                    bloom_size,
+                    bloom_hashes,
+                    bloom_pos,
+                    offsets_pos,
+                    blob_pos,
+                )
+            )
+            fh.write(bloom.bits)
+            fh.write(b"\x00" * (offsets_pos - bloom_pos - len(bloom.bits)))
+            fh.write(struct.pack(f"<{len(offsets)}Q", *offsets))
+            for key in keys:
+                fh.write(key)
+        return cls(path)
+
+    @classmethod
+    def from_text(
+        cls, dump: str, path: str, error_rate: float = 0.01
+    ) -> "ShelflistIndex":
+        """
+        Creates index file from a plain text dump with one call number per line
+
+        Args:
+            dump:                   path to the text file
+            path:                   path of the index file to create
+            error_rate:             false positive rate of the bloom filter
+
+        Returns:
+            `ShelflistIndex` instance
+        """
+        with open(dump, "r", encoding="utf-8") as fh:
+            return cls.build((line.rstrip("\n") for line in fh), path, error_rate)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, n: int) -> str:
+        return self._key(n).decode("utf-8")
+
+    def __contains__(self, callno) -> bool:
+        key = normalize_callno(str(callno)).encode("utf-8")
+        if key not in self._bloom:
+            return False
+        n = self._bisect(key)
+        return n < self._count and self._key(n) == key
+
+    def _key(self, n: int) -> bytes:
+        start = self._blob_pos + self._offsets[n]
+        end = self._blob_pos + self._offsets[n + 1]
+        return self._data[start:end]
+
+    def _bisect(self, key: bytes) -> int:
+        block = max(bisect_right(self._fences, key) - 1, 0)
+        lo = block * FENCE_STEP
+        hi = min(lo + FENCE_STEP, self._count)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def check(self, callno, neighbors: int = 2) -> ShelflistMatch:
+        """
+        Checks call number against the shelflist
+
+        Args:
+            callno:                 call number as string or `CallNo` instance
+            neighbors:              number of nearest existing call numbers
+                                    to report on each side
+
+        Returns:
+            `ShelflistMatch` instance
+        """
+        value = normalize_callno(str(callno))
+        key = value.encode("utf-8")
+        n = self._bisect(key)
+        exact = n < self._count and self._key(n) == key
+        after_start = n + 1 if exact else n
+        before = [self[i] for i in range(max(n - neighbors, 0), n)]
+        after = [
+            self[i]
+            for i in range(after_start, min(after_start + neighbors, self._count))
+        ]
+        return ShelflistMatch(value, exact, before, after)
+
+    def close(self) -> None:
+        if isinstance(self._data, mmap.mmap):
+            # views must be released before the map can be closed
+            for attr in ("_offsets", "_bloom"):
+                obj = getattr(self, attr, None)
+                if isinstance(obj, _BloomFilter):
+                    obj.bits.release()
+                elif obj is not None:
+                    obj.release()
+            self._data.close()
+        self._fh.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def _align(pos: int, size: int = 8) -> int:
+    return (pos + size - 1) // size * size
@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+
+"""
+This module provides shelf order sort keys of call numbers and sorting of
+call number lists larger than available memory.
+
+Call numbers are filed word by word ("nothing before something"): each
+element is compared separately, numbers are compared by value (Dewey class
+numbers as decimal fractions after the integer part) and sort before words.
+Sort keys are bytes, so they can be compared without decoding, stored in
+files, or used by external tools.
+"""
+
+import heapq
+import os
+import re
+import struct
+import tempfile
+from typing import BinaryIO, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+from bookops_callno.errors import CallNoConstructorError
+
+TOKEN_SEPARATOR = b"\x00"
+NUMBER_MARK = b"\x01"
+WORD_MARK = b"\x02"
+
+_TOKEN_SPLIT = re.compile(r"[\s\-]+")
+_NUMBER = re.compile(r"(\d+)(?:\.(\d*))?$")
+_LENGTH = struct.Struct(">I")
+
+
+def callno_sort_key(callno: str) -> bytes:
+    """
+    Creates shelf order sort key of a call number
+
+    Args:
+        callno:                 call number, e.g. "J 741.23 T", "J-E ADAMS"
+
+    Returns:
+        sort key
+    """
+    if not isinstance(callno, str):
+        raise CallNoConstructorError(
+            "Invalid 'callno' argument used. Must be a string."
+        )
+
+    chunks = []
+    for token in _TOKEN_SPLIT.split(callno.strip().upper()):
+        if not token:
+            continue
+        match = _NUMBER.match(token)
+        if match:
+            integer = match.group(1).lstrip("0") or "0"
+            fraction = (match.group(2) or "").rstrip("0")
+            # length of the integer part first, so 92 sorts before 811
+            chunks.append(
+                NUMBER_MARK
+                + bytes([len(integer)])
+                + integer.encode("ascii")
+                + b"."
+                + fraction.encode("ascii")
+            )
+        else:
+            chunks.append(WORD_MARK + token.encode("utf-8"))
+        chunks.append(TOKEN_SEPARATOR)
+    return b"".join(chunks)
+
+
+def _write_run(items: Iterable[Tuple[bytes, bytes]], directory: str) -> str:
+    fd, path = tempfile.mkstemp(suffix=".run", dir=directory)
+    with os.fdopen(fd, "wb") as fh:
+        for key, line in items:
+            fh.write(_LENGTH.pack(len(key)))
+            fh.write(key)
+            fh.write(_LENGTH.pack(len(line)))
+            fh.write(line)
+    return path
+
+
+def _read_run(fh: BinaryIO) -> Iterator[Tuple[bytes, bytes]]:
+    while True:
+        head = fh.read(4)
+        if not head:
+            return
+        key = fh.read(_LENGTH.unpack(head)[0])
+        line = fh.read(_LENGTH.unpack(fh.read(4))[0])
+        yield key, line
+
+
+def _merge_runs(paths: List[str], directory: str) -> str:
+    handles = [open(p, "rb") for p in paths]
+    try:
+        path = _write_run(heapq.merge(*[_read_run(h) for h in handles]), directory)
+    finally:
+        for h in handles:
+            h.close()
+        for p in paths:
+            os.remove(p)
+    return path
+
+
+def external_sort(
+    lines: Iterable[str],
+    output: TextIO,
+    field: Optional[int] = None,
+    delimiter: str = "\t",
+    chunk_size: int = 100000,
+    fan_in: int = 64,
+    tmpdir: str = None,
+) -> int:
+    """
+    Sorts lines with call numbers in shelf order. At most `chunk_size` lines
+    are held in memory; sorted runs are spilled to temporary files and merged.
+
+    Args:
+        lines:                  lines to sort
+        output:                 text stream sorted lines are written to
+        field:                  position of the call number in delimited
+                                lines; whole line is the call number if None
+        delimiter:              field delimiter
+        chunk_size:             number of lines sorted in memory at once
+        fan_in:                 maximum number of runs merged at once
+        tmpdir:                 directory for temporary files
+
+    Returns:
+        number of sorted lines
+    """
+    if chunk_size < 1 or fan_in < 2:
+        raise CallNoConstructorError("Invalid 'chunk_size' or 'fan_in' argument used.")
+
+    count = 0
+    with tempfile.TemporaryDirectory(dir=tmpdir) as directory:
+        runs: List[str] = []
+        buffer: List[Tuple[bytes, bytes]] = []
+        for line in lines:
+            line = line.rstrip("\r\n")
+            if not line:
+                continue
+            if field is None:
+                callno = line
+            else:
+                try:
+                    callno = line.split(delimiter)[field]
+                except IndexError:
+                    callno = ""
+            buffer.append((callno_sort_key(callno), line.encode("utf-8")))
+            count += 1
+            if len(buffer) >= chunk_size:
+                buffer.sort()
+                runs.append(_write_run(buffer, directory))
+                buffer = []
+
+        if not runs:
+            # fits in memory
+            buffer.sort()
+            for _, line in buffer:
+                output.write(line.decode("utf-8") + "\n")
+            return count
+
+        if buffer:
+            buffer.sort()
+            runs.append(_write_run(buffer, directory))
+            buffer = []
+
+        while len(runs) > fan_in:
+            runs = [
+                _merge_runs(runs[n : n + fan_in], directory)
+                for n in range(0, len(runs), fan_in)
+            ]
+
+        handles = [open(p, "rb") for p in runs]
+        try:
+            for _, line in heapq.merge(*[_read_run(h) for h in handles]):
+                output.write(line.decode("utf-8") + "\n")
+        finally:
+            for h in handles:
+                h.close()
+    return count
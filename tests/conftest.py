@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+
+from pymarc import Record, Field
+import pytest
+
+
+def _make_bib(
+    control_no: str = "ocm00000001",
+    leader: str = "00000cam  2200000 a 4500",
+    data_008: str = "210101s2021    nyu           000 1 eng d",
+    author: str = "Adams, John,",
+    title: str = "Foo /",
+    pages: str = "320 pages ;",
+    subjects: list = [],
+) -> Record:
+    bib = Record()
+    bib.leader = leader
+    if control_no:
+        bib.add_field(Field(tag="001", data=control_no))
+    bib.add_field(Field(tag="008", data=data_008))
+    if author:
+        bib.add_field(Field(tag="100", indicators=["1", " "], subfields=["a", author]))
+    bib.add_field(Field(tag="245", indicators=["1", "0"], subfields=["a", title]))
+    bib.add_field(Field(tag="300", indicators=[" ", " "], subfields=["a", pages]))
+    for subject in subjects:
+        bib.add_field(subject)
+    return bib
+
+
+@pytest.fixture
+def make_bib():
+    return _make_bib
+
+
+@pytest.fixture
+def marc_file(tmp_path):
+    def _marc_file(bibs: list, name: str = "bibs.mrc") -> str:
+        path = tmp_path / name
+        with open(path, "wb") as fh:
+            for bib in bibs:
+                fh.write(bib.as_marc())
+        return str(path)
+
+    return _marc_file
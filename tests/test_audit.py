@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+
+import csv
+import json
+
+from pymarc import Field
+import pytest
+
+from bookops_callno.audit import (
+    AuditResult,
+    AuditStats,
+    AuditWriter,
+    audit_record,
+    compare_elements,
+    run_audit,
+)
+from bookops_callno.callno_parser import parse_bpl_callno
+from bookops_callno.errors import CallNoConstructorError
+
+
+def _with_callno(bib, *elements):
+    subfields = []
+    for e in elements:
+        subfields.extend(["a", e])
+    bib.add_ordered_field(Field(tag="099", indicators=[" ", " "], subfields=subfields))
+    return bib
+
+
+def test_compare_elements_default_language():
+    existing = parse_bpl_callno("FIC ADAMS")
+    expected = parse_bpl_callno("ENG FIC ADAMS")
+    assert compare_elements(existing, expected) == ()
+    assert compare_elements(expected, existing) == ()
+
+
+def test_compare_elements():
+    existing = parse_bpl_callno("SPA J FIC ADAMS")
+    expected = parse_bpl_callno("ENG FIC ADAMS")
+    assert compare_elements(existing, expected) == ("language", "audience")
+
+
+def test_audit_record_match(make_bib):
+    bib = _with_callno(make_bib(), "ENG", "FIC", "ADAMS")
+    result = audit_record(0, bib.as_marc())
+    assert result.status == "match"
+    assert result.pattern == "fic"
+    assert result.existing == result.expected == "ENG FIC ADAMS"
+    assert result.differences == ()
+
+
+def test_audit_record_match_default_language(make_bib):
+    bib = _with_callno(make_bib(), "FIC", "ADAMS")
+    result = audit_record(0, bib.as_marc())
+    assert result.status == "match"
+    assert result.existing == "FIC ADAMS"
+    assert result.expected == "ENG FIC ADAMS"
+    assert result.differences == ()
+
+
+def test_audit_record_mismatch(make_bib):
+    bib = _with_callno(make_bib(), "FIC", "SMITH")
+    result = audit_record(3, bib.as_marc())
+    assert result.seq == 3
+    assert result.control_no == "ocm00000001"
+    assert result.status == "mismatch"
+    assert result.existing == "FIC SMITH"
+    assert result.expected == "ENG FIC ADAMS"
+    assert result.differences == ("cutter",)
+
+
+def test_audit_record_requested_call_type(make_bib):
+    bib = _with_callno(make_bib(), "ENG", "FIC", "ADAMS")
+    result = audit_record(0, bib.as_marc(), requested_call_type="pic")
+    assert result.status == "mismatch"
+    assert result.expected == "ENG J-E ADAMS"
+    assert result.differences == ("pattern", "audience", "classification")
+
+
+def test_audit_record_missing(make_bib):
+    result = audit_record(0, make_bib().as_marc(), requested_call_type="fic")
+    assert result.status == "missing"
+    assert result.existing is None
+    assert result.expected == "ENG FIC ADAMS"
+
+
+def test_audit_record_unable_to_construct(make_bib):
+    bib = _with_callno(make_bib(), "B", "ADAMS", "J")
+    result = audit_record(0, bib.as_marc())
+    assert result.status == "error"
+    assert result.pattern == "bio"
+    assert result.existing == "B ADAMS J"
+    assert result.error == "Unable to construct call number."
+
+
+def test_audit_record_invalid_marc():
+    result = audit_record(0, b"foo\x1d")
+    assert result.status == "error"
+    assert result.error.startswith("Invalid MARC record.")
+
+
+def test_audit_stats():
+    stats = AuditStats()
+    stats.update(AuditResult(0, None, "match", "fic"))
+    stats.update(AuditResult(1, None, "mismatch", "fic", differences=("cutter",)))
+    stats.update(AuditResult(2, None, "missing", "auto"))
+    assert stats.as_dict() == {
+        "processed": 3,
+        "statuses": {"match": 1, "mismatch": 1, "missing": 1, "error": 0},
+        "patterns": {"fic": {"match": 1, "mismatch": 1}, "auto": {"missing": 1}},
+        "elements": {"cutter": 1},
+    }
+    assert "cutter          1" in stats.summary()
+
+
+def test_audit_writer_invalid_format(tmp_path):
+    with pytest.raises(CallNoConstructorError):
+        AuditWriter(str(tmp_path / "out.mrc"), "marc")
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_run_audit(make_bib, marc_file, tmp_path, workers):
+    bibs = [
+        _with_callno(make_bib(control_no="1"), "ENG", "FIC", "ADAMS"),
+        _with_callno(make_bib(control_no="2"), "FIC", "SMITH"),
+        make_bib(control_no="3"),
+    ]
+    src = marc_file(bibs)
+    out = str(tmp_path / "report.csv")
+    stats = run_audit([src], out, workers=workers)
+    assert stats.processed == 3
+    assert stats.statuses["match"] == 1
+    assert stats.statuses["mismatch"] == 1
+    with open(out) as fh:
+        rows = list(csv.DictReader(fh))
+    assert [r["control_no"] for r in rows] == ["2", "3"]
+    assert rows[0]["differences"] == "cutter"
+
+
+def test_run_audit_report_matches(make_bib, marc_file, tmp_path):
+    src = marc_file([_with_callno(make_bib(), "ENG", "FIC", "ADAMS")])
+    out = str(tmp_path / "report.jsonl")
+    run_audit([src], out, output_format="jsonl", report_matches=True)
+    with open(out) as fh:
+        row = json.loads(fh.readline())
+    assert row["status"] == "match"
+    assert row["existing"] == "ENG FIC ADAMS"
+
+
+def test_run_audit_invalid_workers(tmp_path):
+    with pytest.raises(CallNoConstructorError):
+        run_audit([], str(tmp_path / "out.csv"), workers=0)
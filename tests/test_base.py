@@ -4,15 +4,17 @@ from pymarc import Record, Field
 import pytest
 
 
-from bookops_callno.base import CallNo
+from bookops_callno.base import CallNo, Features
 from bookops_callno.errors import CallNoConstructorError
 
 
 def test_CallNo_none_bib():
     cn = CallNo(bib=None)
     assert cn.audience_info is None
+    assert cn.content_candidates == []
     assert cn.content_info is None
     assert cn.cutter_info is None
+    assert cn.dewey_info is None
     assert cn.language_code is None
     assert cn.physical_desc_info is None
     assert cn.record_type_info is None
@@ -29,6 +31,38 @@ def test_CallNo_exception_invalid_requested_call_type():
     assert msg in str(exc)
 
 
+def test_CallNo_exception_invalid_features():
+    msg = "Invalid 'features' argument used. Must be Features instance."
+    with pytest.raises(CallNoConstructorError) as exc:
+        CallNo(features={"audience_info": "juv"})
+    assert msg in str(exc)
+
+
+def test_CallNo_features(make_bib):
+    cn = CallNo(bib=make_bib())
+    assert cn.features.audience_info == "adult"
+    assert cn.features.content_candidates == ("fic",)
+    assert cn.features.subject_info == ()
+    assert cn.features.language_code == "ENG"
+
+
+def test_CallNo_features_immutable(make_bib):
+    cn = CallNo(bib=make_bib())
+    cn.content_candidates.append("dew")
+    assert cn.features.content_candidates == ("fic",)
+
+
+def test_CallNo_features_reused():
+    features = Features(
+        "juv", ("fic",), "fic", None, "813.54", " ", "SPA", None, "a", ()
+    )
+    cn = CallNo(bib=Record(), features=features)
+    assert cn.audience_info == "juv"
+    assert cn.dewey_info == "813.54"
+    assert cn.language_code == "SPA"
+    assert cn.features == features
+
+
 @pytest.mark.parametrize(
     "arg,expectation",
     [("a", "early juv"), ("j", "juv"), ("d", "young adult"), (" ", "adult")],
@@ -41,6 +75,76 @@ def test_CallNo_get_audience_info(arg, expectation):
     assert cn._get_audience_info(bib=bib) == expectation
 
 
+@pytest.mark.parametrize(
+    "data_008,fields,candidates,content",
+    [
+        ("210101s2021    nyu           000 1 eng d", [], ["fic"], "fic"),
+        ("210101s2021    nyu    a      000 1 eng d", [], ["pic"], "pic"),
+        ("210101s2021    nyu     o     000 1 eng d", [], ["ebook"], "ebook"),
+        ("210101s2021    nyu           000 0 eng d", [], [], "und"),
+        (
+            "210101s2021    nyu           000 0beng d",
+            [Field(tag="082", indicators=["0", "4"], subfields=["a", "920"])],
+            ["bio", "dew"],
+            "bio",
+        ),
+        (
+            "210101s2021    nyu           000 0 eng d",
+            [
+                Field(tag="082", indicators=["0", "4"], subfields=["a", "813/.54"]),
+                Field(
+                    tag="600",
+                    indicators=["1", "0"],
+                    subfields=["a", "Poe, Edgar Allan,"],
+                ),
+            ],
+            ["des", "dew"],
+            "des",
+        ),
+        (
+            "210101s2021    nyu           000 0 eng d",
+            [Field(tag="082", indicators=["0", "4"], subfields=["a", "813/.54"])],
+            ["dew"],
+            "dew",
+        ),
+        (
+            "210101s2021    nyu           000 0 eng d",
+            [
+                Field(tag="082", indicators=["0", "4"], subfields=["a", "005.13/3"]),
+                Field(
+                    tag="650",
+                    indicators=[" ", "0"],
+                    subfields=["a", "(Computer program language)"],
+                ),
+            ],
+            ["dew"],
+            "dew",
+        ),
+    ],
+)
+def test_CallNo_content_info(make_bib, data_008, fields, candidates, content):
+    bib = make_bib(data_008=data_008)
+    for field in fields:
+        bib.add_field(field)
+    cn = CallNo(bib=bib)
+    assert cn.content_candidates == candidates
+    assert cn.content_info == content
+
+
+def test_CallNo_content_info_unsupported_record_type(make_bib):
+    bib = make_bib(leader="00000cmm  2200000 a 4500")
+    cn = CallNo(bib=bib)
+    assert cn.content_candidates == []
+    assert cn.content_info == "und"
+
+
+def test_CallNo_get_dewey_info():
+    cn = CallNo()
+    bib = Record()
+    bib.add_field(Field(tag="082", indicators=["0", "4"], subfields=["a", "641.5/973"]))
+    assert cn._get_dewey_info(bib) == "641.5973"
+
+
 def test_CallNo_get_form_of_item_info():
     cn = CallNo()
     bib = Record()
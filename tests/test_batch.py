@@ -0,0 +1,464 @@
+# -*- coding: utf-8 -*-
+
+import csv
+import io
+import json
+
+from pymarc import MARCReader
+import pytest
+
+from bookops_callno.batch import (
+    BatchResult,
+    BatchStats,
+    BatchWriter,
+    ProgressReporter,
+    create_callno,
+    create_callnos,
+    create_candidates,
+    iter_marc_chunks,
+    process_record,
+    process_record_systems,
+    run_batch,
+)
+from bookops_callno.constructor_bpl import BplCallNo
+from bookops_callno.constructor_nypl import NyplCallNo
+from bookops_callno.errors import CallNoConstructorError
+from bookops_callno.orders import Order
+from bookops_callno.shelflist import ShelflistIndex
+from bookops_callno.sorting import callno_sort_key
+
+
+def test_iter_marc_chunks(make_bib):
+    data = make_bib(control_no="1").as_marc() + make_bib(control_no="2").as_marc()
+    chunks = list(iter_marc_chunks(io.BytesIO(data), buffer_size=7))
+    assert len(chunks) == 2
+    assert b"".join(chunks) == data
+    assert all(c.endswith(b"\x1d") for c in chunks)
+
+
+def test_iter_marc_chunks_truncated_record(make_bib):
+    data = make_bib().as_marc()
+    chunks = list(iter_marc_chunks(io.BytesIO(data + data[:20] + b"\n")))
+    assert len(chunks) == 2
+    assert chunks[1] == data[:20] + b"\n"
+
+
+def test_iter_marc_chunks_trailing_whitespace(make_bib):
+    data = make_bib().as_marc()
+    assert list(iter_marc_chunks(io.BytesIO(data + b"\r\n"))) == [data]
+
+
+@pytest.mark.parametrize(
+    "system,expectation", [("bpl", BplCallNo), ("nypl", NyplCallNo)]
+)
+def test_create_callno(system, expectation):
+    assert isinstance(create_callno(None, system), expectation)
+
+
+def test_create_callnos(make_bib):
+    callnos = create_callnos(make_bib())
+    assert isinstance(callnos["bpl"], BplCallNo)
+    assert isinstance(callnos["nypl"], NyplCallNo)
+    assert str(callnos["bpl"]) == "ENG FIC ADAMS"
+    assert str(callnos["nypl"]) == "ENG FIC ADAMS"
+    assert callnos["nypl"].features == callnos["bpl"].features
+
+
+def test_create_callnos_single_system(make_bib):
+    assert list(create_callnos(make_bib(), systems=("nypl",))) == ["nypl"]
+
+
+def test_create_callnos_invalid_system(make_bib):
+    msg = "Invalid 'system' argument used. Must be 'bpl' or 'nypl'."
+    with pytest.raises(CallNoConstructorError) as exc:
+        create_callnos(make_bib(), systems=("bpl", "qpl"))
+    assert msg in str(exc)
+
+
+def test_process_record_systems(make_bib):
+    data = make_bib().as_marc()
+    bpl, nypl = process_record_systems(3, data, splice=True)
+    assert (bpl.system, nypl.system) == ("bpl", "nypl")
+    assert bpl.callno == "ENG FIC ADAMS"
+    assert nypl.callno == "ENG FIC ADAMS"
+    assert bpl.seq == nypl.seq == 3
+    assert bpl.marc is None
+    bib = next(MARCReader(nypl.marc))
+    assert str(bib["099"]) == "=099  \\\\$aENG$aFIC$aADAMS"
+    assert str(bib["091"]) == "=091  \\\\$pENG$aFIC$cADAMS"
+
+
+def test_process_record_systems_malformed():
+    results = process_record_systems(0, b"foo", splice=True)
+    assert [r.system for r in results] == ["bpl", "nypl"]
+    assert all(r.error.startswith("Invalid MARC record.") for r in results)
+    assert results[-1].marc == b"foo"
+
+
+def test_create_candidates(make_bib):
+    candidates = create_candidates(make_bib(), "bpl")
+    assert candidates.auto == "fic"
+    assert str(candidates.callnos["fic"]) == "=099  \\\\$aENG$aFIC$aADAMS"
+
+
+def test_create_callno_invalid_system():
+    msg = "Invalid 'system' argument used. Must be 'bpl' or 'nypl'."
+    with pytest.raises(CallNoConstructorError) as exc:
+        create_callno(None, "qpl")
+    assert msg in str(exc)
+
+
+def test_process_record(make_bib):
+    result = process_record(3, make_bib().as_marc(), requested_call_type="fic")
+    assert result.seq == 3
+    assert result.control_no == "ocm00000001"
+    assert result.pattern == "fic"
+    assert result.callno == "ENG FIC ADAMS"
+    assert result.error is None
+    assert result.marc is None
+
+
+def test_process_record_splice(make_bib):
+    result = process_record(
+        0, make_bib().as_marc(), requested_call_type="fic", splice=True
+    )
+    bib = next(MARCReader(result.marc))
+    assert str(bib["099"]) == "=099  \\\\$aENG$aFIC$aADAMS"
+
+
+def test_process_record_invalid_marc():
+    result = process_record(0, b"foo\x1d", requested_call_type="fic", splice=True)
+    assert result.callno is None
+    assert result.error.startswith("Invalid MARC record.")
+    assert result.marc == b"foo\x1d"
+
+
+def test_process_record_construction_exception(make_bib, monkeypatch):
+    def _raise(*args, **kwargs):
+        raise AttributeError("foo")
+
+    monkeypatch.setattr("bookops_callno.batch.BplCallNo", _raise)
+    result = process_record(0, make_bib().as_marc(), requested_call_type="fic")
+    assert result.callno is None
+    assert result.error.startswith("AttributeError")
+
+
+def test_process_record_missing_008(make_bib):
+    bib = make_bib()
+    bib.remove_fields("008")
+    result = process_record(0, bib.as_marc(), requested_call_type="fic")
+    assert result.callno == "FIC ADAMS"
+    assert result.error is None
+
+
+def test_process_record_no_callno(make_bib):
+    result = process_record(0, make_bib().as_marc(), requested_call_type="bio")
+    assert result.callno is None
+    assert result.error == "Unable to construct call number."
+
+
+def test_BatchStats():
+    stats = BatchStats()
+    stats.update(BatchResult(0, None, "fic", "FIC ADAMS"))
+    stats.update(BatchResult(1, None, "fic", None))
+    stats.update(BatchResult(2, None, "pic", "J-E ADAMS"))
+    assert stats.as_dict() == {
+        "processed": 3,
+        "created": 2,
+        "failed": 1,
+        "duplicates": 0,
+        "collisions": 0,
+        "patterns": {
+            "fic": {"created": 1, "failed": 1},
+            "pic": {"created": 1, "failed": 0},
+        },
+    }
+    assert "fic        created: 1, failed: 1" in stats.summary()
+
+
+def test_ProgressReporter():
+    stream = io.StringIO()
+    reporter = ProgressReporter(total_bytes=100, stream=stream, interval=0)
+    reporter.update(25)
+    reporter.finish()
+    output = stream.getvalue()
+    assert "1 records" in output
+    assert "rec/s" in output
+    assert "ETA" in output
+
+
+def test_BatchWriter_invalid_format(tmp_path):
+    with pytest.raises(CallNoConstructorError):
+        BatchWriter(str(tmp_path / "out"), "xml")
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_run_batch_csv(make_bib, marc_file, tmp_path, workers):
+    src = marc_file([make_bib(control_no=str(n)) for n in range(10)])
+    out = str(tmp_path / "out.csv")
+    stats = run_batch(
+        [src], out, requested_call_type="pic", output_format="csv", workers=workers
+    )
+    assert stats.processed == 10
+    assert stats.created == 10
+    with open(out) as fh:
+        lines = fh.read().splitlines()
+    key = callno_sort_key("ENG J-E ADAMS").hex()
+    assert lines[0] == "seq,control_no,pattern,callno,sort_key,error,collision"
+    assert lines[1] == f"0,0,pic,ENG J-E ADAMS,{key},,"
+    assert lines[10] == f"9,9,pic,ENG J-E ADAMS,{key},,"
+
+
+def test_run_batch_jsonl_multiple_files(make_bib, marc_file, tmp_path):
+    src1 = marc_file([make_bib(control_no="1")], name="1.mrc")
+    src2 = marc_file([make_bib(control_no="2")], name="2.mrc")
+    out = str(tmp_path / "out.jsonl")
+    run_batch([src1, src2], out, requested_call_type="fic", output_format="jsonl")
+    with open(out) as fh:
+        rows = [json.loads(line) for line in fh]
+    assert [r["seq"] for r in rows] == [0, 1]
+    assert [r["control_no"] for r in rows] == ["1", "2"]
+    assert rows[0]["callno"] == "ENG FIC ADAMS"
+
+
+def test_run_batch_marc(make_bib, marc_file, tmp_path):
+    src = marc_file([make_bib(), make_bib(author=None)])
+    out = str(tmp_path / "out.mrc")
+    run_batch([src], out, requested_call_type="fic", output_format="marc")
+    with open(out, "rb") as fh:
+        bibs = list(MARCReader(fh))
+    assert str(bibs[0]["099"]) == "=099  \\\\$aENG$aFIC$aADAMS"
+    assert str(bibs[1]["099"]) == "=099  \\\\$aENG$aFIC$aF"
+
+
+def test_run_batch_progress(make_bib, marc_file, tmp_path):
+    src = marc_file([make_bib()])
+    stream = io.StringIO()
+    run_batch([src], str(tmp_path / "out.csv"), progress=stream)
+    assert "1 records" in stream.getvalue()
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_run_batch_both_systems(make_bib, marc_file, tmp_path, workers):
+    src = marc_file([make_bib(control_no="1"), make_bib(control_no="2")])
+    out = str(tmp_path / "out.csv")
+    stats = run_batch([src], out, system="both", workers=workers)
+    assert stats.processed == 4
+    with open(out) as fh:
+        rows = list(csv.DictReader(fh))
+    assert [(r["control_no"], r["system"]) for r in rows] == [
+        ("1", "bpl"),
+        ("1", "nypl"),
+        ("2", "bpl"),
+        ("2", "nypl"),
+    ]
+    assert {r["callno"] for r in rows} == {"ENG FIC ADAMS"}
+
+
+def test_run_batch_both_systems_marc(make_bib, marc_file, tmp_path):
+    src = marc_file([make_bib(), make_bib(leader="00000cgm  2200000 a 4500")])
+    out = str(tmp_path / "out.mrc")
+    run_batch([src], out, system="both", output_format="marc")
+    with open(out, "rb") as fh:
+        bibs = list(MARCReader(fh))
+    assert len(bibs) == 2
+    assert str(bibs[0]["099"]) == "=099  \\\\$aENG$aFIC$aADAMS"
+    assert str(bibs[0]["091"]) == "=091  \\\\$pENG$aFIC$cADAMS"
+    assert bibs[1]["091"] is None
+
+
+@pytest.mark.parametrize(
+    "kwargs,msg",
+    [
+        ({"system": "qpl"}, "Invalid 'system' argument used."),
+        (
+            {"system": "both", "dedup": "control"},
+            "System 'both' can not be combined with deduplication, shelflist, "
+            "or checkpoints.",
+        ),
+        ({"workers": 0}, "Invalid 'workers' argument used."),
+    ],
+)
+def test_run_batch_invalid_arguments(tmp_path, kwargs, msg):
+    with pytest.raises(CallNoConstructorError) as exc:
+        run_batch([], str(tmp_path / "out.csv"), **kwargs)
+    assert msg in str(exc)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+@pytest.mark.parametrize("dedup", ["control", "fingerprint"])
+def test_run_batch_dedup(make_bib, marc_file, tmp_path, workers, dedup):
+    bibs = []
+    for n in range(4):
+        bibs.extend([make_bib(control_no="1"), make_bib(control_no="2", author="Bar")])
+    src = marc_file(bibs)
+    out = str(tmp_path / "out.jsonl")
+    stats = run_batch(
+        [src],
+        out,
+        requested_call_type="fic",
+        output_format="jsonl",
+        workers=workers,
+        dedup=dedup,
+    )
+    assert stats.processed == 8
+    assert stats.duplicates == 6
+    with open(out) as fh:
+        rows = [json.loads(line) for line in fh]
+    assert [r["seq"] for r in rows] == list(range(8))
+    assert [r["callno"] for r in rows] == ["ENG FIC ADAMS", "ENG FIC BAR"] * 4
+    assert [r["control_no"] for r in rows] == ["1", "2"] * 4
+
+
+def test_run_batch_dedup_marc(make_bib, marc_file, tmp_path):
+    src = marc_file([make_bib(control_no="1"), make_bib(control_no="2")])
+    out = str(tmp_path / "out.mrc")
+    stats = run_batch(
+        [src], out, requested_call_type="fic", output_format="marc", dedup="fingerprint"
+    )
+    assert stats.duplicates == 1
+    with open(out, "rb") as fh:
+        bibs = list(MARCReader(fh))
+    assert [b["001"].data for b in bibs] == ["1", "2"]
+    assert [str(b["099"]) for b in bibs] == ["=099  \\\\$aENG$aFIC$aADAMS"] * 2
+
+
+def test_run_batch_shelflist(make_bib, marc_file, tmp_path):
+    index = ShelflistIndex.build(["ENG FIC ADAMS"], str(tmp_path / "shelflist.idx"))
+    index.close()
+    src = marc_file([make_bib(), make_bib(author="Smith")])
+    out = str(tmp_path / "out.jsonl")
+    stats = run_batch(
+        [src],
+        out,
+        requested_call_type="fic",
+        output_format="jsonl",
+        shelflist=str(tmp_path / "shelflist.idx"),
+    )
+    assert stats.collisions == 1
+    with open(out) as fh:
+        rows = [json.loads(line) for line in fh]
+    assert [r["collision"] for r in rows] == [True, False]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_run_batch_orders(make_bib, marc_file, tmp_path, workers):
+    src = marc_file(
+        [
+            make_bib(control_no="1"),
+            make_bib(control_no="2", author="Bar"),
+            make_bib(control_no="3", author="Baz"),
+        ]
+    )
+    orders = tmp_path / "orders.tsv"
+    orders.write_text(
+        "bib_no\torder_no\tshelf\n1\to1\tfc\n3\to2\t\n1\to3\tfc\n4\to4\t\n",
+        encoding="utf-8",
+    )
+    out = str(tmp_path / "out.csv")
+    stream = io.StringIO()
+    stats = run_batch(
+        [src],
+        out,
+        requested_call_type="fic",
+        workers=workers,
+        orders=str(orders),
+        progress=stream,
+    )
+    assert stats.processed == 4
+    with open(out) as fh:
+        lines = fh.read().splitlines()
+    assert lines[0].endswith(",collision,order_no")
+    assert [line.split(",")[0] for line in lines[1:]] == ["0", "0", "1", "2"]
+    assert [line.split(",")[3] for line in lines[1:]] == [
+        "ENG FIC ADAMS",
+        "ENG FIC ADAMS",
+        "ENG FIC BAR",
+        "ENG FIC BAZ",
+    ]
+    assert [line.split(",")[-1] for line in lines[1:]] == ["o1", "o3", "", "o2"]
+    assert "4 records" in stream.getvalue()
+
+
+def test_run_batch_orders_dedup(make_bib, marc_file, tmp_path):
+    src = marc_file([make_bib(control_no="1"), make_bib(control_no="1")])
+    orders = tmp_path / "orders.csv"
+    orders.write_text(
+        "bib_no,order_no,shelf\n1,o1,fc\n1,o2,fc\n1,o3,jbc\n", encoding="utf-8"
+    )
+    out = str(tmp_path / "out.csv")
+    stats = run_batch(
+        [src], out, requested_call_type="fic", dedup="control", orders=str(orders)
+    )
+    assert stats.processed == 6
+    assert stats.duplicates == 4
+    with open(out) as fh:
+        rows = list(csv.DictReader(fh))
+    assert [r["order_no"] for r in rows] == ["o1", "o2", "o3"] * 2
+    assert [r["callno"] for r in rows] == [
+        "ENG FIC ADAMS",
+        "ENG FIC ADAMS",
+        "BOOK & CD ENG J FIC ADAMS",
+    ] * 2
+
+
+def test_run_batch_orders_with_checkpoint(tmp_path):
+    msg = "Invalid 'orders' argument used. Can not be combined with checkpoints."
+    with pytest.raises(CallNoConstructorError) as exc:
+        run_batch(
+            [],
+            str(tmp_path / "out.csv"),
+            orders=str(tmp_path / "orders.csv"),
+            checkpoint=str(tmp_path / "out.checkpoint"),
+        )
+    assert msg in str(exc)
+
+
+def test_run_batch_orders_nypl(tmp_path):
+    msg = "Invalid 'orders' argument used. Order data is supported for BPL only."
+    with pytest.raises(CallNoConstructorError) as exc:
+        run_batch(
+            [], str(tmp_path / "out.csv"), system="nypl", orders=str(tmp_path / "o")
+        )
+    assert msg in str(exc)
+
+
+def test_create_callno_order_nypl(make_bib):
+    msg = "Invalid 'order' argument used. Order data is supported for BPL only."
+    with pytest.raises(CallNoConstructorError) as exc:
+        create_callno(make_bib(), "nypl", order=Order("o1"))
+    assert msg in str(exc)
+
+
+def test_batch_result_as_dict_order_no():
+    assert "order_no" not in BatchResult(0, None, "fic", "FIC A").as_dict()
+    result = BatchResult(0, None, "fic", "FIC A", order_no="o1")
+    assert result.as_dict()["order_no"] == "o1"
+
+
+def test_batch_stats_merge_and_from_dict():
+    a = BatchStats()
+    a.update(BatchResult(0, None, "fic", "FIC A"))
+    b = BatchStats()
+    b.update(BatchResult(1, None, "fic", None))
+    b.update(BatchResult(2, None, "pic", "J-E A", collision=True))
+    b.duplicates = 1
+    a.merge(BatchStats.from_dict(b.as_dict()))
+    assert a.as_dict() == {
+        "processed": 3,
+        "created": 2,
+        "failed": 1,
+        "duplicates": 1,
+        "collisions": 1,
+        "patterns": {
+            "fic": {"created": 1, "failed": 1},
+            "pic": {"created": 1, "failed": 0},
+        },
+    }
+
+
+def test_iter_marc_chunks_limit(make_bib):
+    data = make_bib(control_no="1").as_marc() + make_bib(control_no="2").as_marc()
+    fh = io.BytesIO(data)
+    chunks = list(iter_marc_chunks(fh, buffer_size=7, limit=len(data) // 2))
+    assert chunks == [data[: len(data) // 2]]
@@ -1,5 +1,29 @@
+import subprocess
+import sys
+
+import pytest
+
 from bookops_callno import __version__
 
+# import time budgets in seconds, measured in a fresh interpreter
+PACKAGE_IMPORT_BUDGET = 0.05
+CONSTRUCTOR_IMPORT_BUDGET = 0.5
+
+
+def _run(code: str) -> str:
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    return result.stdout.strip()
+
+
+def _import_time(statement: str) -> float:
+    code = (
+        "import time; start = time.perf_counter(); "
+        f"{statement}; print(time.perf_counter() - start)"
+    )
+    return min(float(_run(code)) for _ in range(3))
+
 
 def test_version():
     assert __version__ == "0.1.0"
@@ -17,3 +41,39 @@ def test_NyplCallNo_top_import():
         from bookops_callno import NyplCallNo
     except ImportError:
         pytest.fail("Top level CallNo import failed.")
+
+
+def test_package_import_defers_dependencies():
+    code = (
+        "import sys, bookops_callno; "
+        "print([m for m in ('pymarc', 'unidecode') if m in sys.modules])"
+    )
+    assert _run(code) == "[]"
+
+
+def test_unidecode_imported_only_for_non_ascii_values():
+    code = (
+        "import sys; "
+        "from bookops_callno.normalizer import normalize_value; "
+        "normalize_value('Adams, John.'); "
+        "print('unidecode' in sys.modules, end=' '); "
+        "normalize_value('Ádams, John.'); "
+        "print('unidecode' in sys.modules)"
+    )
+    assert _run(code) == "False True"
+
+
+def test_package_import_time():
+    assert _import_time("import bookops_callno") < PACKAGE_IMPORT_BUDGET
+
+
+def test_constructor_import_time():
+    elapsed = _import_time("from bookops_callno import BplCallNo")
+    assert elapsed < CONSTRUCTOR_IMPORT_BUDGET
+
+
+def test_invalid_top_level_attribute():
+    import bookops_callno
+
+    with pytest.raises(AttributeError):
+        bookops_callno.FooCallNo
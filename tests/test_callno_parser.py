@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+
+from pymarc import Field
+import pytest
+
+from bookops_callno.callno_parser import (
+    CallNoElements,
+    _parse_prefix,
+    parse_bpl_callno,
+)
+from bookops_callno.errors import CallNoConstructorError
+
+
+@pytest.mark.parametrize(
+    "arg,expectation",
+    [
+        ("FIC ADAMS", ("fic", None, None, None, "FIC", None, "ADAMS")),
+        ("J FIC ADAMS", ("fic", None, None, "juv", "FIC", None, "ADAMS")),
+        ("ENG FIC ADAMS", ("fic", None, "ENG", None, "FIC", None, "ADAMS")),
+        (
+            "AUDIO SPA J FIC ADAMS",
+            ("fic", "AUDIO", "SPA", "juv", "FIC", None, "ADAMS"),
+        ),
+        ("FIC VAN DYKE", ("fic", None, None, None, "FIC", None, "VAN DYKE")),
+        ("J-E A", ("pic", None, None, "early juv", "J-E", None, "A")),
+        ("CHI J-E ADAMS", ("pic", None, "CHI", "early juv", "J-E", None, "ADAMS")),
+        ("B ADAMS G", ("bio", None, None, None, "B", "ADAMS", "G")),
+        (
+            "DVD CHI B ADAMS G",
+            ("bio", "DVD", "CHI", None, "B", "ADAMS", "G"),
+        ),
+        ("J B LOUIS XIV C", ("bio", None, None, "juv", "B", "LOUIS XIV", "C")),
+        ("B ADAMS", ("bio", None, None, None, "B", "ADAMS", None)),
+        ("J 741.23 T", ("dew", None, None, "juv", "741.23", None, "T")),
+        (
+            "BOOK & CD 323.623 W",
+            ("dew", "BOOK & CD", None, None, "323.623", None, "W"),
+        ),
+        ("AUDIO SPA J 811 D", ("dew", "AUDIO", "SPA", "juv", "811", None, "D")),
+        (
+            "947.08 PUTIN B",
+            ("des", None, None, None, "947.08", "PUTIN", "B"),
+        ),
+    ],
+)
+def test_parse_bpl_callno(arg, expectation):
+    assert parse_bpl_callno(arg)[1:] == expectation
+
+
+@pytest.mark.parametrize(
+    "arg,expectation",
+    [
+        ("eBOOK", "ebook"),
+        ("eAUDIO", "eaudio"),
+        ("eVIDEO", "evideo"),
+        ("eMUSIC", "emusic"),
+    ],
+)
+def test_parse_bpl_callno_e_resources(arg, expectation):
+    assert parse_bpl_callno(arg) == CallNoElements(arg, expectation)
+
+
+@pytest.mark.parametrize(
+    "arg",
+    ["", "ADAMS", "PRINT FIC ADAMS", "J SPA FIC ADAMS", "J J FIC ADAMS", "J"],
+)
+def test_parse_bpl_callno_undetermined(arg):
+    result = parse_bpl_callno(arg)
+    assert result.pattern == "und"
+    assert result.classification is None
+
+
+def test_parse_bpl_callno_normalizes_whitespace():
+    assert parse_bpl_callno("  J  FIC\tADAMS ").callno == "J FIC ADAMS"
+
+
+def test_parse_bpl_callno_field():
+    field = Field(
+        tag="099",
+        indicators=[" ", " "],
+        subfields=["a", "J", "a", "B", "a", "LOUIS XIV", "a", "C"],
+    )
+    result = parse_bpl_callno(field)
+    assert result.callno == "J B LOUIS XIV C"
+    assert result.subject == "LOUIS XIV"
+    assert result.cutter == "C"
+
+
+def test_parse_bpl_callno_invalid_arg():
+    with pytest.raises(CallNoConstructorError):
+        parse_bpl_callno(None)
+
+
+def test_parse_bpl_callno_prefix_cache():
+    _parse_prefix.cache_clear()
+    parse_bpl_callno("SPA J FIC ADAMS")
+    parse_bpl_callno("SPA J FIC SMITH")
+    info = _parse_prefix.cache_info()
+    assert info.hits == 1
+    assert info.misses == 1
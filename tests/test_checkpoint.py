@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+
+import json
+
+import pytest
+
+from bookops_callno import batch
+from bookops_callno.batch import BatchWriter, run_batch
+from bookops_callno.checkpoint import (
+    Checkpointer,
+    InputPosition,
+    load_checkpoint,
+    resume_state,
+)
+from bookops_callno.errors import CallNoConstructorError
+
+
+class Crash(Exception):
+    pass
+
+
+@pytest.fixture
+def inputs(make_bib, marc_file, tmp_path):
+    first = marc_file([make_bib(control_no=str(n)) for n in range(7)], "a.mrc")
+    with open(first, "ab") as fh:
+        fh.write(b"\r\n")
+    second = marc_file([make_bib(control_no=str(n)) for n in range(7, 12)], "b.mrc")
+    return [first, second]
+
+
+def _crash_after(monkeypatch, records):
+    write = BatchWriter.write
+    calls = {"n": 0}
+
+    def _write(self, result):
+        if calls["n"] == records:
+            raise Crash
+        calls["n"] += 1
+        write(self, result)
+
+    monkeypatch.setattr(BatchWriter, "write", _write)
+
+
+def test_input_position_advance():
+    position = InputPosition()
+    position.file_starts[0] = (0, 0)
+    position.file_starts[2] = (1, 0)
+    position.advance(0, 10)
+    position.advance(1, 10)
+    assert (position.file_index, position.offset, position.seq) == (0, 20, 2)
+    position.advance(2, 5)
+    assert (position.file_index, position.offset, position.seq) == (1, 5, 3)
+    assert position.file_starts == {}
+
+
+def test_load_checkpoint_missing(tmp_path):
+    with pytest.raises(CallNoConstructorError) as exc:
+        load_checkpoint(str(tmp_path / "foo.json"))
+    assert "Checkpoint file not found" in str(exc.value)
+
+
+@pytest.mark.parametrize("content", ["foo", "[]", '{"version": 0}'])
+def test_load_checkpoint_invalid(tmp_path, content):
+    path = tmp_path / "foo.json"
+    path.write_text(content)
+    with pytest.raises(CallNoConstructorError) as exc:
+        load_checkpoint(str(path))
+    assert "Invalid checkpoint file" in str(exc.value)
+
+
+def test_checkpointer_invalid_frequency(tmp_path):
+    with pytest.raises(CallNoConstructorError):
+        Checkpointer(str(tmp_path / "c"), {}, None, dict, InputPosition(), 0)
+
+
+@pytest.mark.parametrize("output_format", ["csv", "jsonl", "marc"])
+@pytest.mark.parametrize("workers", [1, 2])
+def test_run_batch_resume(monkeypatch, inputs, tmp_path, output_format, workers):
+    whole = str(tmp_path / f"whole.{output_format}")
+    expected_stats = run_batch(
+        inputs, whole, requested_call_type="fic", output_format=output_format
+    )
+
+    out = str(tmp_path / f"out.{output_format}")
+    checkpoint = str(tmp_path / "checkpoint.json")
+    kwargs = dict(
+        requested_call_type="fic",
+        output_format=output_format,
+        workers=workers,
+        checkpoint=checkpoint,
+        checkpoint_records=3,
+    )
+    _crash_after(monkeypatch, 8)
+    with pytest.raises(Crash):
+        run_batch(inputs, out, **kwargs)
+    monkeypatch.undo()
+
+    state = load_checkpoint(checkpoint)
+    assert state["complete"] is False
+    assert state["seq"] == 6
+    assert state["stats"]["processed"] == 6
+
+    stats = run_batch(inputs, out, resume=True, **kwargs)
+    assert stats.as_dict() == expected_stats.as_dict()
+    assert load_checkpoint(checkpoint)["complete"] is True
+    with open(whole, "rb") as a, open(out, "rb") as b:
+        assert a.read() == b.read()
+
+
+def test_run_batch_resume_across_files(monkeypatch, inputs, tmp_path):
+    whole = str(tmp_path / "whole.csv")
+    run_batch(inputs, whole, requested_call_type="fic")
+    out = str(tmp_path / "out.csv")
+    checkpoint = str(tmp_path / "checkpoint.json")
+    kwargs = dict(
+        requested_call_type="fic", checkpoint=checkpoint, checkpoint_records=1
+    )
+    _crash_after(monkeypatch, 9)
+    with pytest.raises(Crash):
+        run_batch(inputs, out, **kwargs)
+    monkeypatch.undo()
+    assert load_checkpoint(checkpoint)["position"][0] == 1
+
+    run_batch(inputs, out, resume=True, **kwargs)
+    with open(whole) as a, open(out) as b:
+        assert a.read() == b.read()
+
+
+def test_run_batch_resume_completed(inputs, tmp_path, monkeypatch):
+    out = str(tmp_path / "out.csv")
+    checkpoint = str(tmp_path / "checkpoint.json")
+    first = run_batch(inputs, out, checkpoint=checkpoint)
+    monkeypatch.setattr(batch, "iter_batch", None)
+    second = run_batch(inputs, out, checkpoint=checkpoint, resume=True)
+    assert second.as_dict() == first.as_dict()
+
+
+def test_run_batch_resume_dedup(monkeypatch, make_bib, marc_file, tmp_path):
+    src = marc_file([make_bib(control_no=str(n % 3)) for n in range(10)])
+    expected = run_batch([src], str(tmp_path / "whole.csv"), dedup="control")
+    out = str(tmp_path / "out.csv")
+    checkpoint = str(tmp_path / "checkpoint.json")
+    kwargs = dict(dedup="control", checkpoint=checkpoint, checkpoint_records=2)
+    _crash_after(monkeypatch, 5)
+    with pytest.raises(Crash):
+        run_batch([src], out, **kwargs)
+    monkeypatch.undo()
+    stats = run_batch([src], out, resume=True, **kwargs)
+    assert stats.processed == expected.processed == 10
+    # first occurrences read before the checkpoint are not remembered
+    assert 0 < stats.duplicates < expected.duplicates
+    with open(tmp_path / "whole.csv") as a, open(out) as b:
+        assert a.read() == b.read()
+
+
+def test_run_batch_resume_mismatched_options(inputs, tmp_path):
+    out = str(tmp_path / "out.csv")
+    checkpoint = str(tmp_path / "checkpoint.json")
+    run_batch(inputs, out, checkpoint=checkpoint)
+    with pytest.raises(CallNoConstructorError) as exc:
+        run_batch(
+            inputs, out, requested_call_type="fic", checkpoint=checkpoint, resume=True
+        )
+    assert "Checkpoint does not match" in str(exc.value)
+
+
+def test_run_batch_resume_without_checkpoint(inputs, tmp_path):
+    with pytest.raises(CallNoConstructorError):
+        run_batch(inputs, str(tmp_path / "out.csv"), resume=True)
+
+
+def test_resume_state(tmp_path):
+    path = tmp_path / "checkpoint.json"
+    path.write_text(json.dumps({"version": 1, "config": {"a": 1}}))
+    assert resume_state(str(path), {"a": 1})["config"] == {"a": 1}
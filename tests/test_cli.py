@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+
+import json
+
+import pytest
+
+from bookops_callno.cli import get_parser, main
+
+
+def test_get_parser_batch_defaults():
+    args = get_parser().parse_args(["batch", "foo.mrc", "-s", "bpl", "-o", "out.csv"])
+    assert args.inputs == ["foo.mrc"]
+    assert args.system == "bpl"
+    assert args.call_type == "auto"
+    assert args.output_format == "csv"
+    assert args.workers == 1
+    assert args.quiet is False
+    assert args.dedup is None
+
+
+def test_get_parser_batch_both_systems():
+    args = get_parser().parse_args(["batch", "foo.mrc", "-s", "both", "-o", "out.csv"])
+    assert args.system == "both"
+
+
+def test_get_parser_invalid_system():
+    with pytest.raises(SystemExit):
+        get_parser().parse_args(["batch", "foo.mrc", "-s", "qpl", "-o", "out.csv"])
+
+
+def test_main_batch(make_bib, marc_file, tmp_path, capsys):
+    src = marc_file([make_bib(), make_bib()])
+    out = str(tmp_path / "out.jsonl")
+    code = main(
+        ["batch", src, "-s", "bpl", "-t", "fic", "-f", "jsonl", "-o", out, "-w", "2"]
+    )
+    assert code == 0
+    with open(out) as fh:
+        assert len(fh.readlines()) == 2
+    err = capsys.readouterr().err
+    assert "rec/s" in err
+    assert "fic        created: 2, failed: 0" in err
+
+
+def test_main_batch_orders(make_bib, marc_file, tmp_path):
+    src = marc_file([make_bib(control_no="1")])
+    orders = tmp_path / "orders.csv"
+    orders.write_text("bib_no,order_no\n1,o1\n1,o2\n", encoding="utf-8")
+    out = str(tmp_path / "out.jsonl")
+    code = main(
+        ["batch", src, "-s", "bpl", "-f", "jsonl", "-o", out, "--orders", str(orders)]
+    )
+    assert code == 0
+    with open(out) as fh:
+        rows = [json.loads(line) for line in fh]
+    assert [r["order_no"] for r in rows] == ["o1", "o2"]
+
+
+def test_main_batch_quiet(make_bib, marc_file, tmp_path, capsys):
+    src = marc_file([make_bib()])
+    code = main(["batch", src, "-s", "bpl", "-o", str(tmp_path / "out.csv"), "-q"])
+    assert code == 0
+    assert capsys.readouterr().err == ""
+
+
+def test_main_batch_missing_file(tmp_path, capsys):
+    code = main(
+        ["batch", str(tmp_path / "foo.mrc"), "-s", "bpl", "-o", str(tmp_path / "o")]
+    )
+    assert code == 1
+    assert "bookops-callno: error:" in capsys.readouterr().err
+
+
+def test_get_parser_serve_defaults():
+    args = get_parser().parse_args(["serve"])
+    assert args.host == "127.0.0.1"
+    assert args.port == 8787
+    assert args.system == "bpl"
+    assert args.call_type == "auto"
+
+
+def test_get_parser_loadtest():
+    args = get_parser().parse_args(["loadtest", "foo.mrc", "-n", "10", "-b", "5"])
+    assert args.sample == "foo.mrc"
+    assert args.requests == 10
+    assert args.batch_size == 5
+    assert args.concurrency == 4
+
+
+def test_main_shelflist(tmp_path, capsys):
+    dump = tmp_path / "dump.txt"
+    dump.write_text("FIC ADAMS\nJ-E A\n", encoding="utf-8")
+    code = main(["shelflist", str(dump), "-o", str(tmp_path / "shelflist.idx")])
+    assert code == 0
+    assert "Indexed 2 unique call numbers." in capsys.readouterr().err
+
+
+def test_main_sort(tmp_path):
+    src = tmp_path / "callnos.txt"
+    src.write_text("J-E A\nFIC ADAMS\n811 A\n", encoding="utf-8")
+    out = tmp_path / "sorted.txt"
+    code = main(["sort", str(src), "-o", str(out), "--chunk-size", "1"])
+    assert code == 0
+    assert out.read_text(encoding="utf-8") == "811 A\nFIC ADAMS\nJ-E A\n"
+
+
+def test_main_audit(make_bib, marc_file, tmp_path, capsys):
+    src = marc_file([make_bib()])
+    out = str(tmp_path / "report.csv")
+    code = main(["audit", src, "-t", "fic", "-o", out])
+    assert code == 0
+    err = capsys.readouterr().err
+    assert "missing    1" in err
+
+
+def test_main_batch_shards_and_merge(make_bib, marc_file, tmp_path, capsys):
+    src = marc_file([make_bib(control_no=str(n)) for n in range(5)])
+    parts = []
+    stats = []
+    for n in (1, 2):
+        parts.append(str(tmp_path / f"part{n}.csv"))
+        stats.append(str(tmp_path / f"part{n}.json"))
+        args = ["batch", src, "-s", "bpl", "-t", "fic", "-o", parts[-1], "-q"]
+        code = main(args + ["--shard", f"{n}/2", "--stats", stats[-1]])
+        assert code == 0
+    out = str(tmp_path / "merged.csv")
+    code = main(["merge", *parts, "-o", out, "--stats", *stats])
+    assert code == 0
+    with open(out) as fh:
+        assert len(fh.readlines()) == 6
+    assert "processed: 5" in capsys.readouterr().err
+
+
+def test_main_batch_shard_multiple_inputs(make_bib, marc_file, tmp_path, capsys):
+    src = marc_file([make_bib()])
+    args = ["batch", src, src, "-s", "bpl", "-o", str(tmp_path / "out.csv")]
+    assert main(args + ["--shard", "1/2"]) == 1
+    assert "requires a single input file" in capsys.readouterr().err
+
+
+def test_main_batch_resume_default_checkpoint(make_bib, marc_file, tmp_path):
+    src = marc_file([make_bib(), make_bib()])
+    out = str(tmp_path / "out.csv")
+    args = ["batch", src, "-s", "bpl", "-t", "fic", "-o", out, "-q"]
+    assert main(args + ["--checkpoint", out + ".checkpoint"]) == 0
+    assert main(args + ["--resume"]) == 0
+    with open(out) as fh:
+        assert len(fh.readlines()) == 3
+
+
+def test_main_batch_resume_missing_checkpoint(make_bib, marc_file, tmp_path, capsys):
+    src = marc_file([make_bib()])
+    out = str(tmp_path / "out.csv")
+    assert main(["batch", src, "-s", "bpl", "-o", out, "--resume"]) == 1
+    assert "Checkpoint file not found" in capsys.readouterr().err
+
+
+def test_main_batch_pipeline_metrics(make_bib, marc_file, tmp_path, capsys):
+    src = marc_file([make_bib()])
+    stats = str(tmp_path / "stats.json")
+    args = ["batch", src, "-s", "bpl", "-o", str(tmp_path / "out.csv")]
+    assert main(args + ["--queue-size", "8", "--stats", stats]) == 0
+    with open(stats) as fh:
+        data = json.load(fh)
+    assert data["pipeline"]["queues"]["input"]["capacity"] == 8
+    assert "writer_starved" in capsys.readouterr().err
@@ -280,3 +280,336 @@ def test_BplCallNo_create_bio_callno_failed_no_cutter():
         Field(tag="600", indicators=["1", "0"], subfields=["a", "Brown, John."])
     ]
     assert bcn._create_bio_callno() is None
+
+
+@pytest.mark.parametrize(
+    "form,lang,audn,dewey,expectation",
+    [
+        (None, None, "adult", "947.0841", "=099  \\\\$a947.0841$aA"),
+        (None, None, "juv", "741.2394", "=099  \\\\$aJ$a741.23$aA"),
+        (None, "POL", "adult", "821", "=099  \\\\$aPOL$a821$aA"),
+        (None, "CHI", "early juv", "500.0", "=099  \\\\$aCHI$aJ$a500$aA"),
+        ("AUDIO", None, "adult", "348.236701", "=099  \\\\$aAUDIO$a348.2367$aA"),
+        (
+            "BOOK & CD",
+            None,
+            "adult",
+            "323.623",
+            "=099  \\\\$aBOOK & CD$a323.623$aA",
+        ),
+    ],
+)
+def test_BplCallNo_create_dew_callno(form, lang, audn, dewey, expectation):
+    bcn = BplCallNo()
+    bcn.mat_format = form
+    bcn.language_code = lang
+    bcn.audience_info = audn
+    bcn.dewey_info = dewey
+    bcn.cutter_info = Field(
+        tag="100", indicators=["1", " "], subfields=["a", "Adams, John."]
+    )
+    callno = bcn._create_dew_callno()
+    assert type(callno) == Field
+    assert str(callno) == expectation
+
+
+def test_BplCallNo_create_dew_callno_failed_no_dewey():
+    bcn = BplCallNo()
+    bcn.cutter_info = Field(
+        tag="100", indicators=["1", " "], subfields=["a", "Adams, John."]
+    )
+    assert bcn._create_dew_callno() is None
+
+
+def test_BplCallNo_create_dew_callno_failed_no_cutter():
+    bcn = BplCallNo()
+    bcn.dewey_info = "811"
+    bcn.cutter_info = Field(
+        tag="246", indicators=["3", " "], subfields=["a", "Adams, John."]
+    )
+    assert bcn._create_dew_callno() is None
+
+
+def test_BplCallNo_dew_callno(make_bib):
+    bib = make_bib(data_008="210101s2021    nyu    j      000 0 spa d")
+    bib.add_field(
+        Field(tag="082", indicators=["0", "4"], subfields=["a", "741.2/394", "2", "23"])
+    )
+    bcn = BplCallNo(bib=bib, requested_call_type="dew")
+    assert str(bcn) == "SPA J 741.23 A"
+
+
+@pytest.mark.parametrize(
+    "leader,call_type,subjects,expectation",
+    [
+        ("00000cam  2200000 a 4500", "dew", [], "ENG 782.1 A"),
+        ("00000cim  2200000 a 4500", "fic", [], "AUDIO ENG FIC ADAMS"),
+        ("00000cim  2200000 a 4500", "dew", [], "AUDIO ENG 782.1 A"),
+        ("00000cgm  2200000 a 4500", "dew", [], "DVD ENG 782.1 A"),
+        (
+            "00000cam  2200000 a 4500",
+            "dew",
+            [
+                Field(
+                    tag="650",
+                    indicators=[" ", "0"],
+                    subfields=["a", "Operas", "v", "Librettos."],
+                )
+            ],
+            "LIB ENG 782.1 A",
+        ),
+    ],
+)
+def test_BplCallNo_format_prefix(make_bib, leader, call_type, subjects, expectation):
+    bib = make_bib(leader=leader, subjects=subjects)
+    bib.add_field(Field(tag="082", indicators=["0", "4"], subfields=["a", "782.1"]))
+    bcn = BplCallNo(bib=bib, requested_call_type=call_type)
+    assert str(bcn) == expectation
+
+
+@pytest.mark.parametrize(
+    "shelf,audn,expectation",
+    [
+        (None, None, "ENG 741.2394 A"),
+        ("bc", None, "BOOK & CD ENG 741.2394 A"),
+        (None, "j", "ENG J 741.23 A"),
+        ("jbc", "a", "BOOK & CD ENG J 741.23 A"),
+    ],
+)
+def test_BplCallNo_order_overrides(make_bib, shelf, audn, expectation):
+    bib = make_bib(data_008="210101s2021    nyu           000 0 eng d")
+    bib.add_field(Field(tag="082", indicators=["0", "4"], subfields=["a", "741.2394"]))
+    bcn = BplCallNo(bib=bib, order_shelf=shelf, order_audn=audn)
+    assert str(bcn) == expectation
+    assert bcn.content_info == "dew"
+    assert bcn.features.audience_info == "adult"
+
+
+JUV_FIC = "210101s2021    nyu    c      000 1 eng d"
+PIC = "210101s2021    nyu    a      000 1 eng d"
+ADULT_FIC = "210101s2021    nyu           000 1 eng d"
+ADULT_DEW = "210101s2021    nyu           000 0 eng d"
+JUV_DEW = "210101s2021    nyu    c      000 0 eng d"
+
+
+@pytest.mark.parametrize(
+    "data_008,shelf,audn,call_type,expectation,content",
+    [
+        (JUV_FIC, "ej", None, "auto", "ENG J-E ADAMS", "pic"),
+        (JUV_FIC, "er", None, "auto", "ENG J-E ADAMS", "pic"),
+        (JUV_FIC, "ej", None, "fic", "ENG J FIC ADAMS", None),
+        (JUV_FIC, None, "a", "auto", "ENG FIC ADAMS", "fic"),
+        (JUV_FIC, "bc", None, "auto", "BOOK & CD ENG J FIC ADAMS", "fic"),
+        (ADULT_FIC, "jbc", None, "auto", "BOOK & CD ENG J FIC ADAMS", "fic"),
+        (PIC, None, "a", "auto", "ENG FIC ADAMS", "fic"),
+        (PIC, None, "j", "auto", "ENG J FIC ADAMS", "fic"),
+        (PIC, "ej", "a", "auto", "ENG J-E ADAMS", "pic"),
+        (PIC, "bc", None, "auto", "BOOK & CD ENG J-E ADAMS", "pic"),
+        (PIC, "jbc", None, "auto", "BOOK & CD ENG J FIC ADAMS", "fic"),
+        (PIC, None, "a", "pic", "ENG J-E ADAMS", None),
+        (ADULT_DEW, "ej", None, "auto", "ENG J-E ADAMS", "pic"),
+        (ADULT_DEW, "er", None, "dew", "ENG J 741.23 A", None),
+        (JUV_DEW, None, "a", "auto", "ENG 741.2394 A", "dew"),
+        (JUV_DEW, "ya", None, "auto", "ENG 741.2394 A", "dew"),
+        (JUV_DEW, "bc", None, "auto", "BOOK & CD ENG J 741.23 A", "dew"),
+    ],
+)
+def test_BplCallNo_order_overrides_pattern(
+    make_bib, data_008, shelf, audn, call_type, expectation, content
+):
+    bib = make_bib(data_008=data_008)
+    bib.add_field(Field(tag="082", indicators=["0", "4"], subfields=["a", "741.2394"]))
+    bcn = BplCallNo(
+        bib=bib, order_shelf=shelf, order_audn=audn, requested_call_type=call_type
+    )
+    assert str(bcn) == expectation
+    if content is not None:
+        assert bcn.content_info == content
+
+
+@pytest.mark.parametrize(
+    "data_008,fields,expectation,content",
+    [
+        ("210101s2021    nyu           000 1 eng d", [], "ENG FIC ADAMS", "fic"),
+        ("210101s2021    nyu    a      000 1 eng d", [], "ENG J-E ADAMS", "pic"),
+        ("210101s2021    nyu     o     000 1 eng d", [], "eBOOK", "ebook"),
+        (
+            "210101s2021    nyu           000 0beng d",
+            [
+                Field(tag="082", indicators=["0", "4"], subfields=["a", "920"]),
+                Field(
+                    tag="600", indicators=["1", "0"], subfields=["a", "Brown, Joyce."]
+                ),
+            ],
+            "ENG B BROWN A",
+            "bio",
+        ),
+        (
+            "210101s2021    nyu           000 0 eng d",
+            [
+                Field(tag="082", indicators=["0", "4"], subfields=["a", "813/.54"]),
+                Field(
+                    tag="600",
+                    indicators=["1", "0"],
+                    subfields=["a", "Poe, Edgar Allan,"],
+                ),
+            ],
+            "ENG 813.54 POE A",
+            "des",
+        ),
+        (
+            "210101s2021    nyu           000 0 eng d",
+            [
+                Field(tag="082", indicators=["0", "4"], subfields=["a", "005.13/3"]),
+                Field(
+                    tag="650",
+                    indicators=[" ", "0"],
+                    subfields=["a", "Java (Computer program language)"],
+                ),
+            ],
+            "ENG 005.133 JAVA A",
+            "des",
+        ),
+    ],
+)
+def test_BplCallNo_auto(make_bib, data_008, fields, expectation, content):
+    bib = make_bib(data_008=data_008)
+    for field in fields:
+        bib.add_field(field)
+    bcn = BplCallNo(bib=bib)
+    assert str(bcn) == expectation
+    if content is not None:
+        assert bcn.content_info == content
+
+
+def test_BplCallNo_auto_undetermined(make_bib):
+    bcn = BplCallNo(bib=make_bib(data_008="210101s2021    nyu           000 0 eng d"))
+    assert bcn.callno_field is None
+    assert bcn.content_info == "und"
+
+
+def test_BplCallNo_create_des_callno():
+    bcn = BplCallNo()
+    bcn.audience_info = "juv"
+    bcn.dewey_info = "813.54"
+    bcn.cutter_info = Field(
+        tag="100", indicators=["1", " "], subfields=["a", "Adams, John."]
+    )
+    bcn.subject_info = [
+        Field(tag="650", indicators=[" ", "0"], subfields=["a", "Horror tales."]),
+        Field(tag="600", indicators=["1", "0"], subfields=["a", "Poe, Edgar Allan,"]),
+    ]
+    assert str(bcn._create_des_callno()) == "=099  \\\\$aJ$a813.54$aPOE$aA"
+
+
+def test_BplCallNo_des_callno_topic(make_bib):
+    bib = make_bib(data_008="210101s2021    nyu           000 0 eng d")
+    bib.add_field(Field(tag="082", indicators=["0", "4"], subfields=["a", "005.133"]))
+    bib.add_field(
+        Field(
+            tag="650",
+            indicators=[" ", "0"],
+            subfields=["a", "Java (Computer program language)"],
+        )
+    )
+    bcn = BplCallNo(bib=bib, requested_call_type="des")
+    assert str(bcn) == "ENG 005.133 JAVA A"
+
+
+def test_BplCallNo_create_des_callno_failed_outside_ranges():
+    bcn = BplCallNo()
+    bcn.dewey_info = "641.5"
+    bcn.cutter_info = Field(
+        tag="100", indicators=["1", " "], subfields=["a", "Adams, John."]
+    )
+    bcn.subject_info = [
+        Field(tag="600", indicators=["1", "0"], subfields=["a", "Poe, Edgar Allan,"])
+    ]
+    assert bcn._create_des_callno() is None
+
+
+def test_BplCallNo_create_des_callno_failed_no_subject():
+    bcn = BplCallNo()
+    bcn.dewey_info = "813.54"
+    bcn.cutter_info = Field(
+        tag="100", indicators=["1", " "], subfields=["a", "Adams, John."]
+    )
+    assert bcn._create_des_callno() is None
+
+
+def test_BplCallNo_sort_key():
+    bcn = BplCallNo(requested_call_type="ebook")
+    assert bcn.sort_key() == b"\x02EBOOK\x00"
+
+
+def test_BplCallNo_sort_key_no_callno():
+    assert BplCallNo().sort_key() is None
+
+
+def test_BplCallNo_candidates(make_bib):
+    bib = make_bib()
+    bib.add_field(Field(tag="082", indicators=["0", "4"], subfields=["a", "813/.54"]))
+    bib.add_field(
+        Field(tag="600", indicators=["1", "0"], subfields=["a", "Poe, Edgar Allan,"])
+    )
+    candidates = BplCallNo(bib=bib, requested_call_type="dew").candidates()
+    assert candidates.auto == "fic"
+    assert candidates.as_dict()["callnos"] == {
+        "pic": "ENG J-E ADAMS",
+        "fic": "ENG FIC ADAMS",
+        "bio": "ENG B POE A",
+        "des": "ENG 813.54 POE A",
+        "dew": "ENG 813.54 A",
+    }
+
+
+def test_BplCallNo_candidates_reuse_created_callno(make_bib):
+    bcn = BplCallNo(bib=make_bib())
+    assert bcn.candidates().callnos["fic"] is bcn.callno_field
+
+
+def test_BplCallNo_candidates_e_resource(make_bib):
+    bib = make_bib(data_008="210101s2021    nyu     o     000 1 eng d")
+    candidates = BplCallNo(bib=bib).candidates()
+    assert candidates.auto == "ebook"
+    assert list(candidates.callnos) == ["pic", "fic", "ebook"]
+
+
+def test_BplCallNo_candidates_no_bib():
+    assert BplCallNo().candidates() == (None, {})
+
+
+def test_BplCallNo_candidates_des_without_subject_segment(make_bib):
+    bib = make_bib(data_008="210101s2021    nyu           000 0 eng d")
+    bib.add_field(Field(tag="082", indicators=["0", "4"], subfields=["a", "005.133"]))
+    bib.add_field(
+        Field(
+            tag="650",
+            indicators=[" ", "0"],
+            subfields=["a", "(Computer program language)"],
+        )
+    )
+    bcn = BplCallNo(bib=bib)
+    assert bcn.content_candidates == ["dew"]
+    candidates = bcn.candidates()
+    assert candidates.auto == "dew"
+    assert "des" not in candidates.callnos
+    assert candidates.callnos["dew"].value() == "ENG 005.133 A"
+
+
+@pytest.mark.parametrize(
+    "leader,expectation",
+    [
+        ("00000cim  2200000 a 4500", "AUDIO ENG 891.73 TOLSTOY A"),
+        ("00000cgm  2200000 a 4500", "DVD ENG 891.73 TOLSTOY A"),
+    ],
+)
+def test_BplCallNo_auto_des_non_print(make_bib, leader, expectation):
+    bib = make_bib(leader=leader, data_008="210101s2021    nyu           000 0 eng d")
+    bib.add_field(Field(tag="082", indicators=["0", "4"], subfields=["a", "891.73"]))
+    bib.add_field(
+        Field(tag="600", indicators=["1", "0"], subfields=["a", "Tolstoy, Leo,"])
+    )
+    bcn = BplCallNo(bib=bib)
+    assert bcn.content_info == "des"
+    assert str(bcn) == expectation
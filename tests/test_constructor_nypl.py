@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+
+from pymarc import Field
+import pytest
+
+from bookops_callno.constructor_bpl import BplCallNo
+from bookops_callno.constructor_nypl import NyplCallNo
+
+
+def test_NyplCallNo_initiation():
+    ncn = NyplCallNo()
+    assert ncn.audience_info is None
+    assert ncn.content_info is None
+    assert ncn.callno_field is None
+    assert ncn.requested_call_type == "auto"
+    assert ncn.tag == "091"
+    assert ncn.inds == [" ", " "]
+
+
+@pytest.mark.parametrize("arg", ["eaudio", "ebook", "evideo"])
+def test_NyplCallNo_e_resource_not_supported(arg):
+    ncn = NyplCallNo(requested_call_type=arg)
+    assert ncn.callno_field is None
+
+
+@pytest.mark.parametrize(
+    "leader,data_008",
+    [
+        ("00000cim  2200000 a 4500", "210101s2021    nyu           000 1 eng d"),
+        ("00000cgm  2200000 a 4500", "210101s2021    nyu           000 1 eng d"),
+        ("00000cam  2200000 a 4500", "210101s2021    nyu     o     000 1 eng d"),
+    ],
+)
+def test_NyplCallNo_non_print_not_supported(make_bib, leader, data_008):
+    bib = make_bib(leader=leader, data_008=data_008)
+    ncn = NyplCallNo(bib=bib, requested_call_type="fic")
+    assert ncn.callno_field is None
+    assert NyplCallNo(bib=bib).callno_field is None
+
+
+@pytest.mark.parametrize(
+    "leader,data_008,expectation",
+    [
+        (
+            "00000cam  2200000 a 4500",
+            "210101s2021    nyu           000 1 eng d",
+            "=091  \\\\$pENG$aFIC$cADAMS",
+        ),
+        (
+            "00000cam  2200000 a 4500",
+            "210101s2021    nyu    j      000 1 spa d",
+            "=091  \\\\$pSPA$pJ$aFIC$cADAMS",
+        ),
+        (
+            "00000cam  2200000 a 4500",
+            "210101s2021    nyu    d      000 1 eng d",
+            "=091  \\\\$pENG$pYA$aFIC$cADAMS",
+        ),
+    ],
+)
+def test_NyplCallNo_fic_callno(make_bib, leader, data_008, expectation):
+    bib = make_bib(leader=leader, data_008=data_008)
+    ncn = NyplCallNo(bib=bib, requested_call_type="fic")
+    assert str(ncn.callno_field) == expectation
+
+
+def test_NyplCallNo_pic_callno(make_bib):
+    bib = make_bib(data_008="210101s2021    nyu    a      000 1 eng d")
+    ncn = NyplCallNo(bib=bib)
+    assert str(ncn) == "ENG J E ADAMS"
+    assert ncn.content_info == "pic"
+
+
+def test_NyplCallNo_dew_callno(make_bib):
+    bib = make_bib(data_008="210101s2021    nyu    j      000 0 eng d")
+    bib.add_field(
+        Field(tag="082", indicators=["0", "4"], subfields=["a", "741.2/394", "2", "23"])
+    )
+    ncn = NyplCallNo(bib=bib)
+    assert str(ncn.callno_field) == "=091  \\\\$pENG$pJ$a741.23$cA"
+    assert ncn.content_info == "dew"
+
+
+def test_NyplCallNo_des_callno(make_bib):
+    bib = make_bib(data_008="210101s2021    nyu           000 0 eng d")
+    bib.add_field(Field(tag="082", indicators=["0", "4"], subfields=["a", "813/.54"]))
+    bib.add_field(
+        Field(tag="600", indicators=["1", "0"], subfields=["a", "Poe, Edgar Allan,"])
+    )
+    ncn = NyplCallNo(bib=bib)
+    assert str(ncn.callno_field) == "=091  \\\\$pENG$a813.54$bPOE$cA"
+    assert ncn.content_info == "des"
+
+
+def test_NyplCallNo_bio_callno(make_bib):
+    bib = make_bib(data_008="210101s2021    nyu           000 0beng d")
+    bib.add_field(Field(tag="082", indicators=["0", "4"], subfields=["a", "920"]))
+    bib.add_field(
+        Field(tag="600", indicators=["1", "0"], subfields=["a", "Brown, Joyce."])
+    )
+    ncn = NyplCallNo(bib=bib)
+    assert str(ncn.callno_field) == "=091  \\\\$pENG$aB$bBROWN$cA"
+    assert ncn.content_info == "bio"
+
+
+def test_NyplCallNo_missing_cutter():
+    ncn = NyplCallNo(requested_call_type="fic")
+    assert ncn.callno_field is None
+
+
+def test_NyplCallNo_shared_features(make_bib):
+    bib = make_bib(data_008="210101s2021    nyu    j      000 1 eng d")
+    bcn = BplCallNo(bib=bib, requested_call_type="dew")
+    ncn = NyplCallNo(features=bcn.features)
+    assert ncn.features == bcn.features
+    assert ncn.content_info == "fic"
+    assert str(ncn) == "ENG J FIC ADAMS"
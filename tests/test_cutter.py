@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+
+from pymarc import Field
+import pytest
+
+from bookops_callno.cutter import (
+    CutterTable,
+    MappedCutterTable,
+    compile_cutter_table,
+    load_cutter_table,
+    read_cutter_entries,
+)
+from bookops_callno.errors import CallNoConstructorError
+
+ENTRIES = [
+    ("Adams", "A211"),
+    ("Adams, H", "A212"),
+    ("Adler", "A237"),
+    ("Brown", "B812"),
+    ("Browne", "B813"),
+    ("Łukasz", "L954"),
+]
+
+
+@pytest.fixture
+def table_file(tmp_path):
+    path = tmp_path / "cutter.txt"
+    lines = ["# name\tcode", ""] + [f"{name}\t{code}" for name, code in ENTRIES]
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return str(path)
+
+
+@pytest.fixture
+def compiled_file(tmp_path, table_file):
+    path = str(tmp_path / "cutter.bin")
+    compile_cutter_table(table_file, path)
+    return path
+
+
+@pytest.mark.parametrize(
+    "arg,expectation",
+    [
+        ("Adams", "A211"),
+        ("Adams, Abigail", "A211"),
+        ("Adams, John", "A212"),
+        ("Adams, Henry", "A212"),
+        ("Adkins", "A212"),
+        ("Adler", "A237"),
+        ("Azuma", "A237"),
+        ("Brown", "B812"),
+        ("Brownell", "B813"),
+        ("Ba", None),
+        ("Carter", None),
+        ("Lukasz", "L954"),
+        ("", None),
+    ],
+)
+def test_cutter_table_lookup(table_file, compiled_file, arg, expectation):
+    table = CutterTable(read_cutter_entries(table_file))
+    mapped = MappedCutterTable(compiled_file)
+    assert table.lookup(arg) == expectation
+    assert mapped.lookup(arg) == expectation
+    mapped.close()
+
+
+def test_cutter_table_sorts_entries():
+    table = CutterTable(reversed(ENTRIES))
+    assert table.keys == sorted(table.keys)
+    assert len(table) == len(ENTRIES)
+    assert table.lookup("Adams") == "A211"
+
+
+@pytest.mark.parametrize(
+    "arg,expectation",
+    [
+        (
+            Field(tag="100", indicators=["1", " "], subfields=["a", "Adams, Henry,"]),
+            "A211",
+        ),
+        (
+            Field(tag="600", indicators=["1", "0"], subfields=["a", "Brown, Joyce."]),
+            "B812",
+        ),
+        (
+            Field(tag="110", indicators=["2", " "], subfields=["a", "Adler Museum."]),
+            "A237",
+        ),
+        (Field(tag="245", indicators=["0", "0"], subfields=["a", "Foo."]), None),
+        (None, None),
+    ],
+)
+def test_cutter_table_cutter_for(table_file, compiled_file, arg, expectation):
+    table = load_cutter_table(table_file)
+    mapped = MappedCutterTable(compiled_file)
+    assert table.cutter_for(arg) == expectation
+    assert mapped.cutter_for(arg) == expectation
+    mapped.close()
+
+
+def test_cutter_table_duplicate_entries():
+    msg = "Duplicate cutter table entry: 'ADAMS'."
+    with pytest.raises(CallNoConstructorError) as exc:
+        CutterTable([("Adams", "A211"), ("Adams.", "A212")])
+    assert msg in str(exc)
+
+
+def test_cutter_table_empty_entry():
+    msg = "Cutter table entries can not be empty."
+    with pytest.raises(CallNoConstructorError) as exc:
+        CutterTable([("...", "A211")])
+    assert msg in str(exc)
+
+
+def test_read_cutter_entries(table_file):
+    assert read_cutter_entries(table_file) == ENTRIES
+
+
+def test_read_cutter_entries_invalid_line(tmp_path):
+    path = tmp_path / "cutter.txt"
+    path.write_text("Adams\tA211\nAdler A237\n", encoding="utf-8")
+    msg = "Invalid cutter table entry at line 2: 'Adler A237'."
+    with pytest.raises(CallNoConstructorError) as exc:
+        read_cutter_entries(str(path))
+    assert msg in str(exc)
+
+
+def test_read_cutter_entries_missing_file(tmp_path):
+    with pytest.raises(CallNoConstructorError) as exc:
+        read_cutter_entries(str(tmp_path / "missing.txt"))
+    assert "Cutter table file not found" in str(exc)
+
+
+def test_compile_cutter_table(tmp_path, table_file):
+    path = str(tmp_path / "cutter.bin")
+    assert compile_cutter_table(table_file, path) == len(ENTRIES)
+    mapped = MappedCutterTable(path)
+    assert len(mapped) == len(ENTRIES)
+    assert [mapped.keys[n] for n in range(len(mapped))] == [
+        k.encode() for k in CutterTable(ENTRIES).keys
+    ]
+    mapped.close()
+
+
+def test_compile_cutter_table_non_ascii_code(tmp_path):
+    with pytest.raises(CallNoConstructorError) as exc:
+        CutterTable([("Adams", "Å211")]).save(str(tmp_path / "cutter.bin"))
+    assert "Cutter codes must consist of ASCII characters." in str(exc)
+
+
+@pytest.mark.parametrize("data", [b"", b"foo", b"BCNCUT1\n\x01\x00\x00\x00"])
+def test_mapped_cutter_table_invalid_file(tmp_path, data):
+    path = tmp_path / "cutter.bin"
+    path.write_bytes(data)
+    with pytest.raises(CallNoConstructorError) as exc:
+        MappedCutterTable(str(path))
+    assert "Invalid compiled cutter table" in str(exc)
+
+
+def test_load_cutter_table_loads_once(table_file, compiled_file):
+    assert load_cutter_table(table_file) is load_cutter_table(table_file)
+    mapped = load_cutter_table(compiled_file, use_mmap=True)
+    assert isinstance(mapped, MappedCutterTable)
+    assert mapped.lookup("Browning") == "B813"
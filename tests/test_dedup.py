@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+
+from pymarc import Field
+import pytest
+
+from bookops_callno.batch import BatchResult
+from bookops_callno.dedup import (
+    Deduplicator,
+    control_key,
+    dedup_key,
+    fingerprint,
+    order_extra,
+)
+from bookops_callno.orders import Order
+from bookops_callno.pipeline import Pipeline
+from bookops_callno.errors import CallNoConstructorError
+
+
+def test_fingerprint_ignores_irrelevant_fields(make_bib):
+    bib1 = make_bib(control_no="1")
+    bib2 = make_bib(control_no="2")
+    bib2.add_field(Field(tag="949", indicators=[" ", "1"], subfields=["a", "foo"]))
+    assert fingerprint(bib1.as_marc()) == fingerprint(bib2.as_marc())
+
+
+def test_fingerprint_relevant_fields(make_bib):
+    assert fingerprint(make_bib().as_marc()) != fingerprint(
+        make_bib(author="Smith").as_marc()
+    )
+
+
+def test_fingerprint_extra(make_bib):
+    data = make_bib().as_marc()
+    assert fingerprint(data, ("j",)) != fingerprint(data, ("a",))
+
+
+def test_control_key(make_bib):
+    assert control_key(make_bib().as_marc(), ("j",)) == ("ocm00000001", "j")
+
+
+def test_control_key_oclc_number(make_bib):
+    bib = make_bib(control_no=None)
+    bib.add_field(Field(tag="035", indicators=[" ", " "], subfields=["a", "(OCoLC)1"]))
+    assert control_key(bib.as_marc()) == ("(OCoLC)1",)
+
+
+def test_control_key_missing(make_bib):
+    assert control_key(make_bib(control_no=None).as_marc()) is None
+
+
+def test_dedup_key_control_fallback_to_fingerprint(make_bib):
+    data = make_bib(control_no=None).as_marc()
+    assert dedup_key(data, "control") == fingerprint(data)
+
+
+def test_dedup_key_malformed_record():
+    assert dedup_key(b"foo", "fingerprint") is None
+
+
+def test_Deduplicator_invalid_mode():
+    with pytest.raises(CallNoConstructorError):
+        Deduplicator("foo")
+
+
+def test_Deduplicator_window(make_bib):
+    dedup = Deduplicator("control", window=1)
+    a = make_bib(control_no="a").as_marc()
+    b = make_bib(control_no="b").as_marc()
+    items = [(0, a), (1, a), (2, b), (3, a)]
+    processed = []
+
+    def worker(item):
+        processed.append(item[0])
+        return BatchResult(item[0], None, "fic", "FIC")
+
+    results = list(dedup.merge(map(dedup.worker(worker), dedup.filter(items))))
+    assert processed == [0, 2, 3]
+    assert [r.seq for r in results] == [0, 1, 2, 3]
+    assert [r.duplicate for r in results] == [False, True, False, False]
+    assert dedup.duplicates == 1
+    assert dedup._results.keys() == {("a",)}
+
+
+def test_order_extra():
+    assert order_extra((0, b"foo")) == ()
+    assert order_extra((0, b"foo", Order("o1", "j", "spa", "foo", "fc"))) == (
+        "j",
+        "fc",
+    )
+
+
+def test_Deduplicator_order_lines(make_bib):
+    dedup = Deduplicator("control")
+    a = make_bib(control_no="a").as_marc()
+    items = [
+        (0, a, Order("o1", shelf="fc")),
+        (0, a, Order("o2", shelf="fc")),
+        (1, a, Order("o3", shelf="jbc")),
+    ]
+    processed = []
+
+    def worker(item):
+        processed.append(item[2].order_no)
+        return BatchResult(item[0], "a", "fic", "FIC", order_no=item[2].order_no)
+
+    results = list(dedup.merge(map(dedup.worker(worker), dedup.filter(items))))
+    assert processed == ["o1", "o3"]
+    assert [r.order_no for r in results] == ["o1", "o2", "o3"]
+    assert [r.duplicate for r in results] == [False, True, False]
+
+
+def _first_result(item):
+    return BatchResult(item[0], "a", "fic", "FIC")
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_Deduplicator_plan_bounded(make_bib, workers):
+    # duplicates travel through the pipeline, so the plan of a run with
+    # many duplicates is bounded by the queues
+    dedup = Deduplicator("control", splice=True)
+    records = [make_bib(control_no=f"{n}").as_marc() for n in range(2000)]
+    items = ((seq, records[seq // 10]) for seq in range(20000))
+    plan_sizes = []
+
+    def consume(result):
+        plan_sizes.append(len(dedup._plan))
+
+    Pipeline(workers, queue_size=64).run(
+        dedup.filter(items),
+        dedup.worker(_first_result),
+        consume,
+        merge=dedup.merge,
+    )
+    assert len(plan_sizes) == 20000
+    assert dedup.duplicates == 18000
+    assert max(plan_sizes) <= 64
@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+
+from pymarc import Record, Field
+import pytest
+
+from bookops_callno.dewey import (
+    DeweyRangeIndex,
+    dewey_segments,
+    dewey_subject_segment,
+    get_dewey,
+    load_dewey_ranges,
+    parse_dewey,
+    read_dewey_ranges,
+    truncate_dewey,
+)
+from bookops_callno.errors import CallNoConstructorError
+
+
+@pytest.mark.parametrize(
+    "arg,expectation",
+    [
+        ("813.54", "813.54"),
+        ("813/.54", "813.54"),
+        ("641.5/975", "641.5975"),
+        ("616.8/5882/0083", "616.858820083"),
+        ("523.1'1", "523.11"),
+        ("523.1′1", "523.11"),
+        ("[E]", None),
+        ("[Fic]", None),
+        ("[741.5]", "741.5"),
+        ("B", None),
+        (" 500 ", "500"),
+        ("500.", "500"),
+        ("92", None),
+        ("", None),
+        (None, None),
+    ],
+)
+def test_parse_dewey(arg, expectation):
+    assert parse_dewey(arg) == expectation
+
+
+def test_parse_dewey_invalid_value_type():
+    msg = "Invalid 'value' type used in argument. Must be a string."
+    with pytest.raises(CallNoConstructorError) as exc:
+        parse_dewey(813.54)
+    assert msg in str(exc)
+
+
+@pytest.mark.parametrize(
+    "arg1,arg2,expectation",
+    [
+        ("741.2394", "juv", "741.23"),
+        ("741.2394", "early juv", "741.23"),
+        ("741.2394", "adult", "741.2394"),
+        ("348.236701", "adult", "348.2367"),
+        ("348.236701", "young adult", "348.2367"),
+        ("348.236701", None, "348.2367"),
+        ("947.0841", "juv", "947.08"),
+        ("500.0", "adult", "500"),
+        ("500.0123", "juv", "500.01"),
+        ("811", "adult", "811"),
+    ],
+)
+def test_truncate_dewey(arg1, arg2, expectation):
+    assert truncate_dewey(arg1, arg2) == expectation
+
+
+def test_get_dewey_none_bib():
+    assert get_dewey(None) is None
+
+
+def test_get_dewey_invalid_bib():
+    msg = "Invalid 'bib' argument used. Must be pymarc.Record instance."
+    with pytest.raises(CallNoConstructorError) as exc:
+        get_dewey("foo")
+    assert msg in str(exc)
+
+
+def test_get_dewey_no_082():
+    assert get_dewey(Record()) is None
+
+
+def test_get_dewey_first_valid_class_number():
+    bib = Record()
+    bib.add_field(
+        Field(tag="082", indicators=["0", "4"], subfields=["a", "[Fic]", "2", "23"])
+    )
+    bib.add_field(
+        Field(
+            tag="082",
+            indicators=["0", "4"],
+            subfields=["a", "813/.6", "a", "823", "2", "23"],
+        )
+    )
+    assert get_dewey(bib) == "813.6"
+
+
+def test_dewey_segments():
+    values = ["741.5/973", None, "[E]", "741.5/973", "500.1"]
+    assert dewey_segments(values, "juv") == ["741.59", None, None, "741.59", "500.1"]
+    assert dewey_segments(values) == ["741.5973", None, None, "741.5973", "500.1"]
+
+
+@pytest.mark.parametrize(
+    "arg,expectation",
+    [
+        ("813.54", "personal_name"),
+        ("800", "personal_name"),
+        ("899.9", "personal_name"),
+        ("900", None),
+        ("799.9", None),
+        ("005.133", "topic"),
+        ("005.1339", "topic"),
+        ("005.13", None),
+        ("005.134", None),
+        ("005.4469", "topic"),
+        ("759.13", "personal_name"),
+        ("641.5", None),
+        ("000", None),
+        (None, None),
+    ],
+)
+def test_dewey_subject_segment(arg, expectation):
+    assert dewey_subject_segment(arg) == expectation
+
+
+def test_load_dewey_ranges_package_data():
+    index = load_dewey_ranges()
+    assert len(index) > 0
+    assert index is load_dewey_ranges()
+    assert index.starts == sorted(index.starts)
+
+
+def test_dewey_range_index_unsorted_input():
+    index = DeweyRangeIndex(
+        [("800", "900", "personal_name"), ("005.133", "005.134", "topic")]
+    )
+    assert index.starts == ["005.133", "800"]
+    assert index.lookup("005.133") == "topic"
+
+
+@pytest.mark.parametrize(
+    "arg,msg",
+    [
+        ([("80", "900", "topic")], "Invalid Dewey range: '80'-'900'."),
+        ([("900", "800", "topic")], "Start must precede end."),
+        ([("800", "900", "foo")], "Invalid subject segment 'foo'"),
+        (
+            [("800", "900", "topic"), ("810", "820", "topic")],
+            "Overlapping Dewey ranges: '800'-'900' and '810'-'820'.",
+        ),
+    ],
+)
+def test_dewey_range_index_invalid_ranges(arg, msg):
+    with pytest.raises(CallNoConstructorError) as exc:
+        DeweyRangeIndex(arg)
+    assert msg in str(exc)
+
+
+def test_read_dewey_ranges(tmp_path):
+    path = tmp_path / "ranges.tsv"
+    path.write_text(
+        "# start\tend\tsegment\n\n800\t900\tpersonal_name\tliterature\n",
+        encoding="utf-8",
+    )
+    assert read_dewey_ranges(str(path)) == [("800", "900", "personal_name")]
+    assert load_dewey_ranges(str(path)).lookup("813") == "personal_name"
+
+
+def test_read_dewey_ranges_invalid_line(tmp_path):
+    path = tmp_path / "ranges.tsv"
+    path.write_text("800 900 topic\n", encoding="utf-8")
+    with pytest.raises(CallNoConstructorError) as exc:
+        read_dewey_ranges(str(path))
+    assert "Invalid Dewey range at line 1: '800 900 topic'." in str(exc)
+
+
+def test_read_dewey_ranges_missing_file(tmp_path):
+    with pytest.raises(CallNoConstructorError) as exc:
+        read_dewey_ranges(str(tmp_path / "missing.tsv"))
+    assert "Dewey ranges file not found" in str(exc)
@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+
+"""
+Memory benchmarks. Batch runs stream records, so neither the peak nor memory
+retained after a run may grow with the number of records; the peak is bounded
+by queue sizes. Allocations per call of `CallNo._prep` and the builders are
+recorded as test properties; run with
+`--junitxml=report.xml -o junit_family=xunit1` to collect them.
+"""
+
+import gc
+import tracemalloc
+
+from pymarc import Field
+import pytest
+
+from bookops_callno.batch import run_batch
+from bookops_callno.constructor_bpl import BplCallNo
+
+SMALL = 1000
+LARGE = 10000
+# growth of memory retained after a run between SMALL and LARGE input;
+# leaking any object per record exceeds it (worker pools keep about one
+# chunk of results after a run)
+RETAINED_GROWTH = 32 * 1024
+# growth of the peak of a run between SMALL and LARGE input
+PEAK_GROWTH = 256 * 1024
+# peak of a run with `queue_size` of 64 records, regardless of input size
+PEAK_BUDGET = 2 * 1024 * 1024
+# peak of a single call of `_prep` or a builder
+CALL_BUDGET = 16 * 1024
+REPEAT = 200
+
+
+def _write_bibs(make_bib, path, count: int) -> str:
+    with open(path, "wb") as fh:
+        for n in range(count):
+            # names repeat, as in real files, so normalizer cache stays small
+            bib = make_bib(
+                control_no=f"ocm{n:08}",
+                author=f"Adams{n % 50}, John,",
+                title=f"Foo {n % 50} /",
+            )
+            fh.write(bib.as_marc())
+    return str(path)
+
+
+def _trace(func):
+    """
+    Returns result of the function, peak allocated bytes, and bytes retained
+    after the call; tracing starts afresh for each measurement
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = func()
+        gc.collect()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, peak, current
+
+
+def _measure(func, repeat: int = REPEAT):
+    """
+    Returns peak allocated bytes and bytes retained per call
+    """
+    func()
+
+    def _repeat():
+        for _ in range(repeat):
+            func()
+
+    _, peak, current = _trace(_repeat)
+    return peak, current / repeat
+
+
+def _report(record_property, name: str, peak: int, retained: float) -> None:
+    record_property(f"{name}_peak_bytes", peak)
+    record_property(f"{name}_retained_bytes", retained)
+
+
+def _bib(make_bib, call_type: str):
+    if call_type == "dew":
+        bib = make_bib(data_008="210101s2021    nyu           000 0 eng d")
+        bib.add_field(
+            Field(tag="082", indicators=["0", "4"], subfields=["a", "641.5/973"])
+        )
+        return bib
+    if call_type == "des":
+        bib = make_bib(data_008="210101s2021    nyu           000 0 eng d")
+        bib.add_field(
+            Field(tag="082", indicators=["0", "4"], subfields=["a", "813/.54"])
+        )
+        bib.add_field(
+            Field(
+                tag="600", indicators=["1", "0"], subfields=["a", "Poe, Edgar Allan,"]
+            )
+        )
+        return bib
+    if call_type == "bio":
+        return make_bib(
+            data_008="210101s2021    nyu           000 1beng d",
+            subjects=[
+                Field(
+                    tag="600",
+                    indicators=["1", "0"],
+                    subfields=["a", "Brown, Joyce."],
+                )
+            ],
+        )
+    return make_bib()
+
+
+@pytest.mark.parametrize("output_format,workers", [("csv", 1), ("marc", 1), ("csv", 2)])
+def test_batch_run_memory(tmp_path, make_bib, record_property, output_format, workers):
+    warmup = _write_bibs(make_bib, tmp_path / "warmup.mrc", 100)
+    output = str(tmp_path / "out")
+    # first run imports modules and fills caches
+    run_batch(
+        [warmup], output, requested_call_type="fic", queue_size=64, workers=workers
+    )
+
+    measurements = {}
+    for count in (SMALL, LARGE):
+        src = _write_bibs(make_bib, tmp_path / f"{count}.mrc", count)
+        stats, peak, retained = _trace(
+            lambda: run_batch(
+                [src],
+                output,
+                requested_call_type="fic",
+                output_format=output_format,
+                queue_size=64,
+                workers=workers,
+            )
+        )
+        assert stats.created == count
+        measurements[count] = (peak, retained)
+        name = f"batch_{output_format}_{workers}_workers_{count}"
+        _report(record_property, name, peak, retained)
+
+    (small_peak, small_retained), (large_peak, large_retained) = (
+        measurements[SMALL],
+        measurements[LARGE],
+    )
+    assert large_peak < PEAK_BUDGET
+    assert large_peak - small_peak < PEAK_GROWTH
+    assert large_retained - small_retained < RETAINED_GROWTH
+
+
+def test_prep_allocations(make_bib, record_property):
+    bib = make_bib()
+    callno = BplCallNo(bib=bib, requested_call_type="fic")
+    peak, retained = _measure(lambda: callno._prep(bib))
+    _report(record_property, "_prep", peak, retained)
+
+    assert retained < 1
+    assert peak < CALL_BUDGET
+
+
+@pytest.mark.parametrize(
+    "call_type", ["eaudio", "ebook", "evideo", "fic", "pic", "bio", "dew", "des"]
+)
+def test_builder_allocations(make_bib, record_property, call_type):
+    callno = BplCallNo(bib=_bib(make_bib, call_type), requested_call_type=call_type)
+    builder = getattr(callno, f"_create_{call_type}_callno")
+    assert builder() is not None
+    peak, retained = _measure(builder)
+    _report(record_property, builder.__name__, peak, retained)
+
+    assert retained < 1
+    assert peak < CALL_BUDGET
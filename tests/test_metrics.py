@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+
+import os
+
+import pytest
+
+from bookops_callno.batch import run_batch
+from bookops_callno.constructor_bpl import BplCallNo
+from bookops_callno.metrics import (
+    CALLNOS,
+    FAILURES,
+    RECORD_SECONDS,
+    RECORDS,
+    REGISTRY,
+    Counter,
+    Gauge,
+    Histogram,
+    MetricsDelta,
+    MetricsExporter,
+    MetricsRegistry,
+    apply_delta,
+    failure_reason,
+    metrics_delta,
+    metrics_snapshot,
+    pause_metrics,
+    record_result,
+)
+
+
+@pytest.fixture
+def registry():
+    REGISTRY.reset()
+    yield REGISTRY
+    REGISTRY.reset()
+
+
+def test_counter_render():
+    counter = Counter("foo_total", "Foo things.", ("kind",))
+    counter.inc("a")
+    counter.inc("a", amount=2)
+    counter.inc('b"\\\n')
+    assert counter.value("a") == 3
+    assert counter.render() == (
+        "# HELP foo_total Foo things.\n"
+        "# TYPE foo_total counter\n"
+        'foo_total{kind="a"} 3\n'
+        'foo_total{kind="b\\"\\\\\\n"} 1'
+    )
+
+
+def test_counter_invalid_labels():
+    counter = Counter("foo_total", "Foo things.", ("kind",))
+    with pytest.raises(ValueError):
+        counter.inc()
+
+
+def test_gauge():
+    gauge = Gauge("foo", "Foo.", ("kind",))
+    gauge.set(1.5, "a")
+    assert gauge.value("a") == 1.5
+    assert 'foo{kind="a"} 1.5' in gauge.render()
+    assert Gauge("bar", "Bar.", callback=lambda: 7).render().endswith("bar 7")
+
+
+def test_histogram_render():
+    histogram = Histogram("foo_seconds", "Foo time.", buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 2.0):
+        histogram.observe(value)
+    assert histogram.count() == 4
+    assert histogram.render().split("\n")[2:] == [
+        'foo_seconds_bucket{le="0.1"} 2',
+        'foo_seconds_bucket{le="1"} 3',
+        'foo_seconds_bucket{le="+Inf"} 4',
+        "foo_seconds_sum 2.65",
+        "foo_seconds_count 4",
+    ]
+
+
+def test_registry_duplicate_name():
+    registry = MetricsRegistry()
+    registry.counter("foo_total", "Foo.")
+    with pytest.raises(ValueError):
+        registry.counter("foo_total", "Foo.")
+
+
+def test_registry_write(tmp_path):
+    registry = MetricsRegistry()
+    registry.counter("foo_total", "Foo.").inc()
+    path = str(tmp_path / "metrics.prom")
+    registry.write(path)
+    with open(path) as fh:
+        assert fh.read() == registry.render()
+    assert registry.render().endswith("foo_total 1\n")
+
+
+def test_metrics_exporter_interval(tmp_path):
+    registry = MetricsRegistry()
+    counter = registry.counter("foo_total", "Foo.")
+    path = tmp_path / "metrics.prom"
+    exporter = MetricsExporter(str(path), interval=3600, registry=registry)
+    exporter.maybe_write()
+    counter.inc()
+    exporter.maybe_write()
+    assert "foo_total 1" not in path.read_text()
+    exporter.write()
+    assert path.read_text().endswith("foo_total 1\n")
+
+
+@pytest.mark.parametrize(
+    "arg,expectation",
+    [
+        ("Invalid MARC record. Error: 'foo'.", "invalid_marc"),
+        ("Unable to construct call number.", "not_constructed"),
+        (
+            "AttributeError: 'NoneType' object has no attribute 'value'",
+            "AttributeError",
+        ),
+        ("something odd", "other"),
+    ],
+)
+def test_failure_reason(arg, expectation):
+    assert failure_reason(arg) == expectation
+
+
+def test_record_result(registry):
+    record_result("fic", elapsed=0.001)
+    record_result("bio", "Unable to construct call number.", 0.002)
+    assert RECORDS.value("fic", "created") == 1
+    assert RECORDS.value("bio", "failed") == 1
+    assert FAILURES.value("not_constructed") == 1
+    assert RECORD_SECONDS.count() == 2
+
+
+def test_callno_updates_metrics(registry, make_bib):
+    BplCallNo(make_bib(), requested_call_type="fic")
+    BplCallNo(make_bib(), requested_call_type="bio")
+    assert CALLNOS.value("bpl", "fic", "created") == 1
+    assert CALLNOS.value("bpl", "bio", "failed") == 1
+
+
+def test_callno_metrics_paused(registry, make_bib):
+    with pause_metrics():
+        BplCallNo(make_bib(), requested_call_type="fic")
+    assert CALLNOS.value("bpl", "fic", "created") == 0
+    BplCallNo(make_bib(), requested_call_type="fic")
+    assert CALLNOS.value("bpl", "fic", "created") == 1
+
+
+def test_callno_without_bib_not_counted(registry):
+    BplCallNo(requested_call_type="ebook")
+    assert CALLNOS.samples() == []
+
+
+def test_run_batch_metrics_file(registry, make_bib, marc_file, tmp_path):
+    src = marc_file([make_bib(), make_bib()])
+    path = tmp_path / "metrics.prom"
+    run_batch(
+        [src],
+        str(tmp_path / "out.csv"),
+        requested_call_type="fic",
+        workers=2,
+        metrics_file=str(path),
+    )
+    text = path.read_text()
+    assert 'bookops_callno_records_total{pattern="fic",result="created"} 2' in text
+    assert "bookops_callno_record_seconds_count 2" in text
+
+
+def test_metrics_delta(registry, make_bib):
+    snapshot = metrics_snapshot()
+    BplCallNo(make_bib(), requested_call_type="fic")
+    delta = metrics_delta(snapshot)
+    assert delta.pid == os.getpid()
+    assert delta.callnos == ((("bpl", "fic", "created"), 1),)
+    assert delta.cache_hits + delta.cache_misses > 0
+
+
+def test_apply_delta(registry):
+    hits = REGISTRY.get("bookops_callno_normalizer_cache_hits")
+    before = hits.value()
+    apply_delta(MetricsDelta(os.getpid(), ((("bpl", "fic", "created"), 1),), 5, 0))
+    assert CALLNOS.value("bpl", "fic", "created") == 0
+    apply_delta(MetricsDelta(-1, ((("bpl", "fic", "created"), 2),), 5, 1))
+    assert CALLNOS.value("bpl", "fic", "created") == 2
+    assert hits.value() == before + 5
+
+
+def test_run_batch_metrics_file_worker_counters(
+    registry, make_bib, marc_file, tmp_path
+):
+    src = marc_file([make_bib() for _ in range(50)])
+    path = tmp_path / "metrics.prom"
+    hits = REGISTRY.get("bookops_callno_normalizer_cache_hits")
+    misses = REGISTRY.get("bookops_callno_normalizer_cache_misses")
+    before = hits.value() + misses.value()
+    run_batch(
+        [src],
+        str(tmp_path / "out.csv"),
+        requested_call_type="fic",
+        workers=2,
+        metrics_file=str(path),
+    )
+    text = path.read_text()
+    assert (
+        'bookops_callno_callnos_total{system="bpl",pattern="fic",result="created"} 50'
+        in text
+    )
+    assert hits.value() + misses.value() - before >= 50
+    assert REGISTRY.get("bookops_callno_normalizer_cache_hit_ratio").value() > 0
@@ -5,9 +5,11 @@ import pytest
 
 from bookops_callno.errors import CallNoConstructorError
 from bookops_callno.normalizer import (
+    _normalize_value,
     corporate_name_first_word,
     corporate_name_full,
     corporate_name_initial,
+    normalize_many,
     normalize_value,
     personal_name_initial,
     personal_name_surname,
@@ -16,8 +18,10 @@ from bookops_callno.normalizer import (
     subject_family_name,
     subject_personal_name,
     subject_topic,
+    surnames_for,
     title_first_word,
     title_initial,
+    title_initials_for,
 )
 
 
@@ -138,6 +142,15 @@ def test_normalize_value(arg, expectation):
     assert normalize_value(arg) == expectation
 
 
+def test_normalize_value_cached():
+    _normalize_value.cache_clear()
+    normalize_value("Foo")
+    normalize_value("Foo")
+    info = _normalize_value.cache_info()
+    assert info.misses == 1
+    assert info.hits == 1
+
+
 def test_personal_name_initial_none_field():
     assert personal_name_initial(field=None) is None
 
@@ -337,6 +350,43 @@ def test_subject_personal_name(arg1, arg2, expectation):
     assert subject_personal_name(field=field) == expectation
 
 
+def test_subject_topic_none_field():
+    assert subject_topic(field=None) is None
+
+
+def test_subject_topic_invalid_field_type():
+    msg = "Invalid 'field' argument type. Must be pymarc.Field instance."
+    with pytest.raises(CallNoConstructorError) as exc:
+        subject_topic(field=650)
+    assert msg in str(exc)
+
+
+@pytest.mark.parametrize(
+    "tag,arg",
+    [("600", ["a", "Java."]), ("650", ["x", "Programming."]), ("650", ["a", " "])],
+)
+def test_subject_topic_no_topic(tag, arg):
+    field = Field(tag=tag, indicators=[" ", "0"], subfields=arg)
+    assert subject_topic(field=field) is None
+
+
+@pytest.mark.parametrize(
+    "arg,expectation",
+    [
+        (["a", "Java (Computer program language)"], "JAVA"),
+        (["a", "C++ (Computer program language)"], "C++"),
+        (
+            ["a", "Microsoft Excel (Computer file)", "v", "Handbooks."],
+            "MICROSOFT EXCEL",
+        ),
+        (["a", "Linux."], "LINUX"),
+    ],
+)
+def test_subject_topic(arg, expectation):
+    field = Field(tag="650", indicators=[" ", "0"], subfields=arg)
+    assert subject_topic(field=field) == expectation
+
+
 def test_title_initial_none_field():
     assert title_initial(field=None) is None
 
@@ -365,3 +415,69 @@ def test_title_initial_invalid_tag():
 def test_title_initial(arg1, arg2, expectation):
     field = Field(tag="245", indicators=["0", arg1], subfields=arg2)
     assert title_initial(field=field) == expectation
+
+
+def test_normalize_many():
+    assert normalize_many(["Łukasz,", "Adams", "", None, "Łukasz,"]) == [
+        "LUKASZ",
+        "ADAMS",
+        "",
+        "",
+        "LUKASZ",
+    ]
+
+
+def test_normalize_many_transliterates_unique_values_once(monkeypatch):
+    calls = []
+
+    def _normalize(value):
+        calls.append(value)
+        return value.upper()
+
+    monkeypatch.setattr("bookops_callno.normalizer._normalize_value", _normalize)
+    assert normalize_many(["Bär", "Bär", "Bär"]) == ["BÄR", "BÄR", "BÄR"]
+    assert calls == ["Bär"]
+
+
+def test_normalize_many_invalid_value_type():
+    msg = "Invalid 'value' type used in argument. Must be a string."
+    with pytest.raises(CallNoConstructorError) as exc:
+        normalize_many(["foo", 1])
+    assert msg in str(exc)
+
+
+def test_surnames_for():
+    fields = [
+        Field(tag="100", indicators=["1", " "], subfields=["a", "Adams, John,"]),
+        None,
+        Field(tag="110", indicators=["2", " "], subfields=["a", "Foo."]),
+        Field(tag="600", indicators=["0", "0"], subfields=["a", "Louis", "b", "XIV,"]),
+        Field(tag="100", indicators=["1", " "], subfields=["a", "Adams, John,"]),
+    ]
+    assert surnames_for(fields) == ["ADAMS", None, None, "LOUIS XIV", "ADAMS"]
+    assert surnames_for(fields) == [personal_name_surname(f) for f in fields]
+
+
+def test_surnames_for_invalid_field_type():
+    msg = "Invalid 'field' argument type. Must be pymarc.Field instance."
+    with pytest.raises(CallNoConstructorError) as exc:
+        surnames_for([100])
+    assert msg in str(exc)
+
+
+def test_title_initials_for():
+    fields = [
+        Field(tag="245", indicators=["0", "4"], subfields=["a", "The foo."]),
+        Field(tag="246", indicators=["0", "0"], subfields=["a", "Bar."]),
+        None,
+        Field(tag="245", indicators=["0", "0"], subfields=["a", "Éclair"]),
+    ]
+    assert title_initials_for(fields) == ["F", None, None, "E"]
+    assert title_initials_for(fields) == [title_initial(f) for f in fields]
+
+
+def test_title_initials_for_invalid_field_type():
+    msg = "Invalid 'field' argument type. Must be pymarc.Field instance."
+    with pytest.raises(CallNoConstructorError) as exc:
+        title_initials_for([245])
+    assert msg in str(exc)
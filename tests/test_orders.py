@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+
+from pymarc import Field
+import pytest
+
+from bookops_callno.errors import CallNoConstructorError
+from bookops_callno.orders import (
+    Order,
+    OrderIndex,
+    bib_key,
+    join_orders,
+    normalize_bib_no,
+    read_orders,
+)
+
+
+@pytest.fixture
+def orders_file(tmp_path):
+    def _orders_file(content: str, name: str = "orders.csv") -> str:
+        path = tmp_path / name
+        path.write_text(content, encoding="utf-8")
+        return str(path)
+
+    return _orders_file
+
+
+@pytest.mark.parametrize(
+    "arg,expectation",
+    [
+        (".b12345678", "b12345678"),
+        (" B12345678 ", "b12345678"),
+        ("ocm00000001", "ocm00000001"),
+        (".", None),
+        ("", None),
+        (None, None),
+    ],
+)
+def test_normalize_bib_no(arg, expectation):
+    assert normalize_bib_no(arg) == expectation
+
+
+def test_read_orders_csv(orders_file):
+    path = orders_file(
+        "Bib_No,Order_No,Shelf,Audn\n"
+        ".b11111111,.o1,fc,a\n"
+        "\n"
+        ".b11111111,.o2,,j\n"
+    )
+    assert list(read_orders(path)) == [
+        ("b11111111", Order(".o1", "a", None, None, "fc")),
+        ("b11111111", Order(".o2", "j", None, None, None)),
+    ]
+
+
+def test_read_orders_tsv(orders_file):
+    path = orders_file(
+        "bib_no\torder_no\tlang\tnote\n1\to1\tspa\tfoo, bar\n", name="orders.tsv"
+    )
+    assert list(read_orders(path)) == [("1", Order("o1", None, "spa", "foo, bar"))]
+
+
+def test_read_orders_missing_columns(orders_file):
+    path = orders_file("bib_no,shelf\n1,fc\n")
+    with pytest.raises(CallNoConstructorError) as exc:
+        list(read_orders(path))
+    assert "Missing order file columns: order_no." in str(exc)
+
+
+def test_read_orders_invalid_line(orders_file):
+    path = orders_file("bib_no,order_no\n1,o1\n2,\n")
+    with pytest.raises(CallNoConstructorError) as exc:
+        list(read_orders(path))
+    assert "Invalid order line 3: missing bib or order number." in str(exc)
+
+
+def test_read_orders_missing_file(tmp_path):
+    with pytest.raises(CallNoConstructorError) as exc:
+        list(read_orders(str(tmp_path / "missing.csv")))
+    assert "Order file not found" in str(exc)
+
+
+@pytest.mark.parametrize("memory_limit", [100, 2])
+def test_order_index(tmp_path, memory_limit):
+    orders = [
+        ("1", Order("o1", shelf="fc")),
+        ("2", Order("o2")),
+        ("1", Order("o3", audn="j")),
+        ("3", Order("o4")),
+    ]
+    index = OrderIndex(orders, memory_limit=memory_limit, tmpdir=str(tmp_path))
+    assert len(index) == 4
+    assert index.spilled is (memory_limit == 2)
+    assert index.get("1") == [Order("o1", shelf="fc"), Order("o3", audn="j")]
+    assert index.get("3") == [Order("o4")]
+    assert index.get("4") == []
+    assert index.get(None) == []
+    index.close()
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_bib_key(make_bib):
+    bib = make_bib(control_no=" OCM00000001")
+    bib.add_field(Field(tag="907", indicators=[" ", " "], subfields=["a", ".b1"]))
+    data = bib.as_marc()
+    assert bib_key(data) == "ocm00000001"
+    assert bib_key(data, "907") == "b1"
+    assert bib_key(data, "945") is None
+    assert bib_key(b"foo") is None
+
+
+def test_join_orders(make_bib):
+    data1 = make_bib(control_no="1").as_marc()
+    data2 = make_bib(control_no="2").as_marc()
+    index = OrderIndex([("1", Order("o1")), ("1", Order("o2"))])
+    assert list(join_orders([(0, data1), (1, data2)], index)) == [
+        (0, data1, Order("o1")),
+        (0, data1, Order("o2")),
+        (1, data2),
+    ]
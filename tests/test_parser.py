@@ -4,6 +4,8 @@ import pytest
 from pymarc import Record, Field
 
 from bookops_callno.parser import (
+    FixedFields,
+    decode_fixed_fields,
     get_audience,
     get_callno_relevant_subjects,
     get_form_of_item_code,
@@ -15,12 +17,100 @@ from bookops_callno.parser import (
     has_audience_code,
     has_tag,
     is_biography,
+    is_dewey,
+    is_dewey_plus_subject,
+    is_fiction,
+    is_fiction_genre,
     is_lc_subject,
     is_short,
 )
 from bookops_callno.errors import CallNoConstructorError
 
 
+def test_decode_fixed_fields_invalid_bib_arg():
+    with pytest.raises(CallNoConstructorError) as exc:
+        decode_fixed_fields("foo")
+    assert "Invalid 'bib' argument used. Must be pymarc.Record instance." in str(exc)
+
+
+def _data_008(codes):
+    data = list("210101s2021    nyu" + " " * 17 + "eng d")
+    for position, code in codes.items():
+        data[position : position + len(code)] = code
+    return "".join(data)
+
+
+def test_decode_fixed_fields_no_008():
+    bib = Record()
+    bib.leader = "00000cam"
+    assert decode_fixed_fields(bib) == FixedFields(
+        "a", "m", None, None, None, None, None, None
+    )
+
+
+def test_decode_fixed_fields_short_008():
+    bib = Record()
+    bib.leader = "00000cam"
+    bib.add_field(Field(tag="008", data="210101s2021    nyu"))
+    assert decode_fixed_fields(bib) == FixedFields(
+        "a", "m", None, None, None, None, None, None
+    )
+
+
+@pytest.mark.parametrize(
+    "rec_type,codes,expectation",
+    [
+        (
+            "a",
+            {22: "j", 23: "d", 33: "1", 34: "b"},
+            FixedFields("a", "m", "j", "d", "1", None, "b", "eng"),
+        ),
+        (
+            "c",
+            {22: "j", 23: "o", 33: "1"},
+            FixedFields("c", "m", "j", "o", None, None, None, "eng"),
+        ),
+        (
+            "i",
+            {22: "c", 23: "s", 30: "fd"},
+            FixedFields("i", "m", "c", "s", None, "fd", "f", "eng"),
+        ),
+        (
+            "g",
+            {22: "d", 23: "x", 29: "o"},
+            FixedFields("g", "m", "d", "o", None, None, None, "eng"),
+        ),
+        (
+            "k",
+            {22: "j", 23: "x"},
+            FixedFields("k", "m", "j", None, None, None, None, "eng"),
+        ),
+        (
+            "p",
+            {22: "j", 23: "x"},
+            FixedFields("p", "m", None, None, None, None, None, "eng"),
+        ),
+    ],
+)
+def test_decode_fixed_fields(rec_type, codes, expectation):
+    bib = Record()
+    bib.leader = f"00000c{rec_type}m"
+    bib.add_field(Field(tag="008", data=_data_008(codes)))
+    assert decode_fixed_fields(bib) == expectation
+
+
+def test_parser_functions_use_decoded_fixed_fields():
+    bib = Record()
+    bib.leader = "00000cam"
+    bib.add_field(Field(tag="008", data=_data_008({22: "j", 33: "1", 35: "spa"})))
+    fixed = decode_fixed_fields(bib)
+    bib.remove_fields("008")
+    assert get_audience(bib, fixed) == "juv"
+    assert get_language_code(bib, fixed) == "SPA"
+    assert is_fiction(bib, fixed) is True
+    assert get_record_type_code(bib, fixed) == "a"
+
+
 def test_get_audience_none_bib():
     assert get_audience(bib=None) is None
 
@@ -414,6 +504,195 @@ def test_is_biography_audio_material(arg, expectation):
     assert is_biography(bib=bib) == expectation
 
 
+def test_is_dewey_none_bib():
+    assert not is_dewey(bib=None)
+
+
+@pytest.mark.parametrize(
+    "arg,expectation",
+    [("813/.54", True), ("[Fic]", False), ("E", False)],
+)
+def test_is_dewey(arg, expectation):
+    bib = Record()
+    bib.add_field(Field(tag="082", indicators=["0", "4"], subfields=["a", arg]))
+    assert is_dewey(bib=bib) == expectation
+
+
+def test_is_dewey_plus_subject_none_bib():
+    assert not is_dewey_plus_subject(bib=None)
+
+
+@pytest.mark.parametrize(
+    "dewey,subject,expectation",
+    [
+        (
+            "813/.54",
+            Field(
+                tag="600", indicators=["1", "0"], subfields=["a", "Poe, Edgar Allan,"]
+            ),
+            True,
+        ),
+        (
+            "813/.54",
+            Field(
+                tag="600", indicators=["1", "7"], subfields=["a", "Poe, Edgar Allan,"]
+            ),
+            False,
+        ),
+        (
+            "813/.54",
+            Field(tag="650", indicators=[" ", "0"], subfields=["a", "Horror tales."]),
+            False,
+        ),
+        (
+            "005.13/3",
+            Field(
+                tag="650",
+                indicators=[" ", "0"],
+                subfields=["a", "Java (Computer program language)"],
+            ),
+            True,
+        ),
+        (
+            "005.13/3",
+            Field(
+                tag="650",
+                indicators=[" ", "0"],
+                subfields=["a", "(Computer program language)"],
+            ),
+            False,
+        ),
+        (
+            "641.5",
+            Field(tag="650", indicators=[" ", "0"], subfields=["a", "Cooking."]),
+            False,
+        ),
+        (
+            "[Fic]",
+            Field(
+                tag="600", indicators=["1", "0"], subfields=["a", "Poe, Edgar Allan,"]
+            ),
+            False,
+        ),
+    ],
+)
+def test_is_dewey_plus_subject(dewey, subject, expectation):
+    bib = Record()
+    bib.add_field(Field(tag="082", indicators=["0", "4"], subfields=["a", dewey]))
+    bib.add_field(subject)
+    assert is_dewey_plus_subject(bib=bib) == expectation
+
+
+def test_is_fiction_none_bib():
+    assert not is_fiction(bib=None)
+
+
+@pytest.mark.parametrize(
+    "rec_type,code,expectation",
+    [
+        ("a", "1", True),
+        ("a", "f", True),
+        ("t", "j", True),
+        ("a", "0", False),
+        ("a", "p", False),
+        ("t", "d", False),
+    ],
+)
+def test_is_fiction_print_material(rec_type, code, expectation):
+    bib = Record()
+    bib.leader = "@" * 6 + rec_type
+    bib.add_field(Field(tag="008", data="@" * 33 + code))
+    # fixed fields decide; genre terms are not consulted
+    bib.add_field(Field(tag="655", indicators=[" ", "7"], subfields=["a", "Novels."]))
+    assert is_fiction(bib=bib) == expectation
+
+
+@pytest.mark.parametrize(
+    "code,expectation",
+    [("f ", True), (" f", True), ("df", True), ("d ", False), ("pd", False)],
+)
+def test_is_fiction_audio_material(code, expectation):
+    bib = Record()
+    bib.leader = "@" * 6 + "i"
+    bib.add_field(Field(tag="008", data="@" * 30 + code))
+    assert is_fiction(bib=bib) == expectation
+
+
+@pytest.mark.parametrize(
+    "rec_type,data",
+    [("a", "@" * 33 + "u"), ("i", "@" * 30 + "  "), ("a", "@" * 20), ("g", "@" * 40)],
+)
+def test_is_fiction_inconclusive_fixed_fields(rec_type, data):
+    bib = Record()
+    bib.leader = "@" * 6 + rec_type
+    bib.add_field(Field(tag="008", data=data))
+    assert not is_fiction(bib=bib)
+    bib.add_field(
+        Field(
+            tag="650",
+            indicators=[" ", "0"],
+            subfields=["a", "Dragons", "v", "Fiction."],
+        )
+    )
+    assert is_fiction(bib=bib)
+
+
+def test_is_fiction_missing_008():
+    bib = Record()
+    bib.leader = "@" * 6 + "a"
+    bib.add_field(
+        Field(tag="655", indicators=[" ", "7"], subfields=["a", "Short stories."])
+    )
+    assert is_fiction(bib=bib)
+
+
+def test_is_fiction_genre_none_bib():
+    assert not is_fiction_genre(bib=None)
+
+
+@pytest.mark.parametrize(
+    "field,expectation",
+    [
+        (
+            Field(
+                tag="655",
+                indicators=[" ", "7"],
+                subfields=["a", "Detective and mystery fiction."],
+            ),
+            True,
+        ),
+        (
+            Field(tag="655", indicators=[" ", "7"], subfields=["a", "Graphic novels."]),
+            True,
+        ),
+        (
+            Field(tag="655", indicators=[" ", "7"], subfields=["a", "Biographies."]),
+            False,
+        ),
+        (
+            Field(
+                tag="650",
+                indicators=[" ", "0"],
+                subfields=["a", "Cats", "v", "Juvenile fiction."],
+            ),
+            True,
+        ),
+        (
+            Field(
+                tag="650",
+                indicators=[" ", "0"],
+                subfields=["a", "Fiction", "x", "Authorship."],
+            ),
+            False,
+        ),
+    ],
+)
+def test_is_fiction_genre(field, expectation):
+    bib = Record()
+    bib.add_field(field)
+    assert is_fiction_genre(bib=bib) == expectation
+
+
 def test_is_lc_subject_none_field():
     assert is_lc_subject() is False
 
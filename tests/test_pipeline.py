@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+
+import pytest
+
+from bookops_callno.errors import CallNoConstructorError
+from bookops_callno.pipeline import Pipeline, PipelineMetrics
+
+
+def _square(n):
+    return n * n
+
+
+def _fail_on_three(n):
+    if n == 3:
+        raise ValueError("three")
+    return n
+
+
+class Counter:
+    def __init__(self, total):
+        self.total = total
+        self.produced = 0
+        self.lock = threading.Lock()
+
+    def __iter__(self):
+        for n in range(self.total):
+            with self.lock:
+                self.produced += 1
+            yield n
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_pipeline_order(workers):
+    results = []
+    Pipeline(workers, queue_size=8, chunksize=2).run(
+        range(200), _square, results.append
+    )
+    assert results == [n * n for n in range(200)]
+
+
+def test_pipeline_merge():
+    results = []
+
+    def merge(stream):
+        for r in stream:
+            yield r
+            yield -r
+
+    Pipeline(queue_size=2).run(range(3), _square, results.append, merge=merge)
+    assert results == [0, 0, 1, -1, 4, -4]
+
+
+@pytest.mark.parametrize("workers,chunksize", [(1, 1), (2, 1), (1, 4), (2, 4)])
+def test_pipeline_bounded_read_ahead(workers, chunksize):
+    queue_size = 4
+    source = Counter(60)
+    ahead = []
+
+    def consume(result):
+        ahead.append(source.produced - len(ahead))
+        time.sleep(0.002)
+
+    pipeline = Pipeline(workers, queue_size=queue_size, chunksize=chunksize)
+    pipeline.run(source, _square, consume)
+    assert len(ahead) == 60
+    # both queues, records in flight, and a chunk held by each stage
+    assert max(ahead) <= 2 * queue_size + pipeline.in_flight + 4 * chunksize
+
+
+def test_pipeline_metrics_slow_writer():
+    metrics = PipelineMetrics()
+    Pipeline(queue_size=2, chunksize=1, metrics=metrics).run(
+        range(20), _square, lambda r: time.sleep(0.005)
+    )
+    data = metrics.as_dict()
+    assert data["queues"]["output"]["capacity"] == 2
+    assert data["queues"]["output"]["max_depth"] == 2
+    assert data["wait_seconds"]["collector_blocked"] > 0
+    assert data["wait_seconds"]["reader_blocked"] > 0
+    assert "input queue max depth" in metrics.summary()
+
+
+def test_pipeline_reader_error():
+    def items():
+        yield 1
+        raise OSError("disk")
+
+    with pytest.raises(OSError):
+        Pipeline(queue_size=2).run(items(), _square, lambda r: None)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_pipeline_worker_error(workers):
+    with pytest.raises(ValueError):
+        Pipeline(workers, queue_size=2, chunksize=1).run(
+            range(100), _fail_on_three, lambda r: None
+        )
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_pipeline_writer_error(workers):
+    def consume(result):
+        if result == 4:
+            raise OSError("disk full")
+
+    start = time.monotonic()
+    with pytest.raises(OSError):
+        Pipeline(workers, queue_size=2, chunksize=1).run(range(10000), _square, consume)
+    assert time.monotonic() - start < 5
+
+
+@pytest.mark.parametrize(
+    "kwargs", [{"workers": 0}, {"queue_size": 0}, {"chunksize": 0}]
+)
+def test_pipeline_invalid_args(kwargs):
+    with pytest.raises(CallNoConstructorError):
+        Pipeline(**kwargs)
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+
+from pymarc import Field, MARCReader
+import pytest
+
+from bookops_callno.rawmarc import (
+    encode_field,
+    get_control_field,
+    iter_fields,
+    splice_field,
+)
+
+
+def test_iter_fields(make_bib):
+    fields = list(iter_fields(make_bib().as_marc()))
+    assert [t for t, _ in fields] == ["001", "008", "100", "245", "300"]
+    assert fields[0][1] == b"ocm00000001"
+    assert fields[2][1] == b"1 \x1faAdams, John,"
+
+
+def test_iter_fields_invalid_record():
+    with pytest.raises(ValueError):
+        list(iter_fields(b"foo"))
+
+
+def test_get_control_field(make_bib):
+    data = make_bib().as_marc()
+    assert get_control_field(data, "001") == "ocm00000001"
+    assert get_control_field(data, "003") is None
+
+
+def test_encode_field():
+    assert encode_field([" ", "0"], ["a", "FIC", "a", "ADAMS"]) == (
+        b" 0\x1faFIC\x1faADAMS"
+    )
+
+
+def test_splice_field(make_bib):
+    bib = make_bib()
+    bib.add_ordered_field(
+        Field(tag="099", indicators=[" ", " "], subfields=["a", "OLD"])
+    )
+    data = splice_field(bib.as_marc(), "099", [" ", " "], ["a", "Ó", "a", "ADAMS"])
+    new = next(MARCReader(data, to_unicode=True, force_utf8=True))
+    assert [f.tag for f in new.fields] == ["001", "008", "099", "100", "245", "300"]
+    assert new.get_fields("099")[0].subfields == ["a", "Ó", "a", "ADAMS"]
+    assert len(new.get_fields("099")) == 1
+    assert int(data[:5]) == len(data)
+
+
+def test_splice_field_last_position(make_bib):
+    data = splice_field(make_bib().as_marc(), "949", [" ", "1"], ["a", "foo"])
+    new = next(MARCReader(data))
+    assert new.fields[-1].tag == "949"
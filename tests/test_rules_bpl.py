@@ -4,7 +4,15 @@ from pymarc import Field
 import pytest
 
 
-from bookops_callno.rules_bpl import callno_format_prefix
+from bookops_callno.errors import CallNoConstructorError
+from bookops_callno.rules_bpl import (
+    FORMAT_PREFIX_TABLE,
+    OrderRule,
+    callno_format_prefix,
+    load_order_rules,
+    order_rule,
+    read_order_rules,
+)
 
 
 @pytest.mark.parametrize(
@@ -43,3 +51,72 @@ def test_callno_format_prefix(rec_type, form, expectation):
 def test_callno_format_prefix_librettos(rec_type, form, sub, expectation):
     subjs = [Field(tag="650", indicators=[" ", "0"], subfields=["a", "Foo", "v", sub])]
     assert callno_format_prefix(rec_type, form, subjs) == expectation
+
+
+def test_callno_format_prefix_unknown_form_of_item():
+    assert ("i", "x") not in FORMAT_PREFIX_TABLE
+    assert callno_format_prefix("i", "x") == "AUDIO"
+
+
+def test_callno_format_prefix_subjects_checked_only_if_relevant():
+    # subjects are not inspected when prefix does not depend on them
+    assert callno_format_prefix("g", " ", None) == "DVD"
+    assert FORMAT_PREFIX_TABLE[("a", " ")] == (None, "LIB")
+
+
+@pytest.mark.parametrize(
+    "shelf,audn,expectation",
+    [
+        (None, None, OrderRule()),
+        ("bc", None, OrderRule(None, "BOOK & CD")),
+        (" BC ", None, OrderRule(None, "BOOK & CD")),
+        (None, "j", OrderRule("juv", None)),
+        ("jbc", "a", OrderRule("juv", "BOOK & CD")),
+        ("bc", "y", OrderRule("young adult", "BOOK & CD")),
+        ("ej", "a", OrderRule("early juv", None)),
+        ("zz", "z", OrderRule()),
+    ],
+)
+def test_order_rule(shelf, audn, expectation):
+    assert order_rule(shelf, audn) == expectation
+
+
+def test_load_order_rules_package_data():
+    rules = load_order_rules()
+    assert rules is load_order_rules()
+    assert rules[("audn", "j")] == OrderRule("juv", None)
+
+
+def test_read_order_rules(tmp_path):
+    path = tmp_path / "rules.tsv"
+    path.write_text(
+        "# field\tcode\taudience\tformat\n\nshelf\tLP\n" "shelf\tlpj\tjuv\tLG PRINT\n",
+        encoding="utf-8",
+    )
+    assert read_order_rules(str(path)) == {
+        ("shelf", "lp"): OrderRule(),
+        ("shelf", "lpj"): OrderRule("juv", "LG PRINT"),
+    }
+
+
+@pytest.mark.parametrize(
+    "content,msg",
+    [
+        ("loc\tfc\n", "Invalid order rule at line 1"),
+        ("shelf\n", "Invalid order rule at line 1: 'shelf'."),
+        ("shelf\tfc\tkids\n", "Invalid order rule at line 1"),
+        ("shelf\tfc\nshelf\tFC\n", "Duplicate order rule at line 2: 'shelf' 'FC'."),
+    ],
+)
+def test_read_order_rules_invalid_line(tmp_path, content, msg):
+    path = tmp_path / "rules.tsv"
+    path.write_text(content, encoding="utf-8")
+    with pytest.raises(CallNoConstructorError) as exc:
+        read_order_rules(str(path))
+    assert msg in str(exc)
+
+
+def test_read_order_rules_missing_file(tmp_path):
+    with pytest.raises(CallNoConstructorError) as exc:
+        read_order_rules(str(tmp_path / "missing.tsv"))
+    assert "Order rules file not found" in str(exc)
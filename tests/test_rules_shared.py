@@ -4,10 +4,12 @@ import pytest
 from pymarc import Field
 
 from bookops_callno.rules_shared import (
+    CONTENT_TABLE,
     biographee,
     callno_cutter_fic,
     callno_cutter_initial,
     callno_cutter_pic,
+    dewey_subject,
 )
 
 
@@ -78,3 +80,46 @@ def test_callno_cutter_pic(tag, inds, subs, expectation):
 @pytest.mark.parametrize("arg", [None, 100])
 def test_callno_cutter_pic_invalid_arg(arg):
     assert callno_cutter_pic(arg) is None
+
+
+@pytest.mark.parametrize(
+    "key,expectation",
+    [
+        (("a", False, True, True, False), ("pic",)),
+        (("a", False, False, True, True), ("fic",)),
+        (("t", False, False, False, False), ("des", "dew")),
+        (("a", False, False, False, True), ("des", "bio", "dew")),
+        (("a", True, False, True, False), ("ebook",)),
+        (("i", False, False, True, False), ("fic",)),
+        (("i", False, False, False, False), ("des", "dew")),
+        (("i", False, False, False, True), ("des", "bio", "dew")),
+        (("i", True, False, False, False), ("eaudio",)),
+        (("g", False, False, False, False), ("des", "dew")),
+        (("g", False, False, True, False), ("des", "dew")),
+        (("g", False, False, False, True), ("des", "bio", "dew")),
+        (("g", True, True, False, False), ("evideo",)),
+    ],
+)
+def test_content_table(key, expectation):
+    assert CONTENT_TABLE[key] == expectation
+
+
+def test_content_table_unsupported_record_type():
+    assert ("m", False, False, False, False) not in CONTENT_TABLE
+
+
+@pytest.mark.parametrize(
+    "class_number,subs,expectation",
+    [
+        ("005.133", ["a", "Java (Computer program language)"], "JAVA"),
+        ("005.133", ["a", "(Computer program language)"], None),
+        ("641.5", ["a", "Cooking."], None),
+        (None, ["a", "Java (Computer program language)"], None),
+    ],
+)
+def test_dewey_subject(class_number, subs, expectation):
+    subjects = [
+        Field(tag="600", indicators=["1", "0"], subfields=["a", "Adams, John."]),
+        Field(tag="650", indicators=[" ", "0"], subfields=subs),
+    ]
+    assert dewey_subject(class_number, subjects) == expectation
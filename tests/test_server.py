@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+
+import http.client
+import json
+import threading
+
+import pytest
+
+from bookops_callno.client import CallNoClient, load_test
+from bookops_callno.errors import CallNoConstructorError
+from bookops_callno.metrics import REGISTRY
+from bookops_callno.server import CallNoServer, parse_records, record_from_json
+
+
+@pytest.fixture(scope="module")
+def server():
+    srv = CallNoServer(port=0, requested_call_type="fic", quiet=True)
+    thread = threading.Thread(target=srv.serve_forever, daemon=True)
+    thread.start()
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+
+
+@pytest.fixture
+def client(server):
+    with CallNoClient(*server.server_address) as c:
+        yield c
+
+
+def test_record_from_json(make_bib):
+    bib = make_bib()
+    assert record_from_json(bib.as_dict()).as_marc() == bib.as_marc()
+
+
+@pytest.mark.parametrize("arg", [[], {"leader": "foo"}, "foo"])
+def test_record_from_json_invalid(arg):
+    with pytest.raises(CallNoConstructorError):
+        record_from_json(arg)
+
+
+@pytest.mark.parametrize(
+    "arg,msg",
+    [
+        ({"fields": 5}, "fields must be a list"),
+        ({"fields": [1]}, "field must be an object"),
+        ({"leader": 5, "fields": []}, "leader must be a string"),
+        ({"fields": [{"001": 5}]}, "value of field 001 must be a string"),
+        ({"fields": [{"245": {"subfields": 5}}]}, "subfields of field 245"),
+        ({"fields": [{"245": {"subfields": [5]}}]}, "subfield of field 245"),
+        ({"fields": [{"245": {"subfields": [{"a": 5}]}}]}, "subfield a of field"),
+        ({"fields": [{"245": {"ind1": 1, "subfields": []}}]}, "indicators of"),
+    ],
+)
+def test_record_from_json_invalid_structure(arg, msg):
+    with pytest.raises(CallNoConstructorError) as exc:
+        record_from_json(arg)
+    assert "Invalid MARC-in-JSON record." in str(exc.value)
+    assert msg in str(exc.value)
+
+
+def test_parse_records_marc(make_bib):
+    body = make_bib(control_no="1").as_marc() + make_bib(control_no="2").as_marc()
+    bibs = parse_records(body, "application/marc")
+    assert [b["001"].data for b in bibs] == ["1", "2"]
+
+
+def test_parse_records_json(make_bib):
+    body = json.dumps(make_bib().as_dict()).encode("utf-8")
+    bibs = parse_records(body, "application/json")
+    assert len(bibs) == 1
+
+
+@pytest.mark.parametrize(
+    "body,content_type,msg",
+    [
+        (b"{", "application/json", "Invalid JSON."),
+        (b"5", "application/json", "Invalid MARC-in-JSON body."),
+        (b'"foo"', "application/json", "Invalid MARC-in-JSON body."),
+        (b"foo", "text/plain", "Unsupported content type 'text/plain'."),
+    ],
+)
+def test_parse_records_invalid(body, content_type, msg):
+    with pytest.raises(CallNoConstructorError) as exc:
+        parse_records(body, content_type)
+    assert msg in str(exc)
+
+
+def test_CallNoServer_invalid_system():
+    with pytest.raises(CallNoConstructorError):
+        CallNoServer(port=0, system="qpl")
+
+
+def test_service_health(client):
+    health = client.health()
+    assert health["status"] == "ok"
+    assert health["normalizer_cache"]["size"] > 0
+
+
+def test_service_callno_marc(client, make_bib):
+    result = client.callno(make_bib().as_marc())
+    assert result["callno"] == "ENG FIC ADAMS"
+    assert result["control_no"] == "ocm00000001"
+
+
+def test_service_callno_json_with_options(client, make_bib):
+    result = client.callno(
+        make_bib().as_dict(), system="bpl", requested_call_type="pic"
+    )
+    assert result["callno"] == "ENG J-E ADAMS"
+    assert result["pattern"] == "pic"
+
+
+def test_service_batch_keep_alive(client, make_bib):
+    body = make_bib(control_no="1").as_marc() + make_bib(control_no="2").as_marc()
+    results = client.batch(body)
+    assert [r["control_no"] for r in results] == ["1", "2"]
+    sock = client.conn.sock
+    client.batch([make_bib().as_dict()])
+    assert client.conn.sock is sock
+
+
+def test_service_callno_multiple_records_error(client, make_bib):
+    with pytest.raises(CallNoConstructorError) as exc:
+        client.callno(make_bib().as_marc() * 2)
+    assert "Exactly one record expected." in str(exc)
+
+
+def test_service_invalid_system(client, make_bib):
+    with pytest.raises(CallNoConstructorError) as exc:
+        client.callno(make_bib().as_marc(), system="qpl")
+    assert "status 400" in str(exc)
+
+
+@pytest.mark.parametrize("method,path", [("GET", "/foo"), ("POST", "/foo")])
+def test_service_not_found(server, method, path):
+    conn = http.client.HTTPConnection(*server.server_address)
+    conn.request(method, path, body=b"")
+    assert conn.getresponse().status == 404
+    conn.close()
+
+
+def test_service_metrics(server, client, make_bib):
+    client.callno(make_bib().as_marc())
+    conn = http.client.HTTPConnection(*server.server_address)
+    conn.request("GET", "/metrics")
+    response = conn.getresponse()
+    body = response.read().decode("utf-8")
+    conn.close()
+    assert response.status == 200
+    assert response.getheader("Content-Type").startswith("text/plain; version=0.0.4")
+    assert 'bookops_callno_records_total{pattern="fic",result="created"}' in body
+    assert "bookops_callno_record_seconds_count" in body
+    assert "bookops_callno_normalizer_cache_hit_ratio" in body
+
+
+@pytest.mark.parametrize(
+    "body",
+    [b'{"fields":[1]}', b'[{"fields":[{"245":{"subfields":5}}]}]', b"5"],
+)
+def test_service_invalid_json_record(server, body):
+    conn = http.client.HTTPConnection(*server.server_address)
+    conn.request(
+        "POST", "/batch", body=body, headers={"Content-Type": "application/json"}
+    )
+    response = conn.getresponse()
+    payload = json.loads(response.read())
+    conn.close()
+    assert response.status == 400
+    assert payload["error"].startswith("Invalid MARC-in-JSON")
+
+
+def test_service_metrics_after_startup():
+    REGISTRY.reset()
+    srv = CallNoServer(port=0, quiet=True)
+    thread = threading.Thread(target=srv.serve_forever, daemon=True)
+    thread.start()
+    try:
+        conn = http.client.HTTPConnection(*srv.server_address)
+        conn.request("GET", "/metrics")
+        body = conn.getresponse().read().decode("utf-8")
+        conn.close()
+    finally:
+        srv.shutdown()
+        srv.server_close()
+    assert "# TYPE bookops_callno_callnos_total counter" in body
+    assert "bookops_callno_callnos_total{" not in body
+    assert "bookops_callno_records_total{" not in body
+
+
+def test_service_missing_content_length(server):
+    conn = http.client.HTTPConnection(*server.server_address)
+    conn.putrequest("POST", "/callno")
+    conn.endheaders()
+    assert conn.getresponse().status == 411
+    conn.close()
+
+
+@pytest.mark.parametrize("batch_size", [1, 3])
+def test_load_test(server, make_bib, marc_file, batch_size):
+    src = marc_file([make_bib(control_no=str(n)) for n in range(5)])
+    host, port = server.server_address
+    stats = load_test(
+        src, host, port, requests=20, concurrency=2, batch_size=batch_size
+    )
+    assert stats["requests"] == 20
+    assert stats["records"] == 20 * batch_size
+    assert stats["errors"] == 0
+    assert stats["latency_p50"] <= stats["latency_p99"]
@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+
+import json
+import os
+
+import pytest
+
+from bookops_callno.batch import BatchStats, iter_batch, run_batch
+from bookops_callno.errors import CallNoConstructorError
+from bookops_callno.shard import (
+    find_boundary,
+    merge_outputs,
+    merge_stats,
+    parse_shard_spec,
+    shard_range,
+    shard_stats,
+)
+
+
+@pytest.fixture
+def big_file(make_bib, marc_file):
+    return marc_file([make_bib(control_no=str(n)) for n in range(25)])
+
+
+@pytest.mark.parametrize("arg,expectation", [("1/1", (1, 1)), ("2/8", (2, 8))])
+def test_parse_shard_spec(arg, expectation):
+    assert parse_shard_spec(arg) == expectation
+
+
+@pytest.mark.parametrize("arg", ["0/2", "3/2", "1", "a/b", "1/0", None])
+def test_parse_shard_spec_invalid(arg):
+    with pytest.raises(CallNoConstructorError) as exc:
+        parse_shard_spec(arg)
+    assert "Invalid shard specification" in str(exc.value)
+
+
+def test_find_boundary(make_bib, marc_file):
+    size = len(make_bib().as_marc())
+    path = marc_file([make_bib(), make_bib()])
+    assert find_boundary(path, 0) == 0
+    assert find_boundary(path, 1) == size
+    assert find_boundary(path, size) == size
+    assert find_boundary(path, size + 1) == 2 * size
+    assert find_boundary(path, 10 * size) == 2 * size
+
+
+@pytest.mark.parametrize("shards", [1, 2, 3, 7, 40])
+def test_shard_range_covers_file(big_file, shards):
+    ranges = [shard_range(big_file, n, shards) for n in range(1, shards + 1)]
+    assert ranges[0][0] == 0
+    assert ranges[-1][1] == os.path.getsize(big_file)
+    for prev, cur in zip(ranges, ranges[1:]):
+        assert prev[1] == cur[0]
+    records = []
+    for byte_range in ranges:
+        records.extend(d for _, d in iter_batch([big_file], byte_range=byte_range))
+    assert records == [d for _, d in iter_batch([big_file])]
+
+
+def test_run_batch_byte_range_multiple_inputs(big_file, tmp_path):
+    with pytest.raises(CallNoConstructorError):
+        run_batch([big_file, big_file], str(tmp_path / "out.csv"), byte_range=(0, 10))
+
+
+def _run_shards(path, tmp_path, output_format, shards=3, **kwargs):
+    parts = []
+    stats = []
+    for n in range(1, shards + 1):
+        byte_range = shard_range(path, n, shards)
+        out = str(tmp_path / f"part{n}.{output_format}")
+        result = run_batch(
+            [path],
+            out,
+            requested_call_type="fic",
+            output_format=output_format,
+            byte_range=byte_range,
+            **kwargs,
+        )
+        stats_path = str(tmp_path / f"part{n}.json")
+        with open(stats_path, "w") as fh:
+            json.dump(shard_stats(result, n, shards, byte_range), fh)
+        parts.append(out)
+        stats.append(stats_path)
+    return parts, stats
+
+
+@pytest.mark.parametrize("output_format", ["csv", "jsonl", "marc"])
+def test_merge_outputs_matches_single_run(big_file, tmp_path, output_format):
+    whole = str(tmp_path / f"whole.{output_format}")
+    run_batch([big_file], whole, requested_call_type="fic", output_format=output_format)
+    parts, _ = _run_shards(big_file, tmp_path, output_format)
+    merged = str(tmp_path / f"merged.{output_format}")
+    count = merge_outputs(parts, merged, output_format)
+    if output_format != "marc":
+        assert count == 25
+    with open(whole, "rb") as a, open(merged, "rb") as b:
+        assert a.read() == b.read()
+
+
+@pytest.mark.parametrize("output_format", ["csv", "jsonl"])
+def test_merge_outputs_orders(big_file, tmp_path, output_format):
+    orders = tmp_path / "orders.csv"
+    orders.write_text(
+        "bib_no,order_no\n"
+        + "".join(f"{n},o{n}a\n{n},o{n}b\n" for n in range(0, 25, 2)),
+        encoding="utf-8",
+    )
+    whole = str(tmp_path / f"whole.{output_format}")
+    run_batch(
+        [big_file],
+        whole,
+        requested_call_type="fic",
+        output_format=output_format,
+        orders=str(orders),
+    )
+    parts, _ = _run_shards(big_file, tmp_path, output_format, orders=str(orders))
+    merged = str(tmp_path / f"merged.{output_format}")
+    assert merge_outputs(parts, merged, output_format) == 25
+    with open(whole, "rb") as a, open(merged, "rb") as b:
+        assert a.read() == b.read()
+
+
+def test_merge_outputs_mismatched_columns(tmp_path):
+    a = tmp_path / "a.csv"
+    b = tmp_path / "b.csv"
+    a.write_text("seq,callno\n0,FIC A\n")
+    b.write_text("seq,foo\n0,bar\n")
+    with pytest.raises(CallNoConstructorError):
+        merge_outputs([str(a), str(b)], str(tmp_path / "out.csv"))
+
+
+def test_merge_outputs_invalid_format(tmp_path):
+    with pytest.raises(CallNoConstructorError):
+        merge_outputs([], str(tmp_path / "out"), "xml")
+
+
+def test_merge_stats(big_file, tmp_path):
+    _, stats = _run_shards(big_file, tmp_path, "csv")
+    total = merge_stats(list(reversed(stats)))
+    assert total.processed == 25
+    assert total.created == 25
+    assert total.patterns == {"fic": {"created": 25, "failed": 0}}
+
+
+def test_merge_stats_missing_shard(big_file, tmp_path):
+    _, stats = _run_shards(big_file, tmp_path, "csv")
+    with pytest.raises(CallNoConstructorError) as exc:
+        merge_stats(stats[:2])
+    assert "Incomplete set of shards" in str(exc.value)
+
+
+def test_merge_stats_gap(tmp_path):
+    paths = []
+    for n, byte_range in enumerate([(0, 10), (20, 30)], start=1):
+        path = tmp_path / f"{n}.json"
+        path.write_text(json.dumps(shard_stats(BatchStats(), n, 2, byte_range)))
+        paths.append(str(path))
+    with pytest.raises(CallNoConstructorError) as exc:
+        merge_stats(paths)
+    assert "not contiguous" in str(exc.value)
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from bookops_callno.constructor_bpl import BplCallNo
+from bookops_callno.errors import CallNoConstructorError
+from bookops_callno.shelflist import ShelflistIndex, ShelflistMatch, normalize_callno
+
+
+@pytest.fixture
+def index(tmp_path):
+    values = ["FIC ADAMS", "fic  adams", "J FIC BROWN", "B ADAMS G", "811 A", ""]
+    with ShelflistIndex.build(values, str(tmp_path / "shelflist.idx")) as idx:
+        yield idx
+
+
+@pytest.mark.parametrize(
+    "arg,expectation",
+    [
+        ("FIC ADAMS", "FIC ADAMS"),
+        (" fic   Adams\n", "FIC ADAMS"),
+        ("$aFIC$aADAMS", "FIC ADAMS"),
+        ("=099  \\\\$aJ$aFIC$aADAMS", "J FIC ADAMS"),
+    ],
+)
+def test_normalize_callno(arg, expectation):
+    assert normalize_callno(arg) == expectation
+
+
+def test_ShelflistIndex_build(index):
+    assert len(index) == 4
+    assert [index[n] for n in range(len(index))] == [
+        "811 A",
+        "B ADAMS G",
+        "FIC ADAMS",
+        "J FIC BROWN",
+    ]
+
+
+@pytest.mark.parametrize(
+    "arg,expectation",
+    [
+        ("FIC ADAMS", True),
+        ("$aFIC$aADAMS", True),
+        ("811 A", True),
+        ("J FIC BROWN", True),
+        ("FIC ADAM", False),
+        ("000", False),
+        ("ZZZ", False),
+    ],
+)
+def test_ShelflistIndex_contains(index, arg, expectation):
+    assert (arg in index) is expectation
+
+
+def test_ShelflistIndex_contains_callno_instance(index):
+    bcn = BplCallNo(requested_call_type="ebook")
+    assert bcn not in index
+
+
+def test_ShelflistIndex_check_exact(index):
+    assert index.check("FIC ADAMS", neighbors=1) == ShelflistMatch(
+        "FIC ADAMS", True, ["B ADAMS G"], ["J FIC BROWN"]
+    )
+
+
+def test_ShelflistIndex_check_nearest(index):
+    assert index.check("fic adamson") == ShelflistMatch(
+        "FIC ADAMSON", False, ["B ADAMS G", "FIC ADAMS"], ["J FIC BROWN"]
+    )
+
+
+def test_ShelflistIndex_check_edges(index):
+    assert index.check("000").before == []
+    assert index.check("ZZZ").after == []
+
+
+@pytest.mark.parametrize("use_mmap", [True, False])
+def test_ShelflistIndex_reopen(index, tmp_path, use_mmap):
+    with ShelflistIndex(str(tmp_path / "shelflist.idx"), use_mmap=use_mmap) as idx:
+        assert len(idx) == 4
+        assert "B ADAMS G" in idx
+
+
+def test_ShelflistIndex_from_text(tmp_path):
+    dump = tmp_path / "dump.txt"
+    dump.write_text("FIC ADAMS\nJ-E A\n\nFIC ADAMS\n", encoding="utf-8")
+    with ShelflistIndex.from_text(str(dump), str(tmp_path / "idx")) as idx:
+        assert len(idx) == 2
+        assert "J-E A" in idx
+
+
+def test_ShelflistIndex_empty(tmp_path):
+    with ShelflistIndex.build([], str(tmp_path / "idx")) as idx:
+        assert len(idx) == 0
+        assert "FIC ADAMS" not in idx
+        assert idx.check("FIC ADAMS") == ShelflistMatch("FIC ADAMS", False, [], [])
+
+
+def test_ShelflistIndex_invalid_file(tmp_path):
+    path = tmp_path / "foo.idx"
+    path.write_bytes(b"foo")
+    with pytest.raises(CallNoConstructorError) as exc:
+        ShelflistIndex(str(path))
+    assert "Invalid shelflist index file" in str(exc)
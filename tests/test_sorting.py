@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+
+import io
+
+import pytest
+
+from bookops_callno.errors import CallNoConstructorError
+from bookops_callno.sorting import callno_sort_key, external_sort
+
+SHELF_ORDER = [
+    "92 A",
+    "500 D",
+    "741.23 T",
+    "741.3 A",
+    "811 A",
+    "947.08 B",
+    "947.08 BROWN",
+    "AUDIO FIC ADAMS",
+    "AUDIO SPA J FIC ADAMS",
+    "B ADAMS G",
+    "B ADAMSON A",
+    "FIC ADAMS",
+    "FIC ADAMS J",
+    "FIC ADAMSON",
+    "FIC T",
+    "J 741.23 T",
+    "J-E A",
+    "J-E ADAMS",
+    "J FIC ADAMS",
+    "SPA FIC ADAMS",
+]
+
+
+def test_callno_sort_key_shelf_order():
+    shuffled = sorted(SHELF_ORDER, key=lambda c: c[::-1])
+    assert sorted(shuffled, key=callno_sort_key) == SHELF_ORDER
+
+
+@pytest.mark.parametrize(
+    "arg1,arg2",
+    [
+        ("FIC ADAMS", " fic  adams "),
+        ("947.08 B", "947.080 B"),
+        ("J-E A", "J E A"),
+    ],
+)
+def test_callno_sort_key_equivalent(arg1, arg2):
+    assert callno_sort_key(arg1) == callno_sort_key(arg2)
+
+
+def test_callno_sort_key_hex_preserves_order():
+    keys = [callno_sort_key(c) for c in SHELF_ORDER]
+    assert sorted(k.hex() for k in keys) == [k.hex() for k in sorted(keys)]
+
+
+def test_callno_sort_key_invalid_type():
+    with pytest.raises(CallNoConstructorError):
+        callno_sort_key(None)
+
+
+@pytest.mark.parametrize("chunk_size,fan_in", [(100, 64), (3, 64), (2, 2)])
+def test_external_sort(chunk_size, fan_in, tmp_path):
+    lines = [f"{c}\n" for c in reversed(SHELF_ORDER)] + ["\n"]
+    output = io.StringIO()
+    count = external_sort(
+        lines, output, chunk_size=chunk_size, fan_in=fan_in, tmpdir=str(tmp_path)
+    )
+    assert count == len(SHELF_ORDER)
+    assert output.getvalue().splitlines() == SHELF_ORDER
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_external_sort_field():
+    lines = ["2\tFIC ADAMS\n", "1\t811 A\n", "3\n"]
+    output = io.StringIO()
+    external_sort(lines, output, field=1, chunk_size=1)
+    assert output.getvalue().splitlines() == ["3", "1\t811 A", "2\tFIC ADAMS"]
+
+
+def test_external_sort_invalid_arguments():
+    with pytest.raises(CallNoConstructorError):
+        external_sort([], io.StringIO(), chunk_size=0)